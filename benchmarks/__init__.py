@@ -0,0 +1,10 @@
+# encoding: utf-8
+"""
+swatch.benchmarks
+
+Throughput and peak-memory benchmarks for ``swatch``; see ``bench_swatch.py``.
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+swatch.benchmarks.bench_swatch
+
+Measures ``swatch.parse``, ``swatch.dumps`` and a full round-trip – time and
+peak memory – over every library in ``swatches/ase`` and over synthetic
+palettes of 10 to 10⁶ swatches, and writes the results as JSON so that runs
+from different commits can be compared:
+
+    $ python benchmarks/bench_swatch.py -o before.json
+    $ git checkout my-branch
+    $ python benchmarks/bench_swatch.py -o after.json --compare before.json
+
+Everything runs offline, with nothing beyond the standard library.
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import argparse
+import datetime
+import gc
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import swatch
+
+CORPUS = os.path.join(ROOT, 'swatches', 'ase')
+SIZES = (10, 100, 1000, 10000, 100000, 1000000)
+MODES = (('RGB', 3), ('CMYK', 4), ('LAB', 3), ('Gray', 1))
+TYPES = ('Process', 'Spot', 'Global')
+
+def synthetic_palette(count, group_size=1000):
+    """ Build a palette of `count` swatches, in color groups of `group_size` """
+    palette = []
+    for start in range(0, count, group_size):
+        swatches = []
+        for index in range(start, min(count, start + group_size)):
+            mode, width = MODES[index % len(MODES)]
+            swatches.append({
+                'name': 'Swatch %d' % index,
+                'type': TYPES[index % len(TYPES)],
+                'data': {
+                    'mode': mode,
+                    'values': [((index * 7 + channel * 13) % 101) / 100.0
+                               for channel in range(width)]
+                }
+            })
+        palette.append({
+            'name': 'Group %d' % (start // group_size),
+            'type': 'Color Group',
+            'swatches': swatches
+        })
+    return palette
+
+def swatch_count(obj):
+    return sum(len(item['swatches']) if 'swatches' in item else 1 for item in obj)
+
+def measure(function, repeat, number=1):
+    """ Time `function` and trace its peak memory, returning a result dict """
+    gc.collect()
+    timings = [time / number for time in timeit.repeat(function, repeat=repeat, number=number)]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    timings.sort()
+    return {
+        'min': timings[0],
+        'median': timings[len(timings) // 2],
+        'mean': sum(timings) / len(timings),
+        'repeat': repeat,
+        'number': number,
+        'peak_bytes': peak
+    }
+
+def bench_file(path, repeat):
+    """ Benchmark parsing, writing and round-tripping the file at `path` """
+    parsed = swatch.parse(path)
+    case = {'case': os.path.basename(path),
+            'swatches': swatch_count(parsed),
+            'bytes': os.path.getsize(path)}
+    yield dict(case, benchmark='parse', **measure(lambda: swatch.parse(path), repeat))
+    yield dict(case, benchmark='dumps', **measure(lambda: swatch.dumps(parsed), repeat))
+    yield dict(case, benchmark='roundtrip',
+               **measure(lambda: swatch.dumps(swatch.parse(path)), repeat))
+
+def bench_synthetic(count, repeat, directory):
+    """ Benchmark a synthetic palette of `count` swatches """
+    palette = synthetic_palette(count)
+    path = os.path.join(directory, 'synthetic-%d.ase' % count)
+    swatch.write(palette, path)
+    case = {'case': 'synthetic-%d' % count,
+            'swatches': count,
+            'bytes': os.path.getsize(path)}
+    yield dict(case, benchmark='parse', **measure(lambda: swatch.parse(path), repeat))
+    yield dict(case, benchmark='dumps', **measure(lambda: swatch.dumps(palette), repeat))
+    yield dict(case, benchmark='roundtrip',
+               **measure(lambda: swatch.dumps(swatch.parse(path)), repeat))
+
+def git_revision():
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT,
+                                         stderr=subprocess.STDOUT)
+        return output.decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def metadata():
+    return {
+        'swatch_version': swatch.__version__,
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat()
+    }
+
+def run(sizes, repeat, corpus=True, pattern='*'):
+    results = []
+    if corpus:
+        for path in sorted(glob.glob(os.path.join(CORPUS, pattern + '.ase'))):
+            results.extend(bench_file(path, repeat))
+            print('.', end='', file=sys.stderr)
+            sys.stderr.flush()
+    directory = tempfile.mkdtemp()
+    try:
+        for count in sizes:
+            # fewer repeats for the biggest palettes, to keep runs bearable
+            results.extend(bench_synthetic(count, max(1, min(repeat, 10 ** 6 // (count * 10))),
+                                           directory))
+            print('.', end='', file=sys.stderr)
+            sys.stderr.flush()
+    finally:
+        for name in os.listdir(directory):
+            os.unlink(os.path.join(directory, name))
+        os.rmdir(directory)
+    print(file=sys.stderr)
+    return {'meta': metadata(), 'results': results}
+
+def totals(report):
+    """ Sum the median times of every benchmark, over corpus and synthetic cases """
+    output = {}
+    for result in report['results']:
+        kind = 'synthetic' if result['case'].startswith('synthetic-') else 'corpus'
+        key = (result['benchmark'], kind)
+        output[key] = output.get(key, 0.0) + result['median']
+    return output
+
+def compare(report, baseline):
+    """ Print the change in every benchmark’s median time against `baseline` """
+    previous = dict(((result['benchmark'], result['case']), result)
+                    for result in baseline['results'])
+    print('%-10s %-60s %12s %12s %8s' % ('benchmark', 'case', 'before (ms)', 'after (ms)', 'ratio'))
+    for result in report['results']:
+        before = previous.get((result['benchmark'], result['case']))
+        if before is None:
+            continue
+        print('%-10s %-60s %12.3f %12.3f %7.2fx' % (
+              result['benchmark'], result['case'][:60], before['median'] * 1000,
+              result['median'] * 1000, before['median'] / max(result['median'], 1e-12)))
+
+def summarize(report):
+    for (benchmark, kind), seconds in sorted(totals(report).items()):
+        print('%-10s %-10s %10.3f s' % (benchmark, kind, seconds))
+
+def arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('-o', '--output', help='write the results to this JSON file')
+    parser.add_argument('-c', '--compare', help='compare against an earlier JSON results file')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='timing repetitions')
+    parser.add_argument('-s', '--max-size', type=int, default=SIZES[-1],
+                        help='largest synthetic palette (default: %d)' % SIZES[-1])
+    parser.add_argument('-k', '--pattern', default='*',
+                        help='only benchmark corpus files matching this glob')
+    parser.add_argument('--no-corpus', action='store_true',
+                        help="skip the libraries in swatches/ase")
+    return parser
+
+def main(argv=None):
+    args = arguments().parse_args(argv)
+    report = run([size for size in SIZES if size <= args.max_size], args.repeat,
+                 corpus=not args.no_corpus, pattern=args.pattern)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    summarize(report)
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(report, json.load(handle))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,14 @@
 # encoding: utf-8
-from distutils.core import setup
+try:
+    from setuptools import setup
+except ImportError:
+    from distutils.core import setup
 import codecs
-from swatch import __version__ as VERSION
+import re
+
+# read the version without importing swatch (and everything it imports)
+VERSION = re.search(r"^__version__ = '([^']+)'",
+                    codecs.open('swatch/__init__.py', encoding='utf-8').read(), re.M).group(1)
 
 README = codecs.open('README.rst', encoding='utf-8').read()
 LICENSE = codecs.open('LICENSE.txt', encoding='utf-8').read()
@@ -12,13 +19,14 @@ setup(
     author='Marcos A. Ojeda',
     author_email='marcos@generic.cx',
     url='http://github.com/nsfmc/swatch',
-    packages=['swatch', 'tests', 'utils'],
+    packages=['swatch', 'swatch.formats', 'tests', 'utils'],
     package_data={ '' : ['*.*'] },
     include_package_data=True,
     license=LICENSE,
     description='A parser for adobe swatch exchange files',
     long_description=README,
     platforms=['any'],
+    entry_points={ 'console_scripts' : ['swatch = swatch.__main__:main'] },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
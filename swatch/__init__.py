@@ -20,14 +20,40 @@ __copyright__ = '© 2014 Marcos A. Ojeda'
 
 
 from . import parser
-from . import writer
-import struct
+import io
+import mmap
 
-HEADER = b'ASEF'
-V_MAJOR = 1
-V_MINOR = 0
+from .parser import HEADER, V_MAJOR, V_MINOR, FILE_HEADER, ParseError
 
-def parse(filename):
+# Everything else is imported on first use, keeping ``import swatch`` cheap
+# for tools that only parse: submodules, and the names they lend the package.
+SUBMODULES = ('aio', 'asefile', 'batch', 'cache', 'colorspace', 'diff', 'document',
+              'formats', 'index', 'instrument', 'library', 'merge', 'objects', 'palette',
+              'quantize', 'writer')
+LAZY_NAMES = { 'Color'      : 'objects',
+               'ColorType'  : 'objects',
+               'Group'      : 'objects',
+               'Mode'       : 'objects',
+               'from_dicts' : 'objects',
+               'to_dicts'   : 'objects',
+               'Palette'    : 'palette',
+               'Writer'     : 'writer' }
+
+def __getattr__(name):
+    from importlib import import_module
+    if name in LAZY_NAMES:
+        value = getattr(import_module('.' + LAZY_NAMES[name], __name__), name)
+    elif name in SUBMODULES:
+        value = import_module('.' + name, __name__)
+    else:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(SUBMODULES) | set(LAZY_NAMES))
+
+def parse(filename, cache=None, objects=False):
     """ Parses a ``.ase`` file and returns a list of colors and color groups
         
         `swatch.parse(…)` reads in an ``.ase`` file and converts it to a list
@@ -74,7 +100,7 @@ def parse(filename):
         
         Here's an example with a light grey swatch followed by a color group,
         containing three colors:
-        
+            
             >>> import swatch
             >>> swatch.parse("example.ase")
             [{'data': {'mode': 'Gray', 'values': [0.75]},
@@ -99,25 +125,165 @@ def parse(filename):
                 'name': 'Cyan Spot (global)',
                 'type': 'Spot'}],
               'type': 'Color Group'}]
+        
+        If `cache` is a `swatch.cache.ParseCache`, the parsed file is stored in
+        (or retrieved from) that on-disk cache.
+        
+        With ``objects=True``, colors and color groups are returned as compact
+        `swatch.Color` and `swatch.Group` objects instead of ``dict``s.
+    """
+    collector = parser.COLLECTOR.get()
+    if collector is not None:
+        with collector.file(filename):
+            return _parse(filename, cache, objects)
+    return _parse(filename, cache, objects)
+
+def _parse(filename, cache, objects):
+    if cache is not None:
+        if objects:
+            from .objects import from_dicts
+            return from_dicts(cache.parse(filename))
+        return cache.parse(filename)
+    
+    with io.open(filename, "rb") as handle:
+        try:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # empty files (and some special files) can't be mapped
+            return parse_bytes(handle.read(), objects)
+        try:
+            return parse_bytes(data, objects)
+        finally:
+            data.close()
+
+def open(filename, sidecar=False, objects=False):
+    """ Open an ``.ase`` file for random access, returning a `swatch.asefile.SwatchFile`
+        
+        Only the chunk heads are read up front; colors are decoded when they
+        are looked up – by position, ``lib[42]``, or by name,
+        ``lib['PANTONE 185 C']`` – and groups with ``lib.group(…)``. With
+        `sidecar`, the index of chunk offsets is kept in a file next to
+        `filename` (or at the path `sidecar`), and reused while it is fresh.
     """
-    with open(filename, "rb") as data:
-        header, v_major, v_minor, chunk_count = struct.unpack("!4sHHI", data.read(12))
+    from .asefile import SwatchFile
+    return SwatchFile(filename, sidecar=sidecar, objects=objects)
+
+def edit(filename):
+    """ Read an ``.ase`` file for editing, returning a `swatch.document.Document`
         
-        assert header == HEADER
-        assert (v_major, v_minor) == (V_MAJOR, V_MINOR)
+        Only the chunk heads are read up front. Edited chunks alone are
+        re-encoded – every other chunk, including those of unknown types, is
+        written back byte for byte – and ``doc.save()`` patches the edits into
+        the file in place whenever they leave its layout unchanged.
+    """
+    from .document import Document
+    return Document.from_file(filename)
+
+def validate(filename):
+    """ Check the structure of an ``.ase`` file, raising `swatch.ParseError` at the first problem
         
-        return [c for c in parser.parse_chunk(data)]
+        This is a quick pass over the chunk heads and lengths – nothing is
+        decoded – returning the number of chunks of each type, e.g.
+        ``{'color': 1328, 'folder': 0, 'folder-end': 0, 'unknown': 0}``.
+    """
+    with io.open(filename, "rb") as handle:
+        try:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return parser.validate_buffer(handle.read())
+        try:
+            return parser.validate_buffer(data)
+        finally:
+            data.close()
+
+def parse_bytes(data, objects=False):
+    """ Parses the contents of an ``.ase`` file, already in memory
+        
+        `data` may be ``bytes``, ``bytearray``, ``memoryview``, ``mmap`` or
+        any other object supporting the buffer protocol. The output is the same
+        list of colors and color groups returned by `swatch.parse(…)`.
+    """
+    parser.read_header(data)
+    
+    if objects:
+        return parser.objects_for_buffer(data, FILE_HEADER.size)
+    return parser.parse_buffer(data, FILE_HEADER.size)
+
+parse_buffer = parse_bytes
+
+def iterparse(source):
+    """ Incrementally parse an ``.ase`` file, generating ``(event, object)`` pairs
+        
+        `source` is a filename or a binary file object – which need not be
+        seekable, so pipes, sockets and ``gzip.GzipFile`` readers all work.
+        Only one chunk is held in memory at a time. Events are:
+        
+        ``'start-group'``: a color group begins; the object is a group ``dict``
+            without its ``swatches`` list.
+        ``'color'``: a single color ``dict``, as described in `swatch.parse(…)`,
+            belonging to the innermost open group (if any).
+        ``'end-group'``: the current color group has ended; the object is the
+            same ``dict`` passed along with its ``'start-group'`` event.
+            
+            >>> for event, obj in swatch.iterparse("example.ase"):
+            ...     print(event, obj['name'])
+            color Light Grey
+            start-group Accent Colors
+            color Green
+            color Violet Process Global
+            color Cyan Spot (global)
+            end-group Accent Colors
+    """
+    if not hasattr(source, 'read'):
+        collector = parser.COLLECTOR.get()
+        with io.open(source, "rb") as handle:
+            if collector is None:
+                for event in iterparse(handle):
+                    yield event
+            else:
+                with collector.file(source):
+                    for event in iterparse(handle):
+                        yield event
+        return
+    
+    parser.read_header(parser.read_exactly(source, FILE_HEADER.size))
+    
+    collector = parser.COLLECTOR.get()
+    if collector is not None:
+        collector.bytes_read += FILE_HEADER.size
+    
+    for event in parser.iter_events(source):
+        yield event
 
 def dumps(obj):
     """ Converts a swatch to bytes, suitable for writing """
-    chunk_count = writer.chunk_count(obj)
-    head = struct.pack('!4sHHI', HEADER, V_MAJOR, V_MINOR, chunk_count)
-    body = b''.join([writer.chunk_for_object(c) for c in obj])
-    return head + body
+    from . import writer
+    return writer.encode(obj)
+
+def dump_iter(obj, chunk_count=None):
+    """ Generate the bytes of a swatch, one chunk at a time
+        
+        `obj` may be any iterable of swatches and palettes; if it isn't a
+        ``list`` (or similar) that can be walked twice, `chunk_count` must be
+        given, as the header is generated first.
+    """
+    from . import writer
+    if chunk_count is None:
+        chunk_count = writer.chunk_count(obj)
+    yield FILE_HEADER.pack(HEADER, V_MAJOR, V_MINOR, chunk_count)
+    for item in obj:
+        for chunk in writer.chunks_for_object(item):
+            yield chunk
 
 def dump(obj, handle):
-    """ Write a swatch to a python file object """
-    handle.write(dumps(obj))
+    """ Write a swatch to a python file object
+        
+        Chunks are written to `handle` as they are encoded, using a `Writer`.
+    """
+    from .writer import Writer, chunk_count
+    with Writer(handle, chunk_count(obj)) as out:
+        for item in obj:
+            out.write(item)
 
 def write(obj, filename):
     """ Write a swatch object to the filename specified
@@ -133,5 +299,10 @@ def write(obj, filename):
         The best source for descriptions of each of these is to be found
         in the `parser` documentation.
     """
-    with open(filename, 'wb') as handle:
-        dump(obj, handle)
+    collector = parser.COLLECTOR.get()
+    with io.open(filename, 'wb') as handle:
+        if collector is None:
+            dump(obj, handle)
+        else:
+            with collector.file(filename):
+                dump(obj, handle)
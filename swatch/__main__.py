@@ -0,0 +1,171 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Command-line interface: ``swatch <command> …`` (or ``python -m swatch <command> …``)
+
+Every command takes any number of files, glob patterns (quoted, so that ``**``
+reaches the tool) and directories, and works through them in parallel. Results
+are streamed as JSON lines as each file is done; the exit status is 1 if any
+file failed, and 2 if no files were given at all.
+
+    $ swatch validate 'assets/**/*.ase'
+    $ swatch info swatches/ase
+    $ swatch stats swatches/ase
+    $ swatch dump-json palette.ase palette.gpl
+    $ swatch convert -t ase swatches/html
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+
+def sources(args, extensions=('.ase',)):
+    """ Expand the sources given on the command line, complaining if there are none """
+    from . import batch
+    expanded = batch.expand(args.sources, extensions)
+    if not expanded:
+        print("swatch: no files match %s" % ' '.join(args.sources), file=sys.stderr)
+    return expanded
+
+def emit(report):
+    """ Write a report to stdout as a line of JSON, straight away """
+    sys.stdout.write(json.dumps(report, ensure_ascii=False) + '\n')
+    sys.stdout.flush()
+
+def stream(args, function, failed):
+    """ Apply `function` to every source, emitting each report; return the exit status """
+    from . import batch
+    files = sources(args)
+    if not files:
+        return 2
+    failures = 0
+    for report in batch.iter_apply(function, files, args.jobs, args.chunksize):
+        if failed(report):
+            failures += 1
+        elif args.quiet:
+            continue
+        emit(report)
+    return 1 if failures else 0
+
+def validate(args):
+    """ Check the structure of .ase files, without decoding them """
+    from . import batch
+    return stream(args, batch.validate_file, lambda report: not report['valid'])
+
+def info(args):
+    """ Summarize .ase files: size, chunks, colors, groups, modes and types """
+    from . import batch
+    return stream(args, batch.info_file, lambda report: 'error' in report)
+
+def dump_json(args):
+    """ Parse files, in any supported format, and print them as JSON lines """
+    from . import batch
+    return stream(args, batch.dump_file, lambda report: 'error' in report)
+
+def stats(args):
+    """ Total up the chunks, colors, groups, modes and types of many .ase files """
+    from collections import Counter
+    from . import batch
+    files = sources(args)
+    if not files:
+        return 2
+    totals = Counter()
+    modes = Counter()
+    types = Counter()
+    errors = []
+    for report in batch.iter_apply(batch.info_file, files, args.jobs, args.chunksize):
+        if 'error' in report:
+            errors.append(report)
+            print("%s: %s" % (report['file'], report['error']), file=sys.stderr)
+            continue
+        totals['files'] += 1
+        totals['bytes'] += report['size']
+        totals['chunks'] += sum(report['chunks'].values())
+        totals['colors'] += report['colors']
+        totals['groups'] += len(report['groups'])
+        modes.update(report['modes'])
+        types.update(report['types'])
+    emit({
+        'files': len(files),
+        'valid': totals['files'],
+        'invalid': len(errors),
+        'bytes': totals['bytes'],
+        'chunks': totals['chunks'],
+        'colors': totals['colors'],
+        'groups': totals['groups'],
+        'modes': dict(sorted(modes.items())),
+        'types': dict(sorted(types.items()))
+    })
+    return 1 if errors else 0
+
+def convert(args):
+    """ Convert files between formats, in parallel """
+    from . import batch, formats
+    files = sources(args, tuple(formats.FORMATS))
+    if not files:
+        return 2
+    try:
+        results = batch.iter_convert(files, args.output, to=args.to,
+                                     jobs=args.jobs, chunksize=args.chunksize)
+    except ValueError as exc:
+        print("swatch: %s" % exc, file=sys.stderr)
+        return 1
+    if not os.path.isdir(args.output):
+        os.makedirs(args.output)
+    failures = 0
+    for result in results:
+        if result.error:
+            failures += 1
+            print("%s: %s" % (result.source, result.error), file=sys.stderr)
+        elif args.verbose:
+            print("%s -> %s (%d bytes)" % (result.source, result.destination, result.size))
+    return 1 if failures else 0
+
+def arguments():
+    parser = argparse.ArgumentParser(prog='swatch',
+                                     description='Tools for Adobe Swatch Exchange files')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+    
+    def add_command(name, func):
+        sub = commands.add_parser(name, help=func.__doc__.strip(),
+                                  description=func.__doc__.strip())
+        sub.add_argument('sources', nargs='+', metavar='SRC',
+                         help='files, glob patterns or directories')
+        sub.add_argument('-j', '--jobs', type=int, default=None,
+                         help='worker processes (default: number of CPUs)')
+        sub.add_argument('--chunksize', type=int, default=None,
+                         help='files handed to each worker at a time')
+        sub.set_defaults(func=func)
+        return sub
+    
+    for name, func in (('validate', validate), ('info', info), ('dump-json', dump_json)):
+        sub = add_command(name, func)
+        sub.add_argument('-q', '--quiet', action='store_true', help='only report failures')
+    
+    add_command('stats', stats)
+    
+    sub = add_command('convert', convert)
+    sub.add_argument('-o', '--output', default='.', help='output directory')
+    sub.add_argument('-t', '--to', default='json', help='output format extension (default: json)')
+    sub.add_argument('-v', '--verbose', action='store_true', help='report every converted file')
+    return parser
+
+def main(argv=None):
+    args = arguments().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # the reader went away (as with ``swatch info … | head``): stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
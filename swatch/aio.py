@@ -0,0 +1,78 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+``asyncio`` support: parse from, and write to, asynchronous streams.
+
+Parsing is done by feeding ``parser.IncrementalParser`` whatever bytes the
+stream has to offer, so nothing ever blocks the event loop on file I/O and no
+thread pool is needed. Any object with a coroutine ``read(n)`` method will do
+as a reader – an ``asyncio.StreamReader``, an ``aiofiles`` file object, an
+``aiohttp`` request body – and any object with a ``write(data)`` method
+(plain or coroutine) as a writer.
+
+    >>> reader, writer = await asyncio.open_connection(host, port)
+    >>> swatches = await swatch.aio.parse_stream(reader)
+    >>> await swatch.aio.write_stream(swatches, writer)
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+import inspect
+
+from . import parser
+
+READ_SIZE = 64 * 1024
+WRITE_SIZE = 64 * 1024
+
+async def iterparse_stream(reader, read_size=READ_SIZE):
+    """ Asynchronously generate ``(event, object)`` pairs from `reader`
+        
+        The events are those of `swatch.iterparse(…)`; only the bytes of one
+        partial chunk (at most) are kept between reads.
+    """
+    state = parser.IncrementalParser()
+    while True:
+        data = await reader.read(read_size)
+        if not data:
+            break
+        for event in state.feed(data):
+            yield event
+    for event in state.close():
+        yield event
+
+async def parse_stream(reader, read_size=READ_SIZE):
+    """ Parse the ``.ase`` data read from `reader`, returning what `swatch.parse(…)` would """
+    events = []
+    async for event in iterparse_stream(reader, read_size):
+        events.append(event)
+    return parser.tree_for_events(events)
+
+async def write_stream(obj, writer, write_size=WRITE_SIZE):
+    """ Write the swatch `obj` to `writer`, as `swatch.dump(…)` would
+        
+        Chunks are gathered into writes of roughly `write_size` bytes; after
+        each one, the writer is drained (if it can be, like an
+        ``asyncio.StreamWriter``) so that flow control is respected.
+    """
+    from . import dump_iter
+    pending = []
+    pending_size = 0
+    for chunk in dump_iter(obj):
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= write_size:
+            await _write(writer, b''.join(pending))
+            pending = []
+            pending_size = 0
+    if pending:
+        await _write(writer, b''.join(pending))
+
+async def _write(writer, data):
+    result = writer.write(data)
+    if inspect.isawaitable(result):
+        await result
+    drain = getattr(writer, 'drain', None)
+    if drain is not None:
+        await drain()
@@ -0,0 +1,296 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Random access to the swatches of an ``.ase`` file, without parsing all of it.
+
+``swatch.open(filename)`` memory-maps the file and makes a single pass over
+its chunk heads – decoding no floats and no names – to record where every
+color chunk starts, a CRC-32 of every raw (UTF-16BE) color name and where
+every group begins and ends. Swatches are then decoded one at a time, as they
+are asked for:
+
+    >>> lib = swatch.open("swatches/ase/PANTONE solid coated.ase")
+    >>> lib['PANTONE 185 C']
+    {'name': 'PANTONE 185 C', 'type': 'Spot', 'data': {…}}
+    >>> lib[42], len(lib), lib.groups()
+
+The index itself can be kept in a small sidecar file next to the library
+(``sidecar=True``), so later opens skip even that pass.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from array import array
+from codecs import utf_16_be_encode
+import io
+import mmap
+import os
+import struct
+import zlib
+
+from . import parser
+from .objects import Color, Group
+from .palette import BYTEORDER
+
+INDEX_SUFFIX = '.swix'
+INDEX_MAGIC = b'SWIX'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sBc2xqQII')
+INDEX_COLUMNS = (('offsets', 'I'), ('hashes', 'I'), ('groups', 'i'),
+                 ('group_offsets', 'I'), ('group_starts', 'I'))
+
+def name_hash(raw):
+    """ Return the CRC-32 of an encoded name, less any trailing NULs """
+    end = len(raw)
+    while end >= 2 and raw[end - 2] == 0 and raw[end - 1] == 0:
+        end -= 2
+    return zlib.crc32(raw[:end])
+
+class ChunkIndex(object):
+    """ The offsets of the chunks in an ``.ase`` file
+        
+        For the color at position ``i``: ``offsets[i]`` is where its chunk
+        starts, ``hashes[i]`` the ``name_hash`` of its raw name and
+        ``groups[i]`` the number of the group it is in (or -1). For group
+        ``g``: ``group_offsets[g]`` is where its folder chunk starts, and
+        ``group_starts[g]`` the position of its first color.
+    """
+    
+    def __init__(self):
+        for name, typecode in INDEX_COLUMNS:
+            setattr(self, name, array(typecode))
+        self.stamp = (0, 0)
+    
+    def __len__(self):
+        return len(self.offsets)
+    
+    @classmethod
+    def build(cls, buf, offset=parser.FILE_HEADER.size):
+        """ Index the chunks of the ``.ase`` data in `buf`, from `offset` on
+            
+            The chunks are walked by ``parser.walk_buffer``, so data that
+            ``swatch.parse(…)`` would turn down – a truncated chunk, a name
+            running past the end of its chunk – raises the same ``ParseError``.
+        """
+        index = cls()
+        head_size = parser.CHUNK_HEAD.size
+        title_length = parser.TITLE_LENGTH
+        group = -1
+        
+        def title_for(view, start, end):
+            title_end = start + title_length.size + 2 * title_length.unpack_from(view, start)[0]
+            if title_end > end:
+                raise IndexError("name runs past the end of its chunk")
+            return view[start + title_length.size:title_end]
+        
+        def color(view, start, end):
+            index.offsets.append(start - head_size)
+            index.hashes.append(name_hash(title_for(view, start, end)))
+            index.groups.append(group)
+        
+        def folder(view, start, end):
+            nonlocal group
+            title_for(view, start, end)
+            group = len(index.group_offsets)
+            index.group_offsets.append(start - head_size)
+            index.group_starts.append(len(index.offsets))
+        
+        def folder_end():
+            nonlocal group
+            group = -1
+        
+        with memoryview(buf) as view:
+            view = view.cast('B') if view.format != 'B' else view
+            parser.walk_buffer(view, offset, color, folder, folder_end)
+        return index
+    
+    def group_range(self, group):
+        """ Return the ``range`` of color positions in group number `group` """
+        start = self.group_starts[group]
+        stop = start
+        while stop < len(self.groups) and self.groups[stop] == group:
+            stop += 1
+        return range(start, stop)
+    
+    def pack(self):
+        """ Return the index in a compact binary form, for ``ChunkIndex.unpack(…)`` """
+        columns = [getattr(self, name) for name, typecode in INDEX_COLUMNS]
+        parts = [INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, BYTEORDER, self.stamp[0],
+                                   self.stamp[1], len(self.offsets), len(self.group_offsets))]
+        parts.extend(column.tobytes() for column in columns)
+        return b''.join(parts)
+    
+    @classmethod
+    def unpack(cls, buf):
+        """ Rebuild an index from the output of ``ChunkIndex.pack()`` """
+        magic, version, byteorder, mtime, size, count, group_count = INDEX_HEADER.unpack_from(buf)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or byteorder != BYTEORDER:
+            raise ValueError("not a chunk index (or written on an incompatible machine)")
+        lengths = (count, count, count, group_count, group_count)
+        if len(buf) != INDEX_HEADER.size + sum(
+                length * struct.calcsize(typecode)
+                for (name, typecode), length in zip(INDEX_COLUMNS, lengths)):
+            raise ValueError("chunk index is truncated or has trailing data")
+        index = cls()
+        index.stamp = (mtime, size)
+        offset = INDEX_HEADER.size
+        for (name, typecode), length in zip(INDEX_COLUMNS, lengths):
+            column = getattr(index, name)
+            size = length * column.itemsize
+            column.frombytes(buf[offset:offset + size])
+            offset += size
+        return index
+    
+    def save(self, path):
+        """ Write the index to `path`, atomically """
+        from .writer import replacing
+        with replacing(path, sync=False) as handle:
+            handle.write(self.pack())
+    
+    @classmethod
+    def load(cls, path, stamp):
+        """ Read the index saved at `path`, or return ``None`` if it is missing or stale """
+        try:
+            with io.open(path, 'rb') as handle:
+                index = cls.unpack(handle.read())
+        except (OSError, ValueError, struct.error):
+            return None
+        return index if index.stamp == stamp else None
+
+class SwatchFile(object):
+    """ A lazily-decoded ``.ase`` file
+        
+        Colors are looked up by position (``lib[42]``, ``lib[10:20]``) or by
+        name (``lib['PANTONE 185 C']`` – the first color of that name), and
+        are decoded from the memory-mapped file only when they are asked for,
+        as ``dict``s like those ``swatch.parse(…)`` returns – or, with
+        `objects`, as `swatch.Color`s. Iterating yields every color in order.
+        
+        ``groups()`` lists the names of the file’s groups, and ``group(…)``
+        decodes one of them. Close the file (or use it as a context manager)
+        to release the mapping.
+    """
+    
+    def __init__(self, filename, sidecar=False, objects=False):
+        self.filename = filename
+        self.objects = objects
+        with io.open(filename, 'rb') as handle:
+            stat = os.fstat(handle.fileno())
+            try:
+                self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # empty files (and some special files) can't be mapped
+                self.data = handle.read()
+        self.view = memoryview(self.data)
+        
+        try:
+            parser.read_header(self.view)
+            
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            path = None
+            if sidecar:
+                path = filename + INDEX_SUFFIX if sidecar is True else sidecar
+                self.index = ChunkIndex.load(path, stamp)
+            if not sidecar or self.index is None:
+                self.index = ChunkIndex.build(self.view)
+                self.index.stamp = stamp
+                if path is not None:
+                    try:
+                        self.index.save(path)
+                    except OSError:
+                        pass  # a read-only directory: keep the index in memory
+        except BaseException:
+            self.close()
+            raise
+        self._by_hash = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """ Release the memory-mapped file """
+        self.view.release()
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+    
+    def __len__(self):
+        return len(self.index)
+    
+    def __iter__(self):
+        for position in range(len(self.index)):
+            yield self._decode(position)
+    
+    def __contains__(self, name):
+        return self.position(name) is not None
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            position = self.position(key)
+            if position is None:
+                raise KeyError(key)
+            return self._decode(position)
+        if isinstance(key, slice):
+            return [self._decode(position) for position in range(len(self.index))[key]]
+        return self._decode(range(len(self.index))[key])
+    
+    def get(self, name, default=None):
+        position = self.position(name)
+        return default if position is None else self._decode(position)
+    
+    def _decode(self, position):
+        offset = self.index.offsets[position]
+        chunk_length = parser.CHUNK_HEAD.unpack_from(self.view, offset)[1]
+        start = offset + parser.CHUNK_HEAD.size
+        if self.objects:
+            return Color.from_buffer(self.view, start, start + chunk_length)
+        return parser.color_dict_for_buffer(self.view, start, start + chunk_length)
+    
+    def _name(self, offset):
+        start = offset + parser.CHUNK_HEAD.size
+        title_end = start + parser.TITLE_LENGTH.size + (
+            2 * parser.TITLE_LENGTH.unpack_from(self.view, start)[0])
+        return str(self.view[start + parser.TITLE_LENGTH.size:title_end], 'utf-16be').strip('\0')
+    
+    def position(self, name):
+        """ Return the position of the first color named `name`, or ``None`` """
+        if self._by_hash is None:
+            by_hash = {}
+            for position, value in enumerate(self.index.hashes):
+                by_hash.setdefault(value, []).append(position)
+            self._by_hash = by_hash
+        for position in self._by_hash.get(name_hash(utf_16_be_encode(name)[0]), ()):
+            # names are only decoded to rule out hash collisions
+            if self._name(self.index.offsets[position]) == name:
+                return position
+        return None
+    
+    def names(self):
+        """ Return the name of every color, in order """
+        return [self._name(offset) for offset in self.index.offsets]
+    
+    def groups(self):
+        """ Return the name of every group, in order """
+        return [self._name(offset) for offset in self.index.group_offsets]
+    
+    def group(self, key):
+        """ Decode the group `key` – a name or a number – as a `swatch.Group` or a ``dict`` """
+        if isinstance(key, str):
+            names = self.groups()
+            if key not in names:
+                raise KeyError(key)
+            key = names.index(key)
+        name = self._name(self.index.group_offsets[key])
+        colors = [self._decode(position) for position in self.index.group_range(key)]
+        if self.objects:
+            return Group(name, colors)
+        return {'name': name, 'type': 'Color Group', 'swatches': colors}
+    
+    def group_of(self, position):
+        """ Return the number of the group holding the color at `position`, or ``None`` """
+        group = self.index.groups[position]
+        return None if group < 0 else group
@@ -0,0 +1,191 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Batch processing of whole swatch libraries, spread across a pool of processes.
+
+Work is handed out to the pool in chunks of files; each worker reads (and
+converts and writes) its files itself and only sends a small result back –
+never the parsed swatches, unless they were asked for – so little more than
+file names crosses process lines.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from collections import Counter, namedtuple
+from functools import partial
+import concurrent.futures
+import glob
+import os
+
+from . import formats
+
+Result = namedtuple('Result', ('source', 'destination', 'error', 'size'))
+
+def describe(exc):
+    """ Describe an exception in a line, for a report """
+    return '%s: %s' % (type(exc).__name__, exc)
+
+def convert_file(source, destination, transform=None):
+    """ Convert a single file, choosing formats by file extension
+        
+        Any of the formats in `swatch.formats` will do; without a `transform`
+        the file is converted in a single streaming pass. `transform`, if
+        given, is called with the parsed list of swatches and palettes and
+        must return the list to write out. Errors are caught and reported in
+        the returned ``Result`` rather than raised.
+    """
+    try:
+        formats.format_for(source)
+        formats.format_for(destination)
+        if transform is None:
+            formats.convert(source, destination)
+        else:
+            formats.write(transform(formats.parse(source)), destination)
+        return Result(source, destination, None, os.path.getsize(destination))
+    except Exception as exc:
+        return Result(source, destination, describe(exc), 0)
+
+def convert_pair(pair, transform=None):
+    """ ``convert_file(…)`` for a ``(source, destination)`` pair """
+    source, destination = pair
+    return convert_file(source, destination, transform)
+
+def validate_file(source):
+    """ Check the structure of the ``.ase`` file `source`, returning a JSON-ready report """
+    from . import validate
+    try:
+        return {'file': source, 'valid': True, 'chunks': validate(source)}
+    except Exception as exc:
+        return {'file': source, 'valid': False, 'error': describe(exc)}
+
+def info_file(source):
+    """ Summarize the ``.ase`` file `source` – its size, chunks, colors, groups, modes and
+        types – returning a JSON-ready report
+    """
+    from . import palette, parser, validate
+    try:
+        chunks = validate(source)
+        colors = palette.Palette.from_file(source)
+        return {
+            'file': source,
+            'size': os.path.getsize(source),
+            'chunks': chunks,
+            'colors': len(colors),
+            'groups': [colors.names[name_id] for name_id in colors.group_name_ids],
+            'modes': dict((palette.MODES[mode], count)
+                          for mode, count in sorted(Counter(colors.modes).items())),
+            'types': dict((parser.COLOR_TYPES[color_type], count)
+                          for color_type, count in sorted(Counter(colors.types).items()))
+        }
+    except Exception as exc:
+        return {'file': source, 'error': describe(exc)}
+
+def dump_file(source):
+    """ Parse `source`, in any format of `swatch.formats`, returning a JSON-ready report """
+    try:
+        return {'file': source, 'swatches': formats.parse(source)}
+    except Exception as exc:
+        return {'file': source, 'error': describe(exc)}
+
+def apply_chunk(function, items):
+    """ Apply `function` to a chunk of `items` within one worker """
+    return [function(item) for item in items]
+
+def destination_for(source, output_dir, to):
+    """ Return the output path for `source` converted to the extension `to` """
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(output_dir, stem + '.' + to.lstrip('.'))
+
+def destinations_for(sources, output_dir, to):
+    """ Return the output path for each of `sources`, converted to the extension `to`
+        
+        Outputs are named for their sources, sans directory and extension – so
+        ``a/x.ase`` and ``b/x.ase`` (or ``x.ase`` and ``x.gpl``) would both be
+        converted to the same file; rather than have one silently overwrite
+        the other, any such collision raises a ``ValueError``.
+    """
+    claimed = {}
+    output = []
+    for source in sources:
+        destination = destination_for(source, output_dir, to)
+        key = os.path.normcase(os.path.abspath(destination))
+        if key in claimed:
+            raise ValueError("%s and %s would both be converted to %s" % (
+                             claimed[key], source, destination))
+        claimed[key] = source
+        output.append(destination)
+    return output
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def iter_apply(function, items, jobs=None, chunksize=None):
+    """ Generate ``function(item)`` for every one of `items`, in completion order
+        
+        `jobs` is the number of worker processes (defaulting to the number of
+        CPUs); with ``jobs=1`` the work is done in this process. `chunksize`
+        is the number of items handed to a worker at once – by default,
+        enough for a few chunks per worker. `function` must be picklable (i.e.
+        a module-level function, or a ``functools.partial`` of one).
+    """
+    items = list(items)
+    if not items:
+        return
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for item in items:
+            yield function(item)
+        return
+    if not chunksize:
+        chunksize = max(1, len(items) // (jobs * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(apply_chunk, function, chunk)
+                   for chunk in chunked(items, chunksize)]
+        for future in concurrent.futures.as_completed(futures):
+            for result in future.result():
+                yield result
+
+def iter_convert(sources, output_dir, to='json', jobs=None, chunksize=None, transform=None):
+    """ Convert every file in `sources` into `output_dir`, generating ``Result``s
+        
+        Results arrive in completion order; `jobs` and `chunksize` are as for
+        ``iter_apply``. `transform` must be picklable (i.e. a module-level
+        function). Sources that would be converted to the same file raise a
+        ``ValueError`` before anything is converted (see ``destinations_for``).
+    """
+    sources = list(sources)
+    pairs = list(zip(sources, destinations_for(sources, output_dir, to)))
+    return iter_apply(partial(convert_pair, transform=transform), pairs, jobs, chunksize)
+
+def expand(patterns, extensions=('.ase',)):
+    """ Expand file names, glob patterns and directories into a list of files
+        
+        Patterns may use ``**`` to match any number of directories; a directory
+        stands for every file with one of `extensions` anywhere beneath it.
+        Names that match nothing are kept, so that they can be reported as
+        missing.
+    """
+    sources = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(path for path in glob.glob(os.path.join(pattern, '**', '*'),
+                                                        recursive=True)
+                             if os.path.splitext(path)[1].lower() in extensions)
+        elif glob.has_magic(pattern):
+            matches = sorted(path for path in glob.glob(pattern, recursive=True)
+                             if not os.path.isdir(path))
+        else:
+            matches = [pattern]
+        sources.extend(matches)
+    seen = set()
+    return [source for source in sources if not (source in seen or seen.add(source))]
+
+def convert(sources, output_dir, to='json', jobs=None, chunksize=None, transform=None):
+    """ Convert every file in `sources`, returning a list of ``Result``s in input order """
+    sources = list(sources)
+    order = dict((source, index) for index, source in enumerate(sources))
+    results = iter_convert(sources, output_dir, to, jobs, chunksize, transform)
+    return sorted(results, key=lambda result: order[result.source])
@@ -0,0 +1,338 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+A persistent, on-disk cache of parsed palettes.
+
+Every ``.ase`` file that passes through a ``ParseCache`` is stored as a packed
+`swatch.Palette` (q.v. ``Palette.pack()``) in the cache directory, keyed by the
+file’s real path, modification time and size – and stamped with a digest of
+its contents. Later loads memory-map the packed palette instead of parsing the
+file again:
+
+    >>> cache = swatch.cache.ParseCache()
+    >>> swatch.parse("PANTONE.ase", cache=cache)   # parses, then stores
+    >>> swatch.parse("PANTONE.ase", cache=cache)   # maps the stored palette
+
+Entries are written to a temporary file and renamed into place, so several
+processes can share one cache directory safely; readers never see a partial
+entry. When the directory grows past `max_bytes`, the least-recently used
+entries are evicted.
+
+``MemoryCache`` is its in-process counterpart, for the handful of hot files a
+long-running process parses over and over: it keeps frozen (read-only) parse
+results in memory, bounded by count and by size, and invalidates them when a
+file’s ``stat`` changes.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from collections import OrderedDict
+import hashlib
+import io
+import os
+import struct
+import sys
+import threading
+import types
+
+from .palette import Palette
+from .writer import replacing
+
+ENTRY_SUFFIX = '.swpc'
+DIGEST = struct.Struct('<32s')
+
+def default_directory():
+    """ Return the default cache directory, honoring ``$XDG_CACHE_HOME`` """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'swatch')
+
+def content_digest(data):
+    return hashlib.blake2b(data, digest_size=DIGEST.size).digest()
+
+class ParseCache(object):
+    """ An on-disk cache of parsed ``.ase`` files, with LRU eviction
+        
+        `directory` defaults to ``~/.cache/swatch``; `max_bytes` bounds its total
+        size. With `verify`, the source file’s contents are re-hashed on every
+        hit and compared with the digest stored in the entry, rather than
+        trusting its modification time and size alone.
+    """
+    
+    def __init__(self, directory=None, max_bytes=64 * 1024 * 1024, verify=False):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                if not os.path.isdir(self.directory):
+                    raise
+    
+    def entry_path(self, filename, stat=None):
+        """ Return the path of the cache entry for `filename`, as it stands now """
+        stat = stat or os.stat(filename)
+        key = '%s\0%d\0%d' % (os.path.realpath(filename), stat.st_mtime_ns, stat.st_size)
+        name = hashlib.blake2b(key.encode('utf-8', 'surrogateescape'), digest_size=20).hexdigest()
+        return os.path.join(self.directory, name + ENTRY_SUFFIX)
+    
+    def get(self, filename):
+        """ Return the cached `swatch.Palette` for `filename`, or ``None`` """
+        entry = self.entry_path(filename)
+        try:
+            # read, not mapped: the palette’s columns are views of the data,
+            # so a map could never be closed while the palette is in use
+            with io.open(entry, 'rb') as handle:
+                data = handle.read()
+        except OSError:
+            return None
+        try:
+            digest = DIGEST.unpack_from(data)[0]
+            if self.verify:
+                with io.open(filename, 'rb') as source:
+                    if content_digest(source.read()) != digest:
+                        return None
+            palette = Palette.unpack(memoryview(data)[DIGEST.size:])
+        except (ValueError, struct.error):
+            # a stale or foreign entry: treat it as a miss
+            return None
+        try:
+            os.utime(entry, None)  # mark as recently used
+        except OSError:
+            pass
+        return palette
+    
+    def put(self, filename, palette, data=None, stat=None):
+        """ Store `palette` as the parsed form of `filename`
+            
+            `data`, if given, is the file’s contents (for the digest), sparing
+            another read – and `stat` the ``os.fstat(…)`` of the handle they
+            were read from, so that the entry is keyed by the very contents
+            `palette` was parsed from, even if the file has since changed.
+        """
+        if data is None:
+            with io.open(filename, 'rb') as source:
+                stat = os.fstat(source.fileno())
+                data = source.read()
+        elif stat is None:
+            stat = os.stat(filename)
+        payload = DIGEST.pack(content_digest(data)) + palette.pack()
+        # a torn entry is no worse than a miss, so there’s no call to sync it
+        with replacing(self.entry_path(filename, stat), sync=False) as handle:
+            handle.write(payload)
+        self.evict()
+    
+    def load(self, filename):
+        """ Return a `swatch.Palette` for `filename`, parsing and storing it on a miss """
+        palette = self.get(filename)
+        if palette is not None:
+            self.hits += 1
+            return palette
+        self.misses += 1
+        with io.open(filename, 'rb') as source:
+            stat = os.fstat(source.fileno())
+            data = source.read()
+        palette = Palette.from_bytes(data)
+        self.put(filename, palette, data, stat)
+        return palette
+    
+    def parse(self, filename):
+        """ Return the same list of colors and color groups as `swatch.parse(…)` """
+        return self.load(filename).to_list()
+    
+    def entries(self):
+        """ Return ``(last used, size, path)`` for every entry, least recently used first """
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found.append((stat.st_mtime, stat.st_size, path))
+        return sorted(found)
+    
+    def evict(self, max_bytes=None):
+        """ Remove least-recently used entries until the cache fits in `max_bytes` """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for used, size, path in entries)
+        for used, size, path in entries:
+            if total <= limit:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                # already evicted by another process, or still mapped on Windows
+                continue
+            total -= size
+    
+    def clear(self):
+        """ Remove every entry from the cache """
+        self.evict(0)
+
+
+def freeze(obj):
+    """ Return a read-only copy of a parsed list of colors and color groups
+        
+        Lists become tuples and dicts become ``types.MappingProxyType``s.
+        The mappings still compare equal to the dicts they were made from,
+        but the tuples never equal lists – compare ``thaw(…)``’s copy instead.
+    """
+    if isinstance(obj, dict):
+        return types.MappingProxyType(dict((key, freeze(value)) for key, value in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(value) for value in obj)
+    return obj
+
+def thaw(obj):
+    """ Return a mutable copy of a frozen parse result, i.e. the list `swatch.parse(…)` returns """
+    if isinstance(obj, (dict, types.MappingProxyType)):
+        return dict((key, thaw(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return [thaw(value) for value in obj]
+    return obj
+
+def deep_sizeof(obj):
+    """ Approximate the memory held by a (frozen) parse result """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (dict, types.MappingProxyType)):
+        size += sum(deep_sizeof(key) + deep_sizeof(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(value) for value in obj)
+    return size
+
+class MemoryEntry(object):
+
+    __slots__ = ('stamp', 'palette', 'tree', 'size')
+    
+    def __init__(self, stamp, palette, size):
+        self.stamp = stamp
+        self.palette = palette
+        self.tree = None
+        self.size = size
+
+class MemoryCache(object):
+    """ An in-process LRU cache of parse results, bounded by count and size
+        
+        Results are frozen, so they can be shared safely between callers:
+        ``parse(…)`` returns tuples and read-only mappings, and ``load(…)``
+        returns a `swatch.Palette` with read-only columns. Frozen results can
+        be written out as they are (by `swatch.dumps(…)`, `swatch.dump(…)`
+        or `swatch.formats`), but aren’t equal to what `swatch.parse(…)`
+        returns: ``thaw(…)`` makes a mutable copy that is.
+        
+        Each lookup ``stat``s the file and discards the cached result if its
+        modification time, size or inode have changed; ``invalidate(…)`` and
+        ``clear()`` discard results explicitly. Callables registered with
+        ``on_invalidate(…)`` are called with the file name whenever a result is
+        discarded, for whatever reason. ``hits`` and ``misses`` count lookups.
+    """
+    
+    def __init__(self, max_entries=32, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self.entries = OrderedDict()
+        self.listeners = []
+        self.lock = threading.RLock()
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __contains__(self, filename):
+        return os.path.realpath(filename) in self.entries
+    
+    def on_invalidate(self, listener):
+        """ Register `listener` to be called with the name of every discarded file """
+        self.listeners.append(listener)
+        return listener
+    
+    def _stamp(self, path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _discard(self, path):
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.size -= entry.size
+            for listener in self.listeners:
+                listener(path)
+    
+    def _entry(self, filename):
+        path = os.path.realpath(filename)
+        stamp = self._stamp(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None:
+                if entry.stamp == stamp:
+                    self.hits += 1
+                    self.entries.move_to_end(path)
+                    return entry
+                self._discard(path)
+            self.misses += 1
+        
+        # parse outside of the lock; packing and unpacking the palette leaves
+        # it with read-only columns over a single immutable bytes object
+        packed = Palette.from_file(path).pack()
+        palette = Palette.unpack(packed)
+        palette.names = tuple(palette.names)
+        palette.values = types.MappingProxyType(palette.values)
+        entry = MemoryEntry(stamp, palette, len(packed))
+        
+        with self.lock:
+            if path in self.entries:
+                self._discard(path)
+            self.entries[path] = entry
+            self.size += entry.size
+            self._shrink()
+        return entry
+    
+    def _shrink(self):
+        while self.entries and (len(self.entries) > self.max_entries or
+                                self.size > self.max_bytes):
+            self._discard(next(iter(self.entries)))
+    
+    def load(self, filename):
+        """ Return a frozen `swatch.Palette` for `filename` """
+        return self._entry(filename).palette
+    
+    def parse(self, filename):
+        """ Return a frozen version of what `swatch.parse(filename)` returns """
+        entry = self._entry(filename)
+        if entry.tree is None:
+            tree = freeze(entry.palette.to_list())
+            tree_size = deep_sizeof(tree)
+            with self.lock:
+                if entry.tree is None:
+                    entry.tree = tree
+                    entry.size += tree_size
+                    if self.entries.get(os.path.realpath(filename)) is entry:
+                        self.size += tree_size
+                        self._shrink()
+        return entry.tree
+    
+    def invalidate(self, filename):
+        """ Discard any cached result for `filename` """
+        with self.lock:
+            self._discard(os.path.realpath(filename))
+    
+    def clear(self):
+        """ Discard every cached result """
+        with self.lock:
+            for path in list(self.entries):
+                self._discard(path)
+    
+    def stats(self):
+        """ Return a dict of counters, for sizing the cache """
+        with self.lock:
+            return dict(hits=self.hits, misses=self.misses, entries=len(self.entries),
+                        bytes=self.size, max_entries=self.max_entries, max_bytes=self.max_bytes)
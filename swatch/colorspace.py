@@ -0,0 +1,342 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Color-space conversion for whole palettes at once.
+
+Values are converted a whole array at a time – with NumPy, when it is
+installed, and row by row in pure Python otherwise. The spaces understood by
+``convert(…)`` are the four ASE color modes, using the same value conventions
+as ``swatch.parse(…)``:
+
+• ``'RGB'``: sRGB-companded floats in [0, 1]
+• ``'Gray'``: a single companded float in [0, 1], 1 being white
+• ``'CMYK'``: four floats in [0, 1]; converted naively, without a profile
+• ``'LAB'``: L in [0, 1] and a, b in [-128, 127], relative to D50
+
+… along with the intermediate spaces:
+
+• ``'linearRGB'``: sRGB primaries, without the companding curve
+• ``'XYZ'``: CIE XYZ, relative to the D50 white point (Y of white == 1)
+• ``'CIELAB'``: CIE L*a*b* with L in [0, 100], relative to D50
+
+The formulae (and the Bradford-adapted sRGB matrices) are Bruce Lindbloom’s,
+q.v. http://www.brucelindbloom.com/index.html?Math.html
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+import math
+
+WIDTHS = { 'RGB'       : 3,
+           'Gray'      : 1,
+           'CMYK'      : 4,
+           'LAB'       : 3,
+           'linearRGB' : 3,
+           'XYZ'       : 3,
+           'CIELAB'    : 3 }
+
+# D50 reference white, and sRGB <-> XYZ (D50) matrices
+WHITE = (0.96422, 1.0, 0.82521)
+RGB_TO_XYZ = ((0.4360747, 0.3850649, 0.1430804),
+              (0.2225045, 0.7168786, 0.0606169),
+              (0.0139322, 0.0971045, 0.7141733))
+XYZ_TO_RGB = (( 3.1338561, -1.6168667, -0.4906146),
+              (-0.9787684,  1.9161415,  0.0334540),
+              ( 0.0719453, -0.2289914,  1.4052427))
+
+EPSILON = 216.0 / 24389.0
+KAPPA = 24389.0 / 27.0
+
+_numpy_module = []
+
+def numpy_or_none():
+    """ Import NumPy on first use, returning ``None`` if it isn’t installed """
+    if not _numpy_module:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module.append(numpy)
+    return _numpy_module[0]
+
+# Scalar, pure-Python conversions, each from one row (a tuple) to another
+
+def compand(v):
+    """ Compand a linear value in [0, 1] to an sRGB value in [0, 1] """
+    return v * 12.92 if v <= 0.0031308 else 1.055 * math.pow(v, 1 / 2.4) - 0.055
+
+def uncompand(V):
+    """ Linearize an sRGB value in [0, 1] """
+    return V / 12.92 if V <= 0.04045 else math.pow((V + 0.055) / 1.055, 2.4)
+
+def _matrix(m, row):
+    return tuple(m[i][0] * row[0] + m[i][1] * row[1] + m[i][2] * row[2] for i in range(3))
+
+def _lab_f(t):
+    return t ** (1 / 3.0) if t > EPSILON else (KAPPA * t + 16) / 116.0
+
+def _lab_f_inverse(f):
+    cube = f * f * f
+    return cube if cube > EPSILON else (116 * f - 16) / KAPPA
+
+def _xyz_to_cielab(row):
+    fx, fy, fz = (_lab_f(value / white) for value, white in zip(row, WHITE))
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+def _cielab_to_xyz(row):
+    L, a, b = row
+    fy = (L + 16) / 116.0
+    fx = fy + a / 500.0
+    fz = fy - b / 200.0
+    yr = fy * fy * fy if L > KAPPA * EPSILON else L / KAPPA
+    return (_lab_f_inverse(fx) * WHITE[0], yr * WHITE[1], _lab_f_inverse(fz) * WHITE[2])
+
+def _cmyk_to_rgb(row):
+    c, m, y, k = row
+    return ((1 - c) * (1 - k), (1 - m) * (1 - k), (1 - y) * (1 - k))
+
+def _rgb_to_cmyk(row):
+    k = 1.0 - max(row)
+    if k >= 1:
+        return (0.0, 0.0, 0.0, 1.0)
+    return tuple((1 - value - k) / (1 - k) for value in row) + (k,)
+
+def _rgb_to_gray(row):
+    return (compand(_matrix(RGB_TO_XYZ, tuple(uncompand(v) for v in row))[1]),)
+
+PYTHON_STEPS = {
+    ('RGB', 'linearRGB')    : lambda row: tuple(uncompand(v) for v in row),
+    ('linearRGB', 'RGB')    : lambda row: tuple(compand(v) for v in row),
+    ('linearRGB', 'XYZ')    : lambda row: _matrix(RGB_TO_XYZ, row),
+    ('XYZ', 'linearRGB')    : lambda row: _matrix(XYZ_TO_RGB, row),
+    ('XYZ', 'CIELAB')       : _xyz_to_cielab,
+    ('CIELAB', 'XYZ')       : _cielab_to_xyz,
+    ('CIELAB', 'LAB')       : lambda row: (row[0] / 100.0, row[1], row[2]),
+    ('LAB', 'CIELAB')       : lambda row: (row[0] * 100.0, row[1], row[2]),
+    ('CMYK', 'RGB')         : _cmyk_to_rgb,
+    ('RGB', 'CMYK')         : _rgb_to_cmyk,
+    ('Gray', 'RGB')         : lambda row: (row[0], row[0], row[0]),
+    ('RGB', 'Gray')         : _rgb_to_gray,
+}
+
+# Vectorized conversions, each from one (N, width) array to another
+
+def _np_compand(np, v):
+    return np.where(v <= 0.0031308, v * 12.92,
+                    1.055 * np.power(np.maximum(v, 0.0031308), 1 / 2.4) - 0.055)
+
+def _np_uncompand(np, V):
+    return np.where(V <= 0.04045, V / 12.92,
+                    np.power((np.maximum(V, 0.04045) + 0.055) / 1.055, 2.4))
+
+def _np_xyz_to_cielab(np, xyz):
+    t = xyz / np.asarray(WHITE)
+    f = np.where(t > EPSILON, np.cbrt(t), (KAPPA * t + 16) / 116.0)
+    return np.stack((116 * f[:, 1] - 16,
+                     500 * (f[:, 0] - f[:, 1]),
+                     200 * (f[:, 1] - f[:, 2])), axis=1)
+
+def _np_cielab_to_xyz(np, lab):
+    L = lab[:, 0]
+    fy = (L + 16) / 116.0
+    f = np.stack((fy + lab[:, 1] / 500.0, fy, fy - lab[:, 2] / 200.0), axis=1)
+    cube = f ** 3
+    xyz = np.where(cube > EPSILON, cube, (116 * f - 16) / KAPPA)
+    xyz[:, 1] = np.where(L > KAPPA * EPSILON, cube[:, 1], L / KAPPA)
+    return xyz * np.asarray(WHITE)
+
+def _np_rgb_to_cmyk(np, rgb):
+    k = 1 - rgb.max(axis=1)
+    scale = np.where(k < 1, 1 - k, 1)
+    cmy = np.where((k < 1)[:, None], (1 - rgb - k[:, None]) / scale[:, None], 0)
+    return np.concatenate((cmy, k[:, None]), axis=1)
+
+def _np_rgb_to_gray(np, rgb):
+    Y = _np_uncompand(np, rgb).dot(np.asarray(RGB_TO_XYZ[1]))
+    return _np_compand(np, Y)[:, None]
+
+NUMPY_STEPS = {
+    ('RGB', 'linearRGB')    : _np_uncompand,
+    ('linearRGB', 'RGB')    : _np_compand,
+    ('linearRGB', 'XYZ')    : lambda np, rgb: rgb.dot(np.asarray(RGB_TO_XYZ).T),
+    ('XYZ', 'linearRGB')    : lambda np, xyz: xyz.dot(np.asarray(XYZ_TO_RGB).T),
+    ('XYZ', 'CIELAB')       : _np_xyz_to_cielab,
+    ('CIELAB', 'XYZ')       : _np_cielab_to_xyz,
+    ('CIELAB', 'LAB')       : lambda np, lab: lab * np.asarray((0.01, 1.0, 1.0)),
+    ('LAB', 'CIELAB')       : lambda np, lab: lab * np.asarray((100.0, 1.0, 1.0)),
+    ('CMYK', 'RGB')         : lambda np, cmyk: (1 - cmyk[:, :3]) * (1 - cmyk[:, 3:]),
+    ('RGB', 'CMYK')         : _np_rgb_to_cmyk,
+    ('Gray', 'RGB')         : lambda np, gray: np.repeat(gray[:, :1], 3, axis=1),
+    ('RGB', 'Gray')         : _np_rgb_to_gray,
+}
+
+# every space’s route to sRGB, which is the hub of all conversions
+TO_RGB = { 'RGB'       : ('RGB',),
+           'Gray'      : ('Gray', 'RGB'),
+           'CMYK'      : ('CMYK', 'RGB'),
+           'linearRGB' : ('linearRGB', 'RGB'),
+           'XYZ'       : ('XYZ', 'linearRGB', 'RGB'),
+           'CIELAB'    : ('CIELAB', 'XYZ', 'linearRGB', 'RGB'),
+           'LAB'       : ('LAB', 'CIELAB', 'XYZ', 'linearRGB', 'RGB') }
+
+def route(source, target):
+    """ Return the list of ``(from, to)`` steps that convert `source` to `target` """
+    if source not in TO_RGB or target not in TO_RGB:
+        raise ValueError("can't convert from %s to %s" % (source, target))
+    forward = TO_RGB[source]
+    backward = TO_RGB[target][::-1]
+    # drop the shared stretch around the hub, e.g. LAB -> XYZ doesn't need RGB
+    while len(forward) > 1 and len(backward) > 1 and forward[-2] == backward[1]:
+        forward, backward = forward[:-1], backward[1:]
+    path = forward + backward[1:]
+    return list(zip(path, path[1:]))
+
+def convert(values, source, target, use_numpy=None):
+    """ Convert an array of color values from the space `source` to `target`
+        
+        `values` is a sequence of rows (or an ``(N, width)`` array) in `source`.
+        When NumPy is available (and `use_numpy` isn't ``False``) the result is
+        an ``(N, width)`` float64 array; otherwise it is a list of tuples.
+    """
+    steps = route(source, target)
+    np = numpy_or_none() if use_numpy is not False else None
+    if np is not None:
+        array = np.asarray(values, dtype=np.float64).reshape(-1, WIDTHS[source])
+        for step in steps:
+            array = NUMPY_STEPS[step](np, array)
+        return array
+    if use_numpy:
+        raise ImportError("NumPy is required for use_numpy=True")
+    functions = [PYTHON_STEPS[step] for step in steps]
+    output = []
+    for row in values:
+        row = tuple(row)
+        for function in functions:
+            row = function(row)
+        output.append(row)
+    return output
+
+def convert_palette(palette, target='RGB', use_numpy=None):
+    """ Convert every swatch in `palette` to the space `target`, at once
+        
+        `palette` is either a `swatch.Palette` or the list of swatches and
+        color groups returned by `swatch.parse(…)`. Each of its color modes is
+        converted in bulk, and the rows are returned in file order – as an
+        ``(N, width)`` array with NumPy, or a list of tuples without.
+    """
+    from .palette import Palette, MODES, MODE_WIDTHS
+    if not isinstance(palette, Palette):
+        palette = Palette.from_objects(palette)
+    np = numpy_or_none() if use_numpy is not False else None
+    if np is not None:
+        output = np.empty((len(palette), WIDTHS[target]), dtype=np.float64)
+        modes = np.frombuffer(palette.modes, dtype=np.uint8) if len(palette) else np.zeros(0, np.uint8)
+        for code, mode in enumerate(MODES):
+            if len(palette.values[mode]):
+                output[modes == code] = convert(palette.array(mode), mode, target, True)
+        return output
+    converted = []
+    for mode in MODES:
+        column = palette.values[mode]
+        width = MODE_WIDTHS[mode]
+        converted.append(convert([column[i:i + width] for i in range(0, len(column), width)],
+                                 mode, target, False))
+    return [converted[code][row] for code, row in zip(palette.modes, palette.rows)]
+
+# Color differences, between rows in CIELAB
+
+def delta_e76(lab1, lab2):
+    """ Return the CIE 1976 color difference – the euclidean distance in CIELAB """
+    return math.sqrt((lab1[0] - lab2[0]) ** 2 + (lab1[1] - lab2[1]) ** 2 + (lab1[2] - lab2[2]) ** 2)
+
+def delta_e2000(lab1, lab2):
+    """ Return the CIEDE2000 color difference between two CIELAB rows
+        
+        q.v. Sharma, Wu & Dalal, “The CIEDE2000 Color-Difference Formula”
+    """
+    L1, a1, b1 = lab1
+    L2, a2, b2 = lab2
+    C_mean = (math.hypot(a1, b1) + math.hypot(a2, b2)) / 2.0
+    G = 0.5 * (1 - math.sqrt(C_mean ** 7 / (C_mean ** 7 + 25.0 ** 7)))
+    a1, a2 = a1 * (1 + G), a2 * (1 + G)
+    C1, C2 = math.hypot(a1, b1), math.hypot(a2, b2)
+    h1 = math.degrees(math.atan2(b1, a1)) % 360 if C1 else 0.0
+    h2 = math.degrees(math.atan2(b2, a2)) % 360 if C2 else 0.0
+    
+    dL = L2 - L1
+    dC = C2 - C1
+    dh = 0.0
+    if C1 * C2:
+        dh = h2 - h1
+        if dh > 180:
+            dh -= 360
+        elif dh < -180:
+            dh += 360
+    dH = 2 * math.sqrt(C1 * C2) * math.sin(math.radians(dh / 2.0))
+    
+    L_mean = (L1 + L2) / 2.0
+    C_mean = (C1 + C2) / 2.0
+    h_mean = h1 + h2
+    if C1 * C2:
+        if abs(h1 - h2) <= 180:
+            h_mean /= 2.0
+        elif h1 + h2 < 360:
+            h_mean = (h_mean + 360) / 2.0
+        else:
+            h_mean = (h_mean - 360) / 2.0
+    
+    T = (1 - 0.17 * math.cos(math.radians(h_mean - 30))
+           + 0.24 * math.cos(math.radians(2 * h_mean))
+           + 0.32 * math.cos(math.radians(3 * h_mean + 6))
+           - 0.20 * math.cos(math.radians(4 * h_mean - 63)))
+    d_theta = 30 * math.exp(-((h_mean - 275) / 25.0) ** 2)
+    R_C = 2 * math.sqrt(C_mean ** 7 / (C_mean ** 7 + 25.0 ** 7))
+    S_L = 1 + (0.015 * (L_mean - 50) ** 2) / math.sqrt(20 + (L_mean - 50) ** 2)
+    S_C = 1 + 0.045 * C_mean
+    S_H = 1 + 0.015 * C_mean * T
+    R_T = -math.sin(math.radians(2 * d_theta)) * R_C
+    
+    return math.sqrt((dL / S_L) ** 2 + (dC / S_C) ** 2 + (dH / S_H) ** 2 +
+                     R_T * (dC / S_C) * (dH / S_H))
+
+def delta_e2000_array(np, lab1, lab2):
+    """ Vectorized CIEDE2000, between broadcastable ``(…, 3)`` CIELAB arrays """
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+    C_mean = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2.0
+    G = 0.5 * (1 - np.sqrt(C_mean ** 7 / (C_mean ** 7 + 25.0 ** 7)))
+    a1, a2 = a1 * (1 + G), a2 * (1 + G)
+    C1, C2 = np.hypot(a1, b1), np.hypot(a2, b2)
+    h1 = np.where(C1 > 0, np.degrees(np.arctan2(b1, a1)) % 360, 0.0)
+    h2 = np.where(C2 > 0, np.degrees(np.arctan2(b2, a2)) % 360, 0.0)
+    chroma = (C1 * C2) > 0
+    
+    dL = L2 - L1
+    dC = C2 - C1
+    dh = h2 - h1
+    dh = np.where(dh > 180, dh - 360, np.where(dh < -180, dh + 360, dh))
+    dh = np.where(chroma, dh, 0.0)
+    dH = 2 * np.sqrt(C1 * C2) * np.sin(np.radians(dh / 2.0))
+    
+    L_mean = (L1 + L2) / 2.0
+    C_mean = (C1 + C2) / 2.0
+    h_sum = h1 + h2
+    h_mean = np.where(np.abs(h1 - h2) <= 180, h_sum / 2.0,
+                      np.where(h_sum < 360, (h_sum + 360) / 2.0, (h_sum - 360) / 2.0))
+    h_mean = np.where(chroma, h_mean, h_sum)
+    
+    T = (1 - 0.17 * np.cos(np.radians(h_mean - 30))
+           + 0.24 * np.cos(np.radians(2 * h_mean))
+           + 0.32 * np.cos(np.radians(3 * h_mean + 6))
+           - 0.20 * np.cos(np.radians(4 * h_mean - 63)))
+    d_theta = 30 * np.exp(-((h_mean - 275) / 25.0) ** 2)
+    R_C = 2 * np.sqrt(C_mean ** 7 / (C_mean ** 7 + 25.0 ** 7))
+    S_L = 1 + (0.015 * (L_mean - 50) ** 2) / np.sqrt(20 + (L_mean - 50) ** 2)
+    S_C = 1 + 0.045 * C_mean
+    S_H = 1 + 0.015 * C_mean * T
+    R_T = -np.sin(np.radians(2 * d_theta)) * R_C
+    
+    return np.sqrt((dL / S_L) ** 2 + (dC / S_C) ** 2 + (dH / S_H) ** 2 +
+                   R_T * (dC / S_C) * (dH / S_H))
@@ -0,0 +1,264 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Comparing two versions of a palette, and patching one into the other.
+
+``compare(old, new)`` reads the old palette once, keeping only each color’s
+name and values, then streams the new one past it – so two large files are
+compared without building either tree. Colors are aligned by name first
+(a hash lookup), then by exact values, and finally by nearest color, through
+a `swatch.index.NearestColorIndex` of whatever is left over:
+
+    >>> changes = swatch.diff.compare("swatches/ase/RAL DESIGN 1993.ase",
+    ...                               "swatches/ase/RAL DESIGN 2007.ase")
+    >>> changes.summary()
+    Counter({'unchanged': …, 'shifted': …, 'added': …, 'removed': …})
+    >>> changes.shifted[0]
+    Change(kind='shifted', old={…}, new={…}, delta_e=1.93…)
+    >>> swatch.diff.apply(changes.patch, "RAL DESIGN 1993.ase", "RAL DESIGN 2007.ase")
+
+The patch is a small JSON-ready ``dict`` of operations: runs of unchanged
+colors are copied from the old palette by position (``['copy', start,
+count]``), and everything else is spelled out – new and changed colors as
+``['color', name, type, mode, values]``, and group boundaries as
+``['start-group', name]`` and ``['end-group']``.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from collections import Counter, namedtuple
+
+from . import colorspace, parser
+
+KINDS = ('added', 'removed', 'renamed', 'shifted', 'retyped')
+PATCH_FORMAT = 'swatch-patch'
+PATCH_VERSION = 1
+
+Change = namedtuple('Change', ('kind', 'old', 'new', 'delta_e'))
+
+def iter_events(source):
+    """ Return ``(event, object)`` pairs for `source` – a filename (in any format of
+        `swatch.formats`), a list as returned by `swatch.parse(…)` or an iterable of pairs
+    """
+    if isinstance(source, str):
+        from . import formats
+        return formats.iterparse(source)
+    if isinstance(source, list):
+        return parser.events_for_tree(source)
+    return source
+
+def iter_colors(source):
+    """ Generate every color of `source`, in order, regardless of groups """
+    for event, obj in iter_events(source):
+        if event == parser.COLOR:
+            yield obj
+
+def delta_e(old, new, metric='2000'):
+    """ Return the color difference between the colors `old` and `new` """
+    labs = [colorspace.convert([color['data']['values']], color['data']['mode'], 'CIELAB',
+                               use_numpy=False)[0] for color in (old, new)]
+    if metric == '76':
+        return colorspace.delta_e76(*labs)
+    return colorspace.delta_e2000(*labs)
+
+class Diff(object):
+    """ The differences between two palettes
+        
+        • ``changes``: every ``Change`` – an ``'added'``, ``'removed'``,
+          ``'renamed'`` (and perhaps shifted), ``'shifted'`` (same name, new
+          values or mode) or ``'retyped'`` (same name and values, new type)
+          color, with its ΔE where there are two colors to compare
+        • ``unchanged``: the number of colors that are exactly the same
+        • ``patch``: the patch that turns the old palette into the new one,
+          for ``apply(…)``
+    """
+    
+    def __init__(self, changes, unchanged, patch):
+        self.changes = changes
+        self.unchanged = unchanged
+        self.patch = patch
+    
+    def __len__(self):
+        return len(self.changes)
+    
+    def __iter__(self):
+        return iter(self.changes)
+    
+    def of_kind(self, kind):
+        return [change for change in self.changes if change.kind == kind]
+    
+    added = property(lambda self: self.of_kind('added'))
+    removed = property(lambda self: self.of_kind('removed'))
+    renamed = property(lambda self: self.of_kind('renamed'))
+    shifted = property(lambda self: self.of_kind('shifted'))
+    retyped = property(lambda self: self.of_kind('retyped'))
+    
+    def summary(self):
+        """ Return a ``Counter`` of the changes by kind, and of the unchanged colors """
+        counts = Counter(change.kind for change in self.changes)
+        counts['unchanged'] = self.unchanged
+        return counts
+
+def compare(old, new, metric='2000', threshold=2.0):
+    """ Compare the palettes `old` and `new`, returning a ``Diff``
+        
+        Either may be a filename (in any format of `swatch.formats`), a list
+        as returned by `swatch.parse(…)` or an iterable of ``(event,
+        object)`` pairs. Colors that don’t share a name with one on the other
+        side are paired up as renames if their values are the same, or if
+        they are within `threshold` of one another by `metric` (``'2000'``,
+        CIEDE2000, or ``'76'``).
+    """
+    if metric not in ('76', '2000'):
+        raise ValueError("unknown metric: %r (expected '76' or '2000')" % (metric,))
+    # the old palette, reduced to names and (mode, values, type) records
+    names = []
+    records = []
+    for color in iter_colors(old):
+        data = color['data']
+        names.append(color['name'])
+        records.append((data['mode'], tuple(data['values']), color['type']))
+    by_name = {}
+    for position in range(len(names) - 1, -1, -1):
+        by_name.setdefault(names[position], []).append(position)
+    matched = bytearray(len(names))
+    
+    changes = []
+    pending = []
+    ops = []
+    unchanged = 0
+    for event, obj in iter_events(new):
+        if event != parser.COLOR:
+            if event == parser.START_GROUP:
+                ops.append([parser.START_GROUP, obj['name']])
+            else:
+                ops.append([parser.END_GROUP])
+            continue
+        data = obj['data']
+        record = (data['mode'], tuple(data['values']), obj['type'])
+        positions = by_name.get(obj['name'])
+        if positions:
+            position = positions.pop()
+            matched[position] = 1
+            if record == records[position]:
+                unchanged += 1
+                last = ops[-1] if ops else None
+                if last is not None and last[0] == 'copy' and last[1] + last[2] == position:
+                    last[2] += 1
+                else:
+                    ops.append(['copy', position, 1])
+                continue
+            old_color = color_for(names[position], records[position])
+            if record[:2] == records[position][:2]:
+                changes.append(Change('retyped', old_color, obj, 0.0))
+            else:
+                changes.append(Change('shifted', old_color, obj, delta_e(old_color, obj, metric)))
+        else:
+            pending.append(obj)
+        ops.append(['color', obj['name'], obj['type'], data['mode'], list(data['values'])])
+    
+    removed = [position for position in range(len(names)) if not matched[position]]
+    renamed, added, removed = pair_renames(pending, removed, names, records, metric, threshold)
+    changes.extend(renamed)
+    changes.extend(Change('added', None, color, None) for color in added)
+    changes.extend(Change('removed', color_for(names[position], records[position]), None, None)
+                   for position in removed)
+    patch = {
+        'format': PATCH_FORMAT,
+        'version': PATCH_VERSION,
+        'colors': len(names),
+        'ops': ops
+    }
+    return Diff(changes, unchanged, patch)
+
+def color_for(name, record):
+    """ Rebuild a color ``dict`` from its name and ``(mode, values, type)`` record """
+    mode, values, color_type = record
+    return {'name': name, 'type': color_type, 'data': {'mode': mode, 'values': list(values)}}
+
+def pair_renames(added, removed, names, records, metric, threshold):
+    """ Pair up added colors with removed ones – by values, then by nearest color
+        
+        Returns the ``'renamed'`` changes, and the added colors and removed
+        positions that are left unpaired.
+    """
+    renamed = []
+    by_values = {}
+    for position in reversed(removed):
+        by_values.setdefault(records[position][:2], []).append(position)
+    taken = set()
+    unpaired = []
+    for color in added:
+        data = color['data']
+        positions = by_values.get((data['mode'], tuple(data['values'])))
+        if positions:
+            position = positions.pop()
+            taken.add(position)
+            renamed.append(Change('renamed', color_for(names[position], records[position]), color, 0.0))
+        else:
+            unpaired.append(color)
+    left = [position for position in removed if position not in taken]
+    
+    if unpaired and left and threshold > 0:
+        from .index import NearestColorIndex
+        index = NearestColorIndex().add([color_for(names[position], records[position])
+                                         for position in left])
+        candidates = []
+        for number, color in enumerate(unpaired):
+            data = color['data']
+            for match in index.nearest(data['values'], k=1, mode=data['mode'], metric=metric):
+                if match.distance <= threshold:
+                    candidates.append((match.distance, number, match.id))
+        # the closest pairs first, each color in at most one pair
+        paired_added, paired_removed = set(), set()
+        for distance, number, id in sorted(candidates):
+            if number in paired_added or id in paired_removed:
+                continue
+            paired_added.add(number)
+            paired_removed.add(id)
+            position = left[id]
+            renamed.append(Change('renamed', color_for(names[position], records[position]),
+                                  unpaired[number], distance))
+        unpaired = [color for number, color in enumerate(unpaired) if number not in paired_added]
+        left = [position for id, position in enumerate(left) if id not in paired_removed]
+    return renamed, unpaired, left
+
+def apply_events(patch, old):
+    """ Generate the ``(event, object)`` pairs of the palette `patch` turns `old` into """
+    if patch.get('format') != PATCH_FORMAT or patch.get('version') != PATCH_VERSION:
+        raise ValueError("not a swatch patch (or an unsupported version)")
+    colors = list(iter_colors(old))
+    if len(colors) != patch['colors']:
+        raise ValueError("patch is for a palette of %d colors, not %d" % (patch['colors'],
+                                                                           len(colors)))
+    group = None
+    for op in patch['ops']:
+        kind = op[0]
+        if kind == 'copy':
+            for color in colors[op[1]:op[1] + op[2]]:
+                yield parser.COLOR, color
+        elif kind == 'color':
+            yield parser.COLOR, {'name': op[1], 'type': op[2],
+                                 'data': {'mode': op[3], 'values': op[4]}}
+        elif kind == parser.START_GROUP:
+            group = {'name': op[1], 'type': 'Color Group'}
+            yield parser.START_GROUP, group
+        elif kind == parser.END_GROUP:
+            yield parser.END_GROUP, group
+            group = None
+        else:
+            raise ValueError("unknown patch operation: %r" % (kind,))
+
+def apply(patch, old, destination=None, format=None, **options):
+    """ Apply `patch` to the palette `old`, returning the new list of colors and groups
+        
+        With a `destination`, the result is written there instead (in any
+        format of `swatch.formats`), straight from the stream of events.
+    """
+    events = apply_events(patch, old)
+    if destination is None:
+        return parser.tree_for_events(events)
+    from . import formats
+    formats.write_events(events, destination, format, **options)
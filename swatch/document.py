@@ -0,0 +1,391 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Editing ``.ase`` files in place, without re-encoding what hasn’t changed.
+
+A ``Document`` reads a file and makes a single pass over its chunk heads,
+recording where every chunk starts – nothing is decoded. Each chunk of the
+document is then either a span of the original bytes or, once it has been
+edited, a freshly encoded chunk: only edited chunks are ever encoded, chunks
+of types the parser doesn’t know about are kept byte for byte, and writing
+the document out hands the runs of unchanged bytes straight to the operating
+system, with a single vectored write:
+
+    >>> doc = swatch.edit("swatches/ase/PANTONE® FORMULA GUIDE solid coated.ase")
+    >>> doc.recolor('PANTONE® 185 C', [0.91, 0.0, 0.18], mode='RGB')
+    >>> doc.rename('PANTONE® 186 C', 'Brand Red')
+    >>> doc.save()
+
+``save()`` patches just the edited chunks into the file when none of them
+have changed size (as with a recolor in the same mode), and otherwise
+rewrites the file atomically.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from array import array
+from codecs import utf_16_be_encode
+import io
+import os
+
+from . import parser
+from .writer import chunk_for_color, folder_record, replacing
+
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+def write_spans(handle, spans):
+    """ Write every buffer in `spans` to `handle`, a binary file or a file descriptor
+        
+        Descriptors and unbuffered files (``io.RawIOBase``, as opened with
+        ``buffering=0``) get vectored writes. Anything else – buffered,
+        compressed or in memory – gets ``writelines``, so that whatever it
+        holds, or does to the data, is left to it.
+    """
+    if isinstance(handle, int):
+        descriptor = handle
+    elif isinstance(handle, io.RawIOBase):
+        try:
+            descriptor = handle.fileno()
+        except (AttributeError, OSError):
+            descriptor = None
+    else:
+        handle.writelines(spans)
+        return
+    
+    spans = [memoryview(span) for span in spans if len(span)]
+    if descriptor is None:
+        write = lambda first: handle.write(spans[first])
+    elif hasattr(os, 'writev'):
+        write = lambda first: os.writev(descriptor, spans[first:first + IOV_MAX])
+    else:
+        write = lambda first: os.write(descriptor, spans[first])
+    
+    first = 0
+    while first < len(spans):
+        written = write(first)
+        # step past what was written, which may end partway through a span
+        while first < len(spans) and written >= len(spans[first]):
+            written -= len(spans[first])
+            first += 1
+        if written:
+            spans[first] = spans[first][written:]
+
+class Document(object):
+    """ An editable ``.ase`` file
+        
+        Colors are addressed by position (in file order, across groups) or
+        by name – the first color of that name – and come back as ``dict``s
+        like those of ``swatch.parse(…)``:
+        
+        • ``doc[key]`` decodes a color; ``doc[key] = color`` replaces it
+          (with a ``dict`` or a `swatch.Color`), and ``del doc[key]``
+          removes it
+        • ``rename(…)``, ``recolor(…)`` and ``rename_group(…)`` edit names
+          and values, and ``insert(…)`` and ``append(…)`` add colors
+        • ``to_bytes()``, ``write(…)`` and ``save()`` put the result back out
+        
+        Internally, ``entries`` lists the document’s chunks in order: the
+        number of an original chunk, kept as it is, or the bytes of a new or
+        edited one.
+    """
+    
+    def __init__(self, data, filename=None):
+        self.filename = filename
+        self.load(data)
+    
+    @classmethod
+    def from_file(cls, filename):
+        with io.open(filename, 'rb') as handle:
+            return cls(handle.read(), filename)
+    
+    def load(self, data):
+        """ Index the chunks of the ``.ase`` file `data`, discarding any edits """
+        self.data = bytearray(data)
+        self.view = memoryview(self.data)
+        self.count = parser.read_header(self.view)
+        self.offsets = offsets = array('I')
+        self.types = types = array('H')
+        view = self.view
+        unpack_head = parser.CHUNK_HEAD.unpack_from
+        add_offset, add_type = offsets.append, types.append
+        head_size = parser.CHUNK_HEAD.size
+        offset = parser.FILE_HEADER.size
+        end = len(view)
+        last = end - head_size
+        while offset < end:
+            if offset > last:
+                raise parser.ParseError("truncated chunk head", offset)
+            chunk_type, chunk_length = unpack_head(view, offset)
+            add_offset(offset)
+            add_type(chunk_type)
+            offset += head_size + chunk_length
+        if offset > end:
+            raise parser.ParseError("truncated chunk", offsets[-1])
+        offsets.append(end)
+        self.entries = list(range(len(types)))
+        self.edited = set()
+        self.reshaped = False
+        self._colors = None
+        self._names = None
+    
+    # Chunks
+    
+    def chunk(self, entry):
+        """ Return the bytes of the chunk `entry` (an original chunk number, or bytes) """
+        if isinstance(entry, int):
+            return self.view[self.offsets[entry]:self.offsets[entry + 1]]
+        return memoryview(entry)
+    
+    def chunk_type(self, entry):
+        if isinstance(entry, int):
+            return self.types[entry]
+        return parser.CHUNK_HEAD.unpack_from(entry)[0]
+    
+    def decode(self, entry):
+        """ Decode the color or folder chunk `entry` as a ``dict`` """
+        chunk = self.chunk(entry)
+        return parser.dict_for_buffer(chunk, parser.CHUNK_HEAD.size, len(chunk))
+    
+    def raw_name(self, entry):
+        """ Return the encoded name of the color or folder chunk `entry`, as ``bytes`` """
+        chunk = self.chunk(entry)
+        start = parser.CHUNK_HEAD.size + parser.TITLE_LENGTH.size
+        end = start + 2 * parser.TITLE_LENGTH.unpack_from(chunk, parser.CHUNK_HEAD.size)[0]
+        # drop the terminator (NUL characters, not bytes: 'Ā' ends in a zero byte)
+        while end - start >= 2 and chunk[end - 2] == 0 and chunk[end - 1] == 0:
+            end -= 2
+        return bytes(chunk[start:end])
+    
+    def replace(self, index, chunk):
+        """ Replace the chunk at `index` in ``entries`` with the encoded `chunk` """
+        self.entries[index] = chunk
+        self.edited.add(index)
+    
+    def insert_chunk(self, index, chunk):
+        self.entries.insert(index, chunk)
+        self.reshaped = True
+        self._colors = self._names = None
+    
+    # Colors
+    
+    @property
+    def colors(self):
+        """ The index in ``entries`` of every color chunk, in order """
+        if self._colors is None:
+            self._colors = [index for index, entry in enumerate(self.entries)
+                            if self.chunk_type(entry) == parser.COLOR_CHUNK]
+        return self._colors
+    
+    def __len__(self):
+        return len(self.colors)
+    
+    def __iter__(self):
+        for index in self.colors:
+            yield self.decode(self.entries[index])
+    
+    def __contains__(self, name):
+        return self.position(name) is not None
+    
+    def position(self, name):
+        """ Return the position of the first color named `name`, or ``None`` """
+        if self._names is None:
+            names = {}
+            for position, index in enumerate(self.colors):
+                names.setdefault(self.raw_name(self.entries[index]), position)
+            self._names = names
+        return self._names.get(utf_16_be_encode(name)[0])
+    
+    def index_of(self, key):
+        """ Return the index in ``entries`` of the color `key` – a position or a name """
+        if isinstance(key, str):
+            position = self.position(key)
+            if position is None:
+                raise KeyError(key)
+            return self.colors[position]
+        return self.colors[key]
+    
+    def __getitem__(self, key):
+        return self.decode(self.entries[self.index_of(key)])
+    
+    def __setitem__(self, key, color):
+        index = self.index_of(key)
+        old_name = self.raw_name(self.entries[index])
+        self.replace(index, chunk_for_color(color))
+        if self.raw_name(self.entries[index]) != old_name:
+            self._names = None
+    
+    def __delitem__(self, key):
+        index = self.index_of(key)
+        del self.entries[index]
+        self.count -= 1
+        self.reshaped = True
+        self._colors = self._names = None
+    
+    def rename(self, key, name):
+        """ Rename the color `key` """
+        color = self[key]
+        color['name'] = name
+        self[key] = color
+    
+    def recolor(self, key, values, mode=None):
+        """ Set the values of the color `key` – and its mode, if given """
+        color = self[key]
+        color['data'] = {'mode': mode or color['data']['mode'], 'values': list(values)}
+        self[key] = color
+    
+    def insert(self, position, color):
+        """ Insert `color` before the color at `position` (in the same group) """
+        colors = self.colors
+        if position < 0:
+            position += len(colors)
+        if position >= len(colors):
+            return self.append(color)
+        self.insert_chunk(colors[position], chunk_for_color(color))
+        self.count += 1
+    
+    def append(self, color, group=None):
+        """ Add `color` at the end of the document – or at the end of the group named `group` """
+        index = len(self.entries)
+        if group is not None:
+            index = self.group_index(group) + 1
+            while (index < len(self.entries) and
+                   self.chunk_type(self.entries[index]) != parser.FOLDER_END_CHUNK):
+                index += 1
+        self.insert_chunk(index, chunk_for_color(color))
+        self.count += 1
+    
+    # Groups
+    
+    def groups(self):
+        """ Return the name of every group, in order """
+        return [self.decode(entry)['name'] for entry in self.entries
+                if self.chunk_type(entry) == parser.FOLDER_CHUNK]
+    
+    def group_index(self, name):
+        """ Return the index in ``entries`` of the folder chunk of the group `name` """
+        raw = utf_16_be_encode(name)[0]
+        for index, entry in enumerate(self.entries):
+            if self.chunk_type(entry) == parser.FOLDER_CHUNK and self.raw_name(entry) == raw:
+                return index
+        raise KeyError(name)
+    
+    def rename_group(self, name, new_name):
+        """ Rename the group `name` """
+        index = self.group_index(name)
+        codec, args = folder_record(new_name)
+        self.replace(index, codec.pack(*args))
+    
+    # Output
+    
+    def header(self):
+        if self.count == parser.FILE_HEADER.unpack_from(self.view)[3]:
+            return self.view[:parser.FILE_HEADER.size]
+        return parser.FILE_HEADER.pack(parser.HEADER, parser.V_MAJOR, parser.V_MINOR, self.count)
+    
+    def spans(self):
+        """ Return the buffers that make up the document, in order
+            
+            Every run of consecutive original chunks is a single slice of the
+            original bytes; each edited chunk is a buffer of its own.
+        """
+        header = self.header()
+        offsets = self.offsets
+        if not self.reshaped:
+            # every chunk is where it was: only the edits break up the original bytes
+            spans = []
+            start = 0 if isinstance(header, memoryview) else offsets[0]
+            if start:
+                spans.append(header)
+            for index in sorted(self.edited):
+                if offsets[index] > start:
+                    spans.append(self.view[start:offsets[index]])
+                spans.append(self.entries[index])
+                start = offsets[index + 1]
+            if start < len(self.view) or not spans:
+                spans.append(self.view[start:])
+            return spans
+        spans = [header]
+        run = None
+        for entry in self.entries:
+            if isinstance(entry, int):
+                if run is not None and run[1] == entry:
+                    run[1] = entry + 1
+                    continue
+                if run is not None:
+                    spans.append(self.view[offsets[run[0]]:offsets[run[1]]])
+                run = [entry, entry + 1]
+            else:
+                if run is not None:
+                    spans.append(self.view[offsets[run[0]]:offsets[run[1]]])
+                    run = None
+                spans.append(entry)
+        if run is not None:
+            spans.append(self.view[offsets[run[0]]:offsets[run[1]]])
+        return spans
+    
+    def to_bytes(self):
+        return b''.join(self.spans())
+    
+    def to_list(self):
+        """ Return the document as ``swatch.parse(…)`` would """
+        return parser.parse_buffer(self.to_bytes(), parser.FILE_HEADER.size)
+    
+    @property
+    def modified(self):
+        return self.reshaped or bool(self.edited)
+    
+    def patchable(self):
+        """ Return ``True`` if every edit can be written over the original chunk in place """
+        if self.reshaped:
+            return False
+        for index in self.edited:
+            if len(self.entries[index]) != self.offsets[index + 1] - self.offsets[index]:
+                return False
+        return True
+    
+    def write(self, destination):
+        """ Write the document to `destination` (a filename or a binary file), atomically
+            
+            Unchanged runs of chunks are written straight from the original
+            bytes, along with the edited chunks, by one vectored write.
+        """
+        if not isinstance(destination, (str, bytes, os.PathLike)):
+            write_spans(destination, self.spans())
+            return
+        with replacing(destination, 'wb', buffering=0) as handle:
+            write_spans(handle, self.spans())
+    
+    def save(self):
+        """ Write the edits back to the file the document was read from
+            
+            If no edit changed the size of its chunk, just those chunks are
+            written, over the originals; otherwise the whole file is
+            rewritten (atomically, as by ``write(…)``). Returns the number of
+            bytes written.
+        """
+        if self.filename is None:
+            raise ValueError("the document wasn't read from a file – use write(…)")
+        if not self.modified:
+            return 0
+        if self.patchable():
+            written = 0
+            with io.open(self.filename, 'r+b') as handle:
+                for index in sorted(self.edited):
+                    chunk = self.entries[index]
+                    start = self.offsets[index]
+                    handle.seek(start)
+                    handle.write(chunk)
+                    self.view[start:start + len(chunk)] = chunk
+                    self.entries[index] = index
+                    written += len(chunk)
+            self.edited.clear()
+            return written
+        spans = self.spans()
+        self.write(self.filename)
+        self.load(b''.join(spans))
+        return len(self.data)
@@ -0,0 +1,127 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Readers and writers for palette formats other than ``.ase``.
+
+Every format is a module with two functions, speaking the event model of
+`swatch.iterparse(…)` – ``(event, object)`` pairs, where the event is one
+of ``'start-group'``, ``'color'`` and ``'end-group'``:
+
+• ``read_events(handle, **options)`` generates the events for the palette
+  read from `handle`;
+• ``write_events(events, handle, **options)`` writes out the palette whose
+  events it is given.
+
+As both sides stream, converting between any two formats never builds the
+whole palette in memory:
+
+    >>> swatch.formats.convert("Colorizer.html", "Colorizer.ase")
+    >>> for event, obj in swatch.formats.iterparse("palette.gpl"):
+    ...     print(event, obj['name'])
+
+The formats, chosen by file extension:
+
+• ``.ase``: Adobe Swatch Exchange
+• ``.aco``: Photoshop color swatches (names, where there are any, come from
+  the version 2 section)
+• ``.gpl``: GIMP palettes
+• ``.csv``: one color per row, with its group, name, type, mode and values
+• ``.ndjson``/``.jsonl``: JSON lines – a color or a whole group per line, as
+  `swatch.parse(…)` would return them
+• ``.json``: the list `swatch.parse(…)` returns, as JSON (not streamed)
+• ``.html``: the layout of the SwatchBook pages in ``swatches/html``
+
+Formats that only hold RGB (GIMP palettes and SwatchBook pages) convert
+other colors to sRGB on the way out, using `swatch.colorspace`.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+import io
+import os
+
+from .. import instrument, parser
+from ..writer import replacing
+from . import aco, ase, csv, gpl, json, ndjson, swatchbook
+
+FORMATS = { '.ase'      : ase,
+            '.aco'      : aco,
+            '.gpl'      : gpl,
+            '.csv'      : csv,
+            '.ndjson'   : ndjson,
+            '.jsonl'    : ndjson,
+            '.json'     : json,
+            '.html'     : swatchbook,
+            '.htm'      : swatchbook }
+
+def format_for(filename, format=None):
+    """ Return the format module for `format` (an extension), or for `filename`’s extension """
+    extension = format or os.path.splitext(filename)[1]
+    extension = '.' + extension.lower().lstrip('.')
+    try:
+        return FORMATS[extension]
+    except KeyError:
+        raise ValueError("unsupported format: %s" % extension)
+
+def open_for(module, filename, mode):
+    """ Open `filename` as the format `module` expects – in binary or as UTF-8 text """
+    if module.BINARY:
+        return io.open(filename, mode + 'b')
+    return io.open(filename, mode, encoding='utf-8', newline='')
+
+def replacing_for(module, filename):
+    """ Open a file to replace `filename` atomically, as the format `module` expects
+        (see `swatch.writer.replacing`)
+    """
+    if module.BINARY:
+        return replacing(filename, 'wb')
+    return replacing(filename, 'w', encoding='utf-8', newline='')
+
+def iterparse(source, format=None, **options):
+    """ Generate ``(event, object)`` pairs for the palette in `source`
+        
+        `source` is a filename, or a file object opened as the format expects
+        (with `format` naming it, by extension); any `options` are passed to
+        the format’s reader.
+    """
+    if isinstance(source, str):
+        module = format_for(source, format)
+        with instrument.file(source), open_for(module, source, 'r') as handle:
+            for event in module.read_events(handle, **options):
+                yield event
+    else:
+        for event in format_for('', format).read_events(source, **options):
+            yield event
+
+def parse(source, format=None, **options):
+    """ Read the palette in `source`, returning what `swatch.parse(…)` would """
+    return parser.tree_for_events(iterparse(source, format, **options))
+
+def write_events(events, destination, format=None, **options):
+    """ Write the palette whose ``(event, object)`` pairs are `events` to `destination`
+        
+        A file named by `destination` is only replaced once the whole palette
+        has been written – if anything goes wrong, it is left as it was.
+    """
+    if isinstance(destination, str):
+        module = format_for(destination, format)
+        with instrument.file(destination), replacing_for(module, destination) as handle:
+            module.write_events(events, handle, **options)
+    else:
+        format_for('', format).write_events(events, destination, **options)
+
+def write(obj, destination, format=None, **options):
+    """ Write a list of colors and color groups, as `swatch.parse(…)` returns, to `destination` """
+    write_events(parser.events_for_tree(obj), destination, format, **options)
+
+def convert(source, destination, source_format=None, destination_format=None):
+    """ Convert the palette in `source` to the format of `destination`, in one streaming pass
+        
+        Converting a file onto itself raises a ``ValueError``.
+    """
+    if (isinstance(source, str) and isinstance(destination, str) and
+        os.path.exists(destination) and os.path.samefile(source, destination)):
+        raise ValueError("won't convert %s onto itself" % source)
+    write_events(iterparse(source, source_format), destination, destination_format)
@@ -0,0 +1,136 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Photoshop color swatches (``.aco``).
+
+An ``.aco`` file holds a version 1 section – a count, then for each color a
+big-endian short naming its color space and four shorts of values – usually
+followed by a version 2 section repeating the colors, each with a UTF-16 name.
+The reader streams the version 2 section when there is one, and falls back to
+version 1 (naming colors after their hex value, or their position) when there
+isn’t. Photoshop has no color groups: they are flattened on the way out.
+
+q.v. https://www.adobe.com/devnet-apps/photoshop/fileformatashtml/#50577411_pgfId-1055819
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+import colorsys
+import struct
+
+from .. import parser
+from ..objects import encode_title
+from . import rgb
+
+BINARY = True
+
+SECTION = struct.Struct('>HH')
+COLOR = struct.Struct('>H4H')
+LAB_COLOR = struct.Struct('>HHhhH')
+NAME_LENGTH = struct.Struct('>I')
+
+RGB, HSB, CMYK, LAB, GRAY = 0, 1, 2, 7, 8
+SPACES = { 'RGB'  : RGB,
+           'CMYK' : CMYK,
+           'LAB'  : LAB,
+           'Gray' : GRAY }
+
+def decode(space, record):
+    """ Return the ASE ``(mode, values)`` for an ``.aco`` color record """
+    if space == LAB:
+        lightness, a, b = LAB_COLOR.unpack(record)[1:4]
+        return 'LAB', [lightness / 10000.0, a / 100.0, b / 100.0]
+    w, x, y, z = COLOR.unpack(record)[1:]
+    if space == RGB:
+        return 'RGB', [w / 65535.0, x / 65535.0, y / 65535.0]
+    if space == HSB:
+        return 'RGB', list(colorsys.hsv_to_rgb(w / 65535.0, x / 65535.0, y / 65535.0))
+    if space == CMYK:
+        # 0 is 100% ink
+        return 'CMYK', [1.0 - value / 65535.0 for value in (w, x, y, z)]
+    if space == GRAY:
+        return 'Gray', [1.0 - w / 10000.0]
+    raise ValueError("unsupported .aco color space: %d" % space)
+
+def encode(color):
+    """ Return the ``.aco`` record for a color ``dict`` """
+    def scale(value, top):
+        return min(top, max(0, int(round(value * top))))
+    mode = color['data']['mode']
+    values = color['data']['values']
+    space = SPACES[mode]
+    if space == LAB:
+        return LAB_COLOR.pack(space, scale(values[0], 10000),
+                              *[min(12700, max(-12800, int(round(value * 100)))) for value in values[1:]] + [0])
+    if space == RGB:
+        return COLOR.pack(space, *[scale(value, 65535) for value in values] + [0])
+    if space == CMYK:
+        return COLOR.pack(space, *[65535 - scale(value, 65535) for value in values])
+    return COLOR.pack(space, 10000 - scale(values[0], 10000), 0, 0, 0)
+
+def fallback_name(position, mode, values):
+    if mode == 'RGB':
+        return rgb.to_hex(int(round(value * 255)) for value in values)
+    return 'Color %d' % (position + 1)
+
+def read_events(handle, color_type='Process'):
+    """ Generate events for the swatches in `handle`; colors are given `color_type` """
+    head = parser.read_exactly(handle, SECTION.size)
+    if len(head) < SECTION.size:
+        return
+    version, count = SECTION.unpack(head)
+    if version == 1:
+        records = parser.read_exactly(handle, count * COLOR.size)
+        if len(records) != count * COLOR.size:
+            raise ValueError("truncated .aco file")
+        head = parser.read_exactly(handle, SECTION.size)
+        if len(head) < SECTION.size:
+            # no version 2 section, so no names
+            for position in range(count):
+                record = records[position * COLOR.size:(position + 1) * COLOR.size]
+                mode, values = decode(COLOR.unpack(record)[0], record)
+                yield parser.COLOR, {
+                    'name': fallback_name(position, mode, values),
+                    'type': color_type,
+                    'data': {'mode': mode, 'values': values}
+                }
+            return
+        version, count = SECTION.unpack(head)
+    if version != 2:
+        raise ValueError("not an .aco file (version %d)" % version)
+    for position in range(count):
+        record = parser.read_exactly(handle, COLOR.size + NAME_LENGTH.size)
+        if len(record) != COLOR.size + NAME_LENGTH.size:
+            raise ValueError("truncated .aco file")
+        length = NAME_LENGTH.unpack_from(record, COLOR.size)[0]
+        name = parser.read_exactly(handle, 2 * length).decode('utf-16be').rstrip('\0')
+        mode, values = decode(COLOR.unpack_from(record)[0], record[:COLOR.size])
+        yield parser.COLOR, {
+            'name': name,
+            'type': color_type,
+            'data': {'mode': mode, 'values': values}
+        }
+
+def write_events(events, handle):
+    """ Write the colors in `events` as version 1 and version 2 sections
+        
+        Only the packed records (a few dozen bytes a color) are held until the
+        end, as each section starts with its count.
+    """
+    first = bytearray()
+    second = bytearray()
+    count = 0
+    for event, obj in events:
+        if event != parser.COLOR:
+            continue
+        record = encode(obj)
+        title = encode_title(obj['name'])
+        first += record
+        second += record + NAME_LENGTH.pack(len(title) // 2) + title
+        count += 1
+    handle.write(SECTION.pack(1, count))
+    handle.write(first)
+    handle.write(SECTION.pack(2, count))
+    handle.write(second)
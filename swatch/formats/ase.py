@@ -0,0 +1,24 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Adobe Swatch Exchange (``.ase``) files, as events.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+BINARY = True
+
+def read_events(handle):
+    from .. import iterparse
+    return iterparse(handle)
+
+def write_events(events, handle, chunk_count=None):
+    """ Write `events` with a `swatch.Writer` – `handle` must be seekable,
+        unless `chunk_count` is given
+    """
+    from ..writer import Writer
+    with Writer(handle, chunk_count) as out:
+        for event, obj in events:
+            out.write_event(event, obj)
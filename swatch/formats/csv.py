@@ -0,0 +1,76 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Comma-separated values: one color per row.
+
+    group,name,type,mode,value1,value2,value3,value4
+    ,Light Grey,Process,Gray,0.75,,,
+    Accent Colors,,,,,,,
+    Accent Colors,Yellow,Spot,CMYK,0.0,0.0,1.0,0.0
+
+Each group starts with a row of its own, holding only its name (so empty
+groups survive a round trip); its colors follow with the group column set.
+Values are written with ``repr``, so nothing is lost in the conversion.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+import csv
+
+from .. import parser
+
+BINARY = False
+
+FIELDS = ('group', 'name', 'type', 'mode', 'value1', 'value2', 'value3', 'value4')
+
+def read_events(handle, dialect='excel'):
+    rows = csv.reader(handle, dialect)
+    header = next(rows, None)
+    if header is None:
+        return
+    if tuple(field.strip().lower() for field in header[:4]) != FIELDS[:4]:
+        raise ValueError("not a palette CSV file (header: %r)" % header)
+    folder = None
+    for row in rows:
+        if not row:
+            continue
+        row += [''] * (len(FIELDS) - len(row))
+        group, name, color_type, mode = row[:4]
+        if not mode or (folder is not None and group != folder['name']):
+            # a group’s own row, or the first color past the end of a group
+            if folder is not None:
+                yield parser.END_GROUP, folder
+            folder = None
+        if group and folder is None:
+            folder = {'name': group, 'type': 'Color Group'}
+            yield parser.START_GROUP, folder
+        if not mode:
+            continue
+        yield parser.COLOR, {
+            'name': name,
+            'type': color_type or 'Process',
+            'data': {
+                'mode': mode,
+                'values': [float(value) for value in row[4:] if value.strip()]
+            }
+        }
+    if folder is not None:
+        yield parser.END_GROUP, folder
+
+def write_events(events, handle, dialect='excel'):
+    rows = csv.writer(handle, dialect)
+    rows.writerow(FIELDS)
+    group = ''
+    padding = [''] * (len(FIELDS) - 4)
+    for event, obj in events:
+        if event == parser.COLOR:
+            values = [repr(value) for value in obj['data']['values']]
+            rows.writerow([group, obj['name'], obj['type'], obj['data']['mode']] +
+                          values + padding[len(values):])
+        elif event == parser.START_GROUP:
+            group = obj['name']
+            rows.writerow([group, '', '', ''] + padding)
+        elif event == parser.END_GROUP:
+            group = ''
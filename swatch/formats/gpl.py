@@ -0,0 +1,74 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+GIMP palettes (``.gpl``):
+
+    GIMP Palette
+    Name: Solarized
+    Columns: 8
+    #
+      0  43  54	base03
+      7  54  66	base02
+
+GIMP palettes have no groups: colors are written in order, with each group
+bracketed by comment lines (which GIMP ignores) – ``# Color Group: <name>``
+and ``# End Color Group`` – that the reader turns back into a group.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from .. import parser
+from . import rgb
+
+BINARY = False
+
+MAGIC = 'GIMP Palette'
+GROUP_MARKER = '# Color Group:'
+END_MARKER = '# End Color Group'
+
+def read_events(handle, color_type='Process'):
+    """ Generate events for the GIMP palette in `handle`; colors are given `color_type` """
+    first = handle.readline().strip()
+    if first != MAGIC:
+        raise ValueError("not a GIMP palette (starts with %r)" % first[:32])
+    folder = None
+    for number, line in enumerate(handle, 2):
+        line = line.strip()
+        if line.startswith(GROUP_MARKER):
+            if folder is not None:
+                yield parser.END_GROUP, folder
+            folder = {'name': line[len(GROUP_MARKER):].strip(), 'type': 'Color Group'}
+            yield parser.START_GROUP, folder
+            continue
+        if line == END_MARKER:
+            if folder is not None:
+                yield parser.END_GROUP, folder
+            folder = None
+            continue
+        if not line or line.startswith('#') or ':' in line.split(None, 1)[0]:
+            continue  # comments, and the “Name:” and “Columns:” headers
+        fields = line.split(None, 3)
+        try:
+            values = tuple(int(field) for field in fields[:3])
+        except ValueError:
+            raise ValueError("bad color on line %d: %r" % (number, line))
+        name = fields[3] if len(fields) > 3 else rgb.to_hex(values)
+        yield parser.COLOR, rgb.from_bytes(name, values, color_type)
+    if folder is not None:
+        yield parser.END_GROUP, folder
+
+def write_events(events, handle, name='swatch', columns=None):
+    """ Write `events` as a GIMP palette called `name` """
+    handle.write('%s\nName: %s\n' % (MAGIC, name))
+    if columns:
+        handle.write('Columns: %d\n' % columns)
+    handle.write('#\n')
+    for event, obj in events:
+        if event == parser.COLOR:
+            handle.write('%3d %3d %3d\t%s\n' % (rgb.to_bytes(obj) + (obj['name'],)))
+        elif event == parser.START_GROUP:
+            handle.write('%s %s\n' % (GROUP_MARKER, obj['name']))
+        elif event == parser.END_GROUP:
+            handle.write(END_MARKER + '\n')
@@ -0,0 +1,26 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+The list `swatch.parse(…)` returns, as a single JSON document.
+
+Unlike the other formats this one can’t be streamed: the whole document is
+read (or built) before any events are generated (or written). Use NDJSON
+(q.v. ``swatch.formats.ndjson``) for palettes too large for that.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+import json
+
+from .. import parser
+
+BINARY = False
+
+def read_events(handle):
+    return parser.events_for_tree(json.load(handle))
+
+def write_events(events, handle):
+    # ``default=dict`` takes in the read-only mappings of `swatch.cache.MemoryCache`
+    handle.write(json.dumps(parser.tree_for_events(events), ensure_ascii=False, default=dict))
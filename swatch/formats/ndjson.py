@@ -0,0 +1,42 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Newline-delimited JSON (a.k.a. JSON lines): one top-level item per line.
+
+Each line holds a color, or a color group along with all of its colors, in
+the form `swatch.parse(…)` returns them – so only one group at a time is
+ever held in memory.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+import json
+
+from .. import parser
+
+BINARY = False
+
+def read_events(handle):
+    for line in handle:
+        line = line.strip()
+        if not line:
+            continue
+        for event in parser.events_for_tree([json.loads(line)]):
+            yield event
+
+def write_events(events, handle):
+    encode = json.JSONEncoder(ensure_ascii=False, default=dict).encode
+    folder = None
+    for event, obj in events:
+        if event == parser.COLOR:
+            if folder is None:
+                handle.write(encode(obj) + '\n')
+            else:
+                folder['swatches'].append(obj)
+        elif event == parser.START_GROUP:
+            folder = {'name': obj['name'], 'type': 'Color Group', 'swatches': []}
+        elif event == parser.END_GROUP:
+            handle.write(encode(folder) + '\n')
+            folder = None
@@ -0,0 +1,43 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+8-bit sRGB helpers, for the formats that only know RGB.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from .. import colorspace
+
+def to_bytes(color):
+    """ Return the ``(r, g, b)`` bytes of a color ``dict``, converting it to sRGB if need be """
+    data = color['data']
+    values = data['values']
+    if data['mode'] != 'RGB':
+        values = colorspace.convert([values], data['mode'], 'RGB', use_numpy=False)[0]
+    return tuple(min(255, max(0, int(round(value * 255)))) for value in values)
+
+def from_bytes(name, rgb, color_type='Process'):
+    """ Return a color ``dict`` for the 8-bit sRGB triple `rgb` """
+    return {
+        'name': name,
+        'type': color_type,
+        'data': {
+            'mode': 'RGB',
+            'values': [value / 255.0 for value in rgb]
+        }
+    }
+
+def to_hex(rgb):
+    return '#%02x%02x%02x' % tuple(rgb)
+
+def from_hex(text):
+    """ Return the ``(r, g, b)`` bytes for a ``#rrggbb`` (or ``#rgb``) string """
+    text = text.strip().lstrip('#')
+    if len(text) == 3:
+        text = ''.join(digit * 2 for digit in text)
+    if len(text) != 6:
+        raise ValueError("not a hex color: %r" % text)
+    value = int(text, 16)
+    return (value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff
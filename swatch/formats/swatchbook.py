@@ -0,0 +1,149 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+SwatchBook HTML pages – the layout of the libraries in ``swatches/html``:
+
+    <p id="title">DIN 6164</p>
+    <div id="swatchbook">
+    <div class="swatch" style="background-color:#ccc9b6" title="DIN 6164 TSD 1-1-1"></div>
+    …
+    </div>
+
+Groups are ``<div class="group">``s, titled by a ``<p class="group_title">``.
+The page is parsed incrementally, as it is read, with ``html.parser``.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from html import escape
+from html.parser import HTMLParser
+
+from .. import parser
+from . import rgb
+
+BINARY = False
+
+READ_SIZE = 64 * 1024
+
+HEAD = '''<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+<meta content="text/html; charset=UTF-8" http-equiv="content-type" />
+<title>SwatchBook</title>
+<style type="text/css">
+\t.swatch {
+\t\twidth:30px;
+\t\theight:30px;
+\t\tfloat:left;
+\t}
+\t.group {
+\t\tborder: 1px solid silver;
+\t\tclear: both;
+\t}
+\t.group_title {
+\t\tclear: both;
+\t}
+\t.group_descr {
+\t\tclear: both;
+\t}
+\t.clearall {
+\t\tclear: both;
+\t}
+</style>
+</head>
+
+'''
+
+def background_color(style):
+    """ Return the ``(r, g, b)`` bytes of the ``background-color`` in a ``style`` attribute """
+    for declaration in (style or '').split(';'):
+        prop, _, value = declaration.partition(':')
+        if prop.strip().lower() == 'background-color':
+            return rgb.from_hex(value)
+    raise ValueError("swatch without a background-color: %r" % style)
+
+class SwatchBookParser(HTMLParser):
+    """ Collects the events for the swatches and groups of a SwatchBook page """
+    
+    def __init__(self, color_type='Process'):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.color_type = color_type
+        self.events = []
+        self.divs = []
+        self.folder = None
+        self.started = False
+        self.title = None
+    
+    def start_group(self):
+        if not self.started:
+            self.events.append((parser.START_GROUP, self.folder))
+            self.started = True
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if tag == 'div':
+            self.divs.append(classes)
+            if 'swatch' in classes:
+                if self.folder is not None:
+                    self.start_group()
+                color = rgb.from_bytes(attrs.get('title') or '', background_color(attrs.get('style')),
+                                       self.color_type)
+                self.events.append((parser.COLOR, color))
+            elif 'group' in classes:
+                self.folder = {'name': '', 'type': 'Color Group'}
+                self.started = False
+        elif tag == 'p' and 'group_title' in classes and self.folder is not None:
+            self.title = []
+    
+    def handle_data(self, data):
+        if self.title is not None:
+            self.title.append(data)
+    
+    def handle_endtag(self, tag):
+        if tag == 'p' and self.title is not None:
+            self.folder['name'] = ''.join(self.title).strip()
+            self.title = None
+            self.start_group()
+        elif tag == 'div' and self.divs:
+            if 'group' in self.divs.pop() and self.folder is not None:
+                self.start_group()
+                self.events.append((parser.END_GROUP, self.folder))
+                self.folder = None
+    
+    def drain(self):
+        events, self.events = self.events, []
+        return events
+
+def read_events(handle, color_type='Process', read_size=READ_SIZE):
+    """ Generate events for the SwatchBook page in `handle`; colors are given `color_type` """
+    state = SwatchBookParser(color_type)
+    while True:
+        data = handle.read(read_size)
+        if not data:
+            break
+        state.feed(data)
+        for event in state.drain():
+            yield event
+    state.close()
+    for event in state.drain():
+        yield event
+
+def write_events(events, handle, title='', description=None):
+    """ Write `events` as a SwatchBook page, titled `title` """
+    handle.write(HEAD)
+    handle.write('<body>\n<p id="title">%s</p>\n' % escape(title, False))
+    if description:
+        handle.write('<p id="description">%s</p>\n' % escape(description, False))
+    handle.write('<div id="swatchbook">\n')
+    for event, obj in events:
+        if event == parser.COLOR:
+            handle.write('<div class="swatch" style="background-color:%s" title="%s"></div>\n' % (
+                         rgb.to_hex(rgb.to_bytes(obj)), escape(obj['name'])))
+        elif event == parser.START_GROUP:
+            handle.write('<div class="group">\n<p class="group_title">%s</p>\n' % escape(obj['name'], False))
+        elif event == parser.END_GROUP:
+            handle.write('<div class="clearall"></div>\n</div>\n')
+    handle.write('</div>\n</body>\n</html>')
@@ -0,0 +1,241 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Nearest-color search over loaded palettes.
+
+``NearestColorIndex`` converts every swatch it is given to CIELAB and keeps
+them in a k-d tree, so “which swatch is closest to this color?” is answered
+in logarithmic time rather than by scanning every swatch:
+
+    >>> from swatch.index import NearestColorIndex
+    >>> index = NearestColorIndex.from_files(glob.glob("swatches/ase/RAL*.ase"))
+    >>> index.nearest((0.8, 0.1, 0.1), k=3, mode='RGB')
+    [Match(distance=…, name='RAL 3020', source='swatches/ase/RAL CLASSIC.ase', id=…), …]
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from array import array
+from collections import namedtuple
+import heapq
+
+from . import colorspace
+
+Match = namedtuple('Match', ('distance', 'name', 'source', 'id'))
+
+METRICS = ('76', '2000')
+
+class KDTree(object):
+    """ A static, implicit k-d tree over a list of 3-tuples
+        
+        The tree is stored as a single permutation of the point indices: the
+        node for the range ``order[lo:hi]`` is its midpoint, split along the
+        axis recorded in ``axes[mid]``, with its children in the two halves.
+    """
+    
+    def __init__(self, points):
+        self.points = points
+        self.order = list(range(len(points)))
+        self.axes = array('b', bytes(len(points)))
+        self._build(0, len(points))
+    
+    def _build(self, lo, hi):
+        stack = [(lo, hi)]
+        points, order = self.points, self.order
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= 1:
+                continue
+            span = order[lo:hi]
+            # split along the axis with the widest spread
+            axis = max(range(3), key=lambda a: (max(points[i][a] for i in span) -
+                                                min(points[i][a] for i in span)))
+            span.sort(key=lambda i: points[i][axis])
+            order[lo:hi] = span
+            mid = (lo + hi) >> 1
+            self.axes[mid] = axis
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+    
+    def nearest(self, query, k=1):
+        """ Return up to `k` ``(squared distance, point index)`` pairs, nearest first """
+        if k < 1:
+            raise ValueError("k must be at least 1, not %r" % k)
+        points, order, axes = self.points, self.order, self.axes
+        q0, q1, q2 = query
+        heap = []
+        stack = [(0, len(order), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if lo >= hi or (len(heap) == k and bound >= -heap[0][0]):
+                continue
+            mid = (lo + hi) >> 1
+            index = order[mid]
+            point = points[index]
+            distance = (q0 - point[0]) ** 2 + (q1 - point[1]) ** 2 + (q2 - point[2]) ** 2
+            if len(heap) < k:
+                heapq.heappush(heap, (-distance, index))
+            elif distance < -heap[0][0]:
+                heapq.heapreplace(heap, (-distance, index))
+            axis = axes[mid]
+            diff = query[axis] - point[axis]
+            if diff < 0:
+                stack.append((mid + 1, hi, max(bound, diff * diff)))
+                stack.append((lo, mid, bound))
+            else:
+                stack.append((lo, mid, max(bound, diff * diff)))
+                stack.append((mid + 1, hi, bound))
+        return sorted((-negative, index) for negative, index in heap)
+    
+    def within(self, query, radius):
+        """ Return ``(squared distance, point index)`` pairs for every point within `radius` """
+        points, order, axes = self.points, self.order, self.axes
+        q0, q1, q2 = query
+        limit = radius * radius
+        found = []
+        stack = [(0, len(order))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) >> 1
+            index = order[mid]
+            point = points[index]
+            distance = (q0 - point[0]) ** 2 + (q1 - point[1]) ** 2 + (q2 - point[2]) ** 2
+            if distance <= limit:
+                found.append((distance, index))
+            diff = query[axes[mid]] - point[axes[mid]]
+            if diff < 0 or diff * diff <= limit:
+                stack.append((lo, mid))
+            if diff >= 0 or diff * diff <= limit:
+                stack.append((mid + 1, hi))
+        return sorted(found)
+
+class NearestColorIndex(object):
+    """ A nearest-color search index over the swatches of any number of palettes
+        
+        Swatches are added with ``add(…)`` and indexed in CIELAB; the tree is
+        (re)built lazily by the first query after an addition. Query colors are
+        given in any of the spaces known to `swatch.colorspace` (sRGB by default).
+        
+        Distances are ΔE76 (``metric='76'``, exact) or CIEDE2000
+        (``metric='2000'``). As ΔE2000 isn’t a euclidean metric, those queries
+        re-rank a ΔE76 candidate set – `candidates` wide for k-NN queries, or
+        `slack` times the radius for radius queries – which is exact in all but
+        pathological cases.
+    """
+    
+    def __init__(self, candidates=32, slack=2.0):
+        self.candidates = candidates
+        self.slack = slack
+        self.labs = []
+        self.names = []
+        self.sources = []
+        self.palettes = []
+        self.positions = array('I')
+        self.palette_ids = array('I')
+        self._tree = None
+        self._matrix = None
+    
+    def __len__(self):
+        return len(self.labs)
+    
+    def add(self, palette, source=None):
+        """ Index every swatch in `palette`
+            
+            `palette` may be a `swatch.Palette`, a list as returned by
+            `swatch.parse(…)` or the name of an ``.ase`` file; `source` labels
+            its matches (and defaults to the file name, if there is one).
+        """
+        from .palette import Palette
+        if isinstance(palette, str):
+            source = palette if source is None else source
+            palette = Palette.from_file(palette)
+        elif not isinstance(palette, Palette):
+            palette = Palette.from_objects(palette)
+        palette_id = len(self.palettes)
+        self.palettes.append(palette)
+        for position, lab in enumerate(colorspace.convert_palette(palette, 'CIELAB')):
+            self.labs.append(tuple(float(value) for value in lab))
+            self.names.append(palette.name(position))
+            self.sources.append(source)
+            self.positions.append(position)
+            self.palette_ids.append(palette_id)
+        self._tree = self._matrix = None
+        return self
+    
+    @classmethod
+    def from_files(cls, filenames, **kwargs):
+        index = cls(**kwargs)
+        for filename in filenames:
+            index.add(filename)
+        return index
+    
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = KDTree(self.labs)
+        return self._tree
+    
+    def color(self, id):
+        """ Return the legacy color ``dict`` for the indexed swatch `id` """
+        return self.palettes[self.palette_ids[id]].color_dict(self.positions[id])
+    
+    def to_lab(self, color, mode):
+        if mode == 'CIELAB':
+            return tuple(color)
+        return colorspace.convert([color], mode, 'CIELAB', use_numpy=False)[0]
+    
+    def _match(self, distance, id):
+        return Match(distance, self.names[id], self.sources[id], id)
+    
+    def nearest(self, color, k=1, mode='RGB', metric='76'):
+        """ Return the `k` indexed swatches nearest to `color`, as ``Match``es """
+        if k < 1:
+            raise ValueError("k must be at least 1, not %r" % k)
+        lab = self.to_lab(color, mode)
+        if metric == '76':
+            return [self._match(distance ** 0.5, id) for distance, id in self.tree.nearest(lab, k)]
+        if metric != '2000':
+            raise ValueError("unknown metric: %r (expected one of %s)" % (metric, METRICS))
+        found = self.tree.nearest(lab, max(k, self.candidates))
+        ranked = sorted((colorspace.delta_e2000(lab, self.labs[id]), id) for _, id in found)
+        return [self._match(distance, id) for distance, id in ranked[:k]]
+    
+    def within(self, color, radius, mode='RGB', metric='76'):
+        """ Return every indexed swatch within `radius` of `color`, nearest first """
+        lab = self.to_lab(color, mode)
+        if metric == '76':
+            return [self._match(distance ** 0.5, id) for distance, id in self.tree.within(lab, radius)]
+        if metric != '2000':
+            raise ValueError("unknown metric: %r (expected one of %s)" % (metric, METRICS))
+        found = self.tree.within(lab, radius * self.slack)
+        ranked = sorted((colorspace.delta_e2000(lab, self.labs[id]), id) for _, id in found)
+        return [self._match(distance, id) for distance, id in ranked if distance <= radius]
+    
+    def nearest_ids(self, colors, mode='RGB', metric='76', chunksize=None):
+        """ Return the id of the nearest swatch for every color in `colors`, at once
+            
+            With NumPy this is vectorized: `colors` (an ``(…, width)`` array,
+            e.g. a whole image) is converted to CIELAB in one go, repeated colors
+            are collapsed, and distances are computed a block of queries at a
+            time against every swatch, as by `swatch.quantize.nearest_ids` –
+            blocks are sized to a fixed memory budget, however many swatches
+            there are, and are at most `chunksize` queries long. The result has
+            the shape of `colors`, minus its last axis. Without NumPy, it is a
+            list of ids.
+        """
+        np = colorspace.numpy_or_none()
+        if np is None:
+            return [self.nearest(color, 1, mode, metric)[0].id for color in colors]
+        from .quantize import nearest_ids
+        colors = np.asarray(colors, dtype=np.float64)
+        shape = colors.shape[:-1]
+        labs = colorspace.convert(colors.reshape(-1, colors.shape[-1]), mode, 'CIELAB')
+        unique, inverse = np.unique(labs, axis=0, return_inverse=True)
+        if self._matrix is None:
+            self._matrix = np.asarray(self.labs, dtype=np.float64).reshape(-1, 3)
+        ids = nearest_ids(unique, self._matrix, metric, chunksize)
+        return ids[inverse.reshape(-1)].reshape(shape)
@@ -0,0 +1,172 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Instrumentation: where the time goes when parsing and writing swatches.
+
+Within ``collect()``, every parse and write made in the current context (the
+current thread, or ``asyncio`` task) reports to a `Collector` – chunk counts
+by type, bytes read and written, time spent decoding names, unpacking floats
+and building dicts (or `swatch.Color`s), and totals for each file:
+
+    >>> with swatch.instrument.collect() as stats:
+    ...     for filename in glob.glob("swatches/ase/*.ase"):
+    ...         swatch.parse(filename)
+    >>> stats.chunks
+    Counter({'color': 28162})
+    >>> stats.timings, stats.files["swatches/ase/RAL CLASSIC.ase"]
+
+Outside of ``collect()`` this costs one ``ContextVar.get()`` per call to the
+parser or writer (and per ``IncrementalParser`` or `swatch.Writer`), and
+nothing at all per chunk: the profiled parse walks the chunks with the same
+loop as ever, passing in its own timed decoder only when a collector is active.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+
+from . import parser
+from .objects import Color, Group
+from .parser import COLLECTOR
+
+def active():
+    """ Return the `Collector` for the current context, or ``None`` """
+    return COLLECTOR.get()
+
+@contextmanager
+def collect(callback=None):
+    """ Collect statistics for everything parsed or written within the ``with`` block
+        
+        Yields the `Collector`; `callback`, if given, is called as each file
+        finishes, with the file name and its totals.
+    """
+    collector = Collector(callback)
+    token = COLLECTOR.set(collector)
+    try:
+        yield collector
+    finally:
+        COLLECTOR.reset(token)
+
+class Collector(object):
+    """ Statistics for the parses and writes made while it is active
+        
+        • ``chunks``: a ``Counter`` of chunks read, by type (``'color'``,
+          ``'folder'``, ``'folder-end'`` and ``'unknown'``), and ``written``,
+          of chunks written
+        • ``bytes_read`` and ``bytes_written``
+        • ``timings``: a ``Counter`` of seconds spent in each phase – decoding
+          ``'names'``, unpacking ``'values'`` and building ``'objects'`` when
+          parsing; ``'sizing'`` and ``'packing'`` when encoding with
+          `swatch.dumps(…)`
+        • ``files``: the ``totals()`` for each file parsed or written, by name
+    """
+    
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.chunks = Counter()
+        self.written = Counter()
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.timings = Counter()
+        self.files = {}
+    
+    def totals(self):
+        """ Return the overall totals, as a ``dict`` """
+        return {
+            'chunks_read': sum(self.chunks.values()),
+            'chunks_written': sum(self.written.values()),
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written
+        }
+    
+    @contextmanager
+    def file(self, filename):
+        """ Attribute whatever is read or written within the ``with`` block to `filename` """
+        before = self.totals()
+        start = perf_counter()
+        try:
+            yield self
+        finally:
+            totals = dict((key, value - before[key]) for key, value in self.totals().items())
+            totals['seconds'] = perf_counter() - start
+            previous = self.files.get(filename)
+            if previous is not None:
+                totals = dict((key, value + previous[key]) for key, value in totals.items())
+            self.files[filename] = totals
+            if self.callback is not None:
+                self.callback(filename, totals)
+    
+    def read(self, chunk_type, size):
+        """ Count a chunk of `chunk_type` read, `size` bytes long in all """
+        self.chunks[parser.CHUNK_NAMES.get(chunk_type, 'unknown')] += 1
+        self.bytes_read += size
+    
+    def wrote(self, chunk_type, size):
+        """ Count a chunk of `chunk_type` written, `size` bytes long in all """
+        self.written[parser.CHUNK_NAMES.get(chunk_type, 'unknown')] += 1
+        self.bytes_written += size
+    
+    def decode(self, buf, start, end):
+        """ Time ``parser.color_dict_for_buffer(buf, start, end)`` for a color chunk """
+        return decode_color(self, buf, start, end, False)
+
+def file(filename):
+    """ Attribute what is read or written within the ``with`` block to
+        `filename`, if a collector is active – and otherwise, do nothing
+    """
+    collector = COLLECTOR.get()
+    if collector is None:
+        return _nothing()
+    return collector.file(filename)
+
+@contextmanager
+def _nothing():
+    yield None
+
+def decode_color(collector, buf, start, end, objects):
+    """ Decode the color chunk body in ``buf[start:end]``, as ``parser.color_dict_for_buffer``
+        (or `swatch.Color.from_buffer`, with `objects`) would, timing each phase
+    """
+    timings = collector.timings
+    began = perf_counter()
+    
+    title, title_end = parser.title_for_buffer(buf, start)
+    named = perf_counter()
+    
+    color_mode, values, color_type = parser.color_for_buffer(buf, title_end, end)
+    unpacked = perf_counter()
+    
+    if objects:
+        output = Color(title, color_mode, values, color_type)
+    else:
+        output = {
+            'name': title,
+            'type': color_type,
+            'data': {
+                'mode': color_mode,
+                'values': values
+            }
+        }
+    built = perf_counter()
+    
+    timings['names'] += named - began
+    timings['values'] += unpacked - named
+    timings['objects'] += built - unpacked
+    return output
+
+def parse_buffer(collector, buf, offset=0, objects=False):
+    """ ``parser.parse_buffer`` (or, with `objects`, ``parser.objects_for_buffer``),
+        reporting to `collector` as it goes
+    """
+    def decode(view, start, end):
+        return decode_color(collector, view, start, end, objects)
+    
+    group = Group.for_buffer if objects else parser.folder_for_buffer
+    with memoryview(buf) as view:
+        view = view.cast('B') if view.format != 'B' else view
+        collector.bytes_read += offset
+        return parser.tree_for_buffer(view, offset, decode, group, tally=collector.read)
@@ -0,0 +1,379 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Swatch libraries: many palettes, packed into one memory-mappable file.
+
+``build(…)`` reads any number of ``.ase`` files once and packs them all
+together – the values of every swatch in one float32 column per color mode,
+every swatch, group and palette name in a single sorted string table, and
+the tables that index swatches by palette, by group and by name. ``open(…)``
+maps that file and reads nothing but its header, whatever its size; swatches
+and names are decoded as they are looked up:
+
+    >>> swatch.library.build(glob.glob("swatches/ase/*.ase"), "vendors.swlib")
+    >>> with swatch.library.open("vendors.swlib") as lib:
+    ...     lib.find('RAL 300 20 05')
+    ...     lib.search('PANTONE® 185')
+    ...     lib.export('RAL CLASSIC', "RAL CLASSIC.ase")
+    [Hit(palette='RAL DESIGN 1993', group=None, color={'name': 'RAL 300 20 05', …}), …]
+
+Like `swatch.Palette.pack()`, the columns are stored in native byte order,
+so a library is only meant to be read on the same kind of machine it was
+built on.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from array import array
+from collections import namedtuple
+import io
+import mmap
+import os
+import struct
+
+from . import parser
+from .palette import MODES, MODE_WIDTHS, Palette, pack_columns, unpack_columns
+from .writer import replacing
+
+LIBRARY_SUFFIX = '.swlib'
+LIBRARY_MAGIC = b'SWLB'
+LIBRARY_VERSION = 1
+
+# The file is a header – the length of every column, then of the string blob
+# – followed by each column’s raw bytes in ``COLUMNS`` order, every one padded
+# to an 8-byte boundary, and the UTF-8 string blob itself:
+#
+# • per swatch: ``name_ids``, ``types``, ``modes``, ``rows`` (within the value
+#   column of its mode) and ``groups`` (or -1)
+# • per group: ``group_name_ids`` and ``group_starts`` (its first swatch)
+# • per palette: ``palette_name_ids``, ``palette_starts`` (its first swatch)
+#   and ``palette_groups`` (its first group)
+# • per sorted name: ``name_offsets`` into the blob (plus one, for the end),
+#   and ``name_starts`` into ``by_name`` (ditto) – the swatches of each name,
+#   in order
+# • one value column of float32 per color mode
+COLUMNS = (('name_ids', 'I'), ('types', 'B'), ('modes', 'B'), ('rows', 'I'), ('groups', 'i'),
+           ('group_name_ids', 'I'), ('group_starts', 'I'),
+           ('palette_name_ids', 'I'), ('palette_starts', 'I'), ('palette_groups', 'I'),
+           ('name_offsets', 'I'), ('name_starts', 'I'), ('by_name', 'I')) + tuple(
+           (mode, 'f') for mode in MODES)
+LIBRARY_HEADER = struct.Struct('<4sBc2x' + 'I' * (len(COLUMNS) + 1))
+
+Hit = namedtuple('Hit', ('palette', 'group', 'color'))
+
+def _encoded(name):
+    return name.encode('utf-8')
+
+def as_palette(source):
+    """ Return `source` – a filename, a list or a `swatch.Palette` – as a `swatch.Palette` """
+    if isinstance(source, Palette):
+        return source
+    if isinstance(source, str):
+        return Palette.from_file(source)
+    return Palette.from_objects(source)
+
+def pack(palettes):
+    """ Pack `palettes` – ``(name, palette)`` pairs – into the library format, as ``bytes``
+        
+        Each palette is a `swatch.Palette`, a list as returned by
+        `swatch.parse(…)` or the name of an ``.ase`` file.
+    """
+    palettes = [(label, as_palette(palette)) for label, palette in palettes]
+    labels = set()
+    names = set()
+    for label, palette in palettes:
+        if label in labels:
+            raise ValueError("duplicate palette name: %r" % label)
+        labels.add(label)
+        names.update(palette.names)
+    names = sorted(names | labels, key=_encoded)
+    ids = dict((name, index) for index, name in enumerate(names))
+    
+    columns = dict((name, array(typecode)) for name, typecode in COLUMNS)
+    name_ids, groups, rows = columns['name_ids'], columns['groups'], columns['rows']
+    for label, palette in palettes:
+        swatch_base = len(name_ids)
+        group_base = len(columns['group_starts'])
+        columns['palette_name_ids'].append(ids[label])
+        columns['palette_starts'].append(swatch_base)
+        columns['palette_groups'].append(group_base)
+        global_ids = [ids[name] for name in palette.names]
+        name_ids.extend(global_ids[name_id] for name_id in palette.name_ids)
+        columns['types'].extend(palette.types)
+        columns['modes'].extend(palette.modes)
+        row_bases = [len(columns[mode]) // MODE_WIDTHS[mode] for mode in MODES]
+        rows.extend(row + row_bases[mode] for mode, row in zip(palette.modes, palette.rows))
+        groups.extend(group + group_base if group >= 0 else -1 for group in palette.groups)
+        columns['group_name_ids'].extend(global_ids[name_id] for name_id in palette.group_name_ids)
+        columns['group_starts'].extend(start + swatch_base for start in palette.group_starts)
+        for mode in MODES:
+            columns[mode].extend(palette.values[mode])
+    
+    # the swatches of every name, in order: a counting sort by name id
+    counts = [0] * (len(names) + 1)
+    for name_id in name_ids:
+        counts[name_id + 1] += 1
+    for index in range(len(names)):
+        counts[index + 1] += counts[index]
+    columns['name_starts'].extend(counts)
+    by_name = array('I', bytes(4 * len(name_ids)))
+    for position, name_id in enumerate(name_ids):
+        by_name[counts[name_id]] = position
+        counts[name_id] += 1
+    columns['by_name'] = by_name
+    
+    encoded = [_encoded(name) for name in names]
+    offsets = columns['name_offsets']
+    offsets.append(0)
+    for raw in encoded:
+        offsets.append(offsets[-1] + len(raw))
+    blob = b''.join(encoded)
+    
+    return pack_columns(LIBRARY_HEADER, LIBRARY_MAGIC, LIBRARY_VERSION,
+                        [columns[name] for name, typecode in COLUMNS], blob)
+
+def build(sources, destination):
+    """ Pack the ``.ase`` files in `sources` into a library at `destination`
+        
+        `sources` is a list of filenames – each palette is named for its file,
+        sans extension – or a ``dict`` of names to filenames, lists (as
+        returned by `swatch.parse(…)`) or `swatch.Palette`s. The library is
+        written atomically; the number of swatches packed is returned.
+    """
+    if isinstance(sources, dict):
+        items = sources.items()
+    else:
+        items = [(os.path.splitext(os.path.basename(source))[0], source) for source in sources]
+    palettes = [(label, as_palette(source)) for label, source in items]
+    data = pack(palettes)
+    with replacing(destination) as handle:
+        handle.write(data)
+    return sum(len(palette) for label, palette in palettes)
+
+class Library(object):
+    """ A packed library of palettes, mapped into memory
+        
+        Swatches are numbered across the whole library, palette after palette.
+        ``palettes()`` lists the palettes, ``palette(…)`` decodes one (and
+        ``group(…)`` one of its groups) and ``export(…)`` writes one back out
+        as an ``.ase`` file; ``find(…)`` and ``search(…)`` look swatches up
+        by name across every palette at once.
+        Colors come back as ``dict``s, like those of ``swatch.parse(…)``.
+        
+        Opening costs the same for any size of library: the columns are
+        ``memoryview``s straight over the mapped file. Close the library (or
+        use it as a context manager) to release the mapping.
+    """
+    
+    def __init__(self, buf):
+        self.data = buf
+        self.view = memoryview(buf)
+        columns, self.blob = unpack_columns(self.view, LIBRARY_HEADER, LIBRARY_MAGIC,
+                                            LIBRARY_VERSION,
+                                            [typecode for name, typecode in COLUMNS],
+                                            "swatch library")
+        for (name, typecode), column in zip(COLUMNS, columns):
+            setattr(self, name, column)
+        self.views = [self.view] + columns + [self.blob]
+        self.values = dict((mode, getattr(self, mode)) for mode in MODES)
+        self._palette_ids = None
+    
+    @classmethod
+    def from_file(cls, filename):
+        with io.open(filename, 'rb') as handle:
+            try:
+                data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                data = handle.read()
+        return cls(data)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """ Release the memory-mapped file """
+        for view in self.views:
+            view.release()
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+    
+    def __len__(self):
+        return len(self.name_ids)
+    
+    def __contains__(self, palette):
+        return self.palette_index(palette) is not None
+    
+    def name(self, name_id):
+        """ Decode the name `name_id` from the string table """
+        return str(self.blob[self.name_offsets[name_id]:self.name_offsets[name_id + 1]], 'utf-8')
+    
+    def name_id(self, name):
+        """ Return the id of `name` in the string table, or ``None`` """
+        raw = _encoded(name)
+        lo = self.lower_bound(raw)
+        if lo < len(self.name_offsets) - 1 and self.raw_name(lo) == raw:
+            return lo
+        return None
+    
+    def raw_name(self, name_id):
+        return bytes(self.blob[self.name_offsets[name_id]:self.name_offsets[name_id + 1]])
+    
+    def lower_bound(self, raw):
+        """ Return the id of the first name that sorts at or after the UTF-8 bytes `raw` """
+        lo, hi = 0, len(self.name_offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if self.raw_name(mid) < raw:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def palettes(self):
+        """ Return the name of every palette, in the order they were packed """
+        return [self.name(name_id) for name_id in self.palette_name_ids]
+    
+    def palette_index(self, name):
+        """ Return the number of the palette `name`, or ``None`` """
+        if self._palette_ids is None:
+            self._palette_ids = dict((name_id, index)
+                                     for index, name_id in enumerate(self.palette_name_ids))
+        name_id = self.name_id(name)
+        return None if name_id is None else self._palette_ids.get(name_id)
+    
+    def palette_range(self, index):
+        """ Return the ``range`` of swatches, and the ``range`` of groups, of palette `index` """
+        last = index + 1 == len(self.palette_starts)
+        swatches = range(self.palette_starts[index],
+                         len(self) if last else self.palette_starts[index + 1])
+        groups = range(self.palette_groups[index],
+                       len(self.group_starts) if last else self.palette_groups[index + 1])
+        return swatches, groups
+    
+    def palette_of(self, position):
+        """ Return the number of the palette holding swatch `position` """
+        lo, hi = 0, len(self.palette_starts)
+        while hi - lo > 1:
+            mid = (lo + hi) >> 1
+            if self.palette_starts[mid] <= position:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+    
+    def color(self, position):
+        """ Decode swatch `position` as a ``dict``, like those ``swatch.parse(…)`` returns """
+        mode = MODES[self.modes[position]]
+        width = MODE_WIDTHS[mode]
+        start = self.rows[position] * width
+        return {
+            'name': self.name(self.name_ids[position]),
+            'type': parser.COLOR_TYPES[self.types[position]],
+            'data': {
+                'mode': mode,
+                'values': self.values[mode][start:start + width].tolist()
+            }
+        }
+    
+    def palette(self, name):
+        """ Decode the palette `name` as a list of colors and color groups
+            
+            The list is the one ``swatch.parse(…)`` returned for the source
+            file it was packed from.
+        """
+        index = self.palette_index(name)
+        if index is None:
+            raise KeyError(name)
+        swatches, groups = self.palette_range(index)
+        output = []
+        position = swatches.start
+        for group in groups:
+            while position < self.group_starts[group]:
+                output.append(self.color(position))
+                position += 1
+            folder = self.folder(group)
+            position += len(folder['swatches'])
+            output.append(folder)
+        output.extend(self.color(position) for position in range(position, swatches.stop))
+        return output
+    
+    def group_names(self, palette):
+        """ Return the names of the groups in the palette `palette` """
+        index = self.palette_index(palette)
+        if index is None:
+            raise KeyError(palette)
+        return [self.name(self.group_name_ids[group]) for group in self.palette_range(index)[1]]
+    
+    def group(self, palette, name):
+        """ Decode the group `name` of the palette `palette` as a ``dict`` """
+        index = self.palette_index(palette)
+        if index is None:
+            raise KeyError(palette)
+        name_id = self.name_id(name)
+        for group in self.palette_range(index)[1]:
+            if self.group_name_ids[group] == name_id:
+                return self.folder(group)
+        raise KeyError(name)
+    
+    def folder(self, group):
+        """ Decode group number `group` as a ``dict`` """
+        position = self.group_starts[group]
+        colors = []
+        while position < len(self) and self.groups[position] == group:
+            colors.append(self.color(position))
+            position += 1
+        return {'name': self.name(self.group_name_ids[group]), 'type': 'Color Group',
+                'swatches': colors}
+    
+    def hit(self, position):
+        group = self.groups[position]
+        return Hit(self.name(self.palette_name_ids[self.palette_of(position)]),
+                   None if group < 0 else self.name(self.group_name_ids[group]),
+                   self.color(position))
+    
+    def positions(self, name_id):
+        """ Return the swatches named by `name_id`, in order """
+        return self.by_name[self.name_starts[name_id]:self.name_starts[name_id + 1]].tolist()
+    
+    def find(self, name):
+        """ Return a ``Hit`` – palette, group and color – for every swatch named `name` """
+        name_id = self.name_id(name)
+        if name_id is None:
+            return []
+        return [self.hit(position) for position in self.positions(name_id)]
+    
+    def search(self, prefix, limit=None):
+        """ Return a ``Hit`` for every swatch whose name starts with `prefix`, by name """
+        raw = _encoded(prefix)
+        hits = []
+        name_id = self.lower_bound(raw)
+        while name_id < len(self.name_offsets) - 1 and self.raw_name(name_id).startswith(raw):
+            for position in self.positions(name_id):
+                if limit is not None and len(hits) >= limit:
+                    return hits
+                hits.append(self.hit(position))
+            name_id += 1
+        return hits
+    
+    def export(self, name, destination):
+        """ Write the palette `name` out as a standard ``.ase`` file, with `swatch.write` """
+        from . import write
+        write(self.palette(name), destination)
+    
+    def array(self, mode):
+        """ Return the values of every swatch of `mode`, across the library, as a NumPy array
+            
+            The array shares memory with the mapped file. Requires NumPy.
+        """
+        import numpy
+        return numpy.frombuffer(self.values[mode], dtype=numpy.float32).reshape(
+            -1, MODE_WIDTHS[mode])
+
+def open(filename):
+    """ Map the library `filename`, returning a ``Library`` """
+    return Library.from_file(filename)
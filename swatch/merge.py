@@ -0,0 +1,209 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Merging palettes, and dropping duplicate swatches along the way.
+
+Every swatch added to a ``Merger`` is reduced to a hashable key – its exact
+values, its values quantized to a number of steps, or its name – and looked
+up in a ``dict``, so merging is linear in the number of swatches rather than
+quadratic:
+
+    >>> merger = swatch.merge.Merger(key='quantized', names='rename')
+    >>> for filename in glob.glob("swatches/ase/NCS*.ase"):
+    ...     merger.add(filename)
+    >>> merger.write("NCS.ase")
+
+Sources may be in any of the formats of `swatch.formats`, or lists as
+returned by `swatch.parse(…)`, or streams of ``(event, object)`` pairs.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from collections import Counter
+from operator import itemgetter, mul
+import os
+
+from . import parser
+
+KEYS = ('values', 'quantized', 'name')
+NAME_POLICIES = ('keep', 'rename', 'first', 'last', 'error')
+GROUP_POLICIES = ('merge', 'flatten', 'source')
+
+# the span of each value, by mode, so quantizing treats every axis alike –
+# LAB’s a and b run from -128 to 127, while everything else is in [0, 1]
+SPANS = { 'RGB'  : (1.0, 1.0, 1.0),
+          'Gray' : (1.0,),
+          'CMYK' : (1.0, 1.0, 1.0, 1.0),
+          'LAB'  : (1.0, 255.0, 255.0) }
+
+class Merger(object):
+    """ Merges colors and color groups from any number of sources
+        
+        `key` decides when two colors are duplicates (only the first one
+        added is kept):
+        
+        • ``'values'``: the same mode and exactly the same values
+        • ``'quantized'``: the same mode and the same values once each is
+          rounded to one of `steps` steps across its span (255, by default,
+          i.e. 8-bit color)
+        • ``'name'``: the same name
+        
+        `names` decides what happens when two colors that aren’t duplicates
+        share a name: ``'keep'`` both, ``'rename'`` the later one (with a
+        “ (2)”, “ (3)”… suffix), keep the ``'first'`` one only, replace it with
+        the ``'last'`` one, or raise a ``ValueError`` (``'error'``).
+        
+        `groups` decides the shape of the output: ``'merge'`` groups of the
+        same name into one, ``'flatten'`` every color out of its group, or
+        nest each ``'source'`` in a group of its own, named for it.
+    """
+    
+    def __init__(self, key='values', names='rename', groups='merge', steps=255):
+        if key not in KEYS:
+            raise ValueError("unknown key: %r (expected one of %s)" % (key, KEYS))
+        if names not in NAME_POLICIES:
+            raise ValueError("unknown name policy: %r (expected one of %s)" % (names, NAME_POLICIES))
+        if groups not in GROUP_POLICIES:
+            raise ValueError("unknown group policy: %r (expected one of %s)" % (groups, GROUP_POLICIES))
+        self.key = key
+        self.names = names
+        self.groups = groups
+        self.steps = steps
+        self.tree = []
+        self.folders = {}
+        self.seen = {}
+        self.named = {}
+        self.stats = Counter()
+    
+    def __len__(self):
+        return self.stats['kept'] - self.stats['replaced']
+    
+    def key_for(self, color):
+        """ Return the hashable key that identifies duplicates of `color` """
+        return self.key_function()(color)
+    
+    def key_function(self):
+        """ Return a function computing ``key_for(…)``, specialized for the key in use """
+        if self.key == 'name':
+            return itemgetter('name')
+        if self.key == 'values':
+            def key_for(color):
+                data = color['data']
+                return (data['mode'], tuple(data['values']))
+            return key_for
+        # the values are scaled so each step is one unit, then rounded
+        scales = dict((mode, tuple(self.steps / span for span in spans))
+                      for mode, spans in SPANS.items())
+        def key_for(color):
+            data = color['data']
+            mode = data['mode']
+            return (mode, tuple(map(round, map(mul, data['values'], scales[mode]))))
+        return key_for
+    
+    def folder(self, name):
+        """ Return the swatch list of the output group `name`, creating it if need be """
+        folder = self.folders.get(name)
+        if folder is None:
+            folder = self.folders[name] = {'name': name, 'type': 'Color Group', 'swatches': []}
+            self.tree.append(folder)
+        return folder['swatches']
+    
+    def add(self, source, label=None):
+        """ Merge in the colors and groups of `source`
+            
+            `source` is a filename (in any format of `swatch.formats`), a list
+            as returned by `swatch.parse(…)`, or an iterable of ``(event,
+            object)`` pairs; `label` names it for ``groups='source'``, and
+            defaults to the file name, sans extension.
+        """
+        if isinstance(source, str):
+            from . import formats
+            if label is None:
+                label = os.path.splitext(os.path.basename(source))[0]
+            events = formats.iterparse(source)
+        elif isinstance(source, list):
+            events = parser.events_for_tree(source)
+        else:
+            events = source
+        if self.groups == 'source':
+            target = self.folder(label or 'Untitled')
+        else:
+            target = self.tree
+        self.add_events(events, target)
+        return self
+    
+    def add_events(self, events, target):
+        seen, named = self.seen, self.named
+        key_for = self.key_function()
+        policy = self.names
+        # with names as keys, a name collision is a duplicate
+        collide = self.key != 'name' and policy != 'keep'
+        regroup = self.groups == 'merge'
+        read = duplicates = kept = 0
+        container = target
+        for event, obj in events:
+            if event != parser.COLOR:
+                if event == parser.START_GROUP:
+                    if regroup:
+                        container = self.folder(obj['name'])
+                else:
+                    container = target
+                continue
+            read += 1
+            key = key_for(obj)
+            if key in seen:
+                duplicates += 1
+                continue
+            name = obj['name']
+            if collide and name in named:
+                if policy == 'first':
+                    self.stats['dropped'] += 1
+                    continue
+                if policy == 'error':
+                    raise ValueError("name collision: %r" % name)
+                if policy == 'last':
+                    where, index, old_key = named[name]
+                    where[index] = obj
+                    del seen[old_key]
+                    seen[key] = True
+                    named[name] = (where, index, key)
+                    self.stats['replaced'] += 1
+                    self.stats['kept'] += 1
+                    continue
+                suffix = 2
+                while '%s (%d)' % (name, suffix) in named:
+                    suffix += 1
+                name = '%s (%d)' % (name, suffix)
+                obj = dict(obj, name=name)
+                self.stats['renamed'] += 1
+            seen[key] = True
+            named[name] = (container, len(container), key)
+            container.append(obj)
+            kept += 1
+        self.stats['read'] += read
+        self.stats['kept'] += kept
+        self.stats['duplicates'] += duplicates
+    
+    def events(self):
+        """ Generate the ``(event, object)`` pairs of the merged palette """
+        return parser.events_for_tree(self.tree)
+    
+    def write(self, destination, format=None, **options):
+        """ Write the merged palette to `destination`, in any format of `swatch.formats` """
+        from . import formats
+        formats.write_events(self.events(), destination, format, **options)
+
+def merge(sources, destination=None, **policies):
+    """ Merge every source in `sources`, returning the merged list of colors and groups
+        
+        The `policies` are those of ``Merger``; with a `destination`, the
+        merged palette is written there as well.
+    """
+    merger = Merger(**policies)
+    for source in sources:
+        merger.add(source)
+    if destination is not None:
+        merger.write(destination)
+    return merger.tree
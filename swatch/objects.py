@@ -0,0 +1,187 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Compact value types for colors and color groups.
+
+``Color`` and ``Group`` are ``__slots__`` classes – a few dozen bytes apiece,
+rather than the three ``dict``s and a ``list`` of the legacy form – with the
+color mode and type as enums. Each ``Mode`` carries a precompiled ``struct``
+for everything in a color chunk after its name (mode, values and type), so a
+color is decoded or encoded with a single call. ``swatch.parse(…, objects=True)``
+returns these directly, and the writer accepts them wherever it accepts dicts;
+``to_dict()`` and ``from_dict(…)`` convert to and from the legacy form.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+import enum
+import struct
+
+from . import parser
+
+class Mode(enum.Enum):
+    """ The ASE color modes; ``Mode('RGB')`` is ``Mode.RGB`` """
+    
+    RGB = ('RGB', b'RGB ', 3)
+    Gray = ('Gray', b'Gray', 1)
+    CMYK = ('CMYK', b'CMYK', 4)
+    LAB = ('LAB', b'LAB ', 3)
+    
+    def __new__(cls, label, code, width):
+        member = object.__new__(cls)
+        member._value_ = label
+        member.code = code
+        member.width = width
+        # the padded mode, the color values and the global/spot/process short
+        member.struct = struct.Struct('>4s%dfh' % width)
+        return member
+
+class ColorType(enum.IntEnum):
+    """ The kinds of ASE color, numbered as they are on disk """
+    
+    Global = 0
+    Spot = 1
+    Process = 2
+
+MODES_BY_CODE = dict((mode.code, mode) for mode in Mode)
+TYPES = tuple(ColorType)
+
+def encode_title(name):
+    """ Encode a color or folder name as null-terminated UTF-16BE """
+    return (name + '\0').encode('utf-16be')
+
+class Color(object):
+    """ A single swatch: a name, a ``Mode``, a tuple of values and a ``ColorType`` """
+    
+    __slots__ = ('name', 'mode', 'values', 'type')
+    
+    def __init__(self, name, mode, values, type=ColorType.Process):
+        self.name = name
+        self.mode = mode if isinstance(mode, Mode) else Mode(mode)
+        self.values = tuple(values)
+        self.type = type if isinstance(type, ColorType) else ColorType[type]
+    
+    def __repr__(self):
+        return 'Color(%r, %s, %r, %s)' % (self.name, self.mode.value, self.values, self.type.name)
+    
+    def __eq__(self, other):
+        if not isinstance(other, Color):
+            return NotImplemented
+        return (self.name == other.name and self.mode is other.mode and
+                self.values == other.values and self.type is other.type)
+    
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+    
+    __hash__ = None
+    
+    def to_dict(self):
+        """ Return the color in the legacy ``dict`` form """
+        return {
+            'name': self.name,
+            'type': self.type.name,
+            'data': {
+                'mode': self.mode.value,
+                'values': list(self.values)
+            }
+        }
+    
+    @classmethod
+    def from_dict(cls, obj):
+        """ Build a color from its legacy ``dict`` form """
+        data = obj['data']
+        return cls(obj['name'], data['mode'], data['values'], obj['type'])
+    
+    def to_bytes(self):
+        """ Return this color’s chunk, as bytes """
+        from .writer import chunk_for_color
+        return chunk_for_color(self)
+    
+    @classmethod
+    def from_buffer(cls, buf, start, end):
+        """ Decode the color chunk body occupying ``buf[start:end]``
+            
+            The chunk is decoded by the rules of ``parser.color_for_buffer`` –
+            to the same color as ``parser.color_dict_for_buffer``, or the same
+            error.
+        """
+        title, title_end = parser.title_for_buffer(buf, start)
+        mode = MODES_BY_CODE.get(bytes(buf[title_end:title_end + 4]))
+        color = cls.__new__(cls)
+        color.name = title
+        if mode is not None and title_end + mode.struct.size == end:
+            # the usual layout: the mode, values and type in one go
+            fields = mode.struct.unpack_from(buf, title_end)
+            color.mode = mode
+            color.values = fields[1:-1]
+            color.type = TYPES[fields[-1]]
+        else:
+            mode, values, color_type = parser.color_for_buffer(buf, title_end, end)
+            color.mode = Mode(mode)
+            color.values = tuple(values)
+            color.type = ColorType[color_type]
+        return color
+
+class Group(object):
+    """ A color group (née palette, or folder): a name and a list of ``Color``s """
+    
+    __slots__ = ('name', 'swatches')
+    
+    type = 'Color Group'
+    
+    def __init__(self, name, swatches=None):
+        self.name = name
+        self.swatches = list(swatches) if swatches is not None else []
+    
+    def __repr__(self):
+        return 'Group(%r, %r)' % (self.name, self.swatches)
+    
+    def __eq__(self, other):
+        if not isinstance(other, Group):
+            return NotImplemented
+        return self.name == other.name and self.swatches == other.swatches
+    
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+    
+    __hash__ = None
+    
+    def __len__(self):
+        return len(self.swatches)
+    
+    def __iter__(self):
+        return iter(self.swatches)
+    
+    def to_dict(self):
+        """ Return the group, and its colors, in the legacy ``dict`` form """
+        return {
+            'name': self.name,
+            'type': 'Color Group',
+            'swatches': [color.to_dict() for color in self.swatches]
+        }
+    
+    @classmethod
+    def for_buffer(cls, buf, start, end):
+        """ Return an empty group for the folder chunk body occupying ``buf[start:end]``,
+            and the list its colors go in – as ``parser.tree_for_buffer`` expects
+        """
+        group = cls(parser.dict_for_buffer(buf, start, end)['name'])
+        return group, group.swatches
+    
+    @classmethod
+    def from_dict(cls, obj):
+        """ Build a group, and its colors, from the legacy ``dict`` form """
+        return cls(obj['name'], [Color.from_dict(color) for color in obj['swatches']])
+
+def from_dicts(obj):
+    """ Convert a legacy list of colors and color groups to ``Color``s and ``Group``s """
+    return [Group.from_dict(item) if item.get('type') == 'Color Group' else Color.from_dict(item)
+            for item in obj]
+
+def to_dicts(obj):
+    """ Convert a list of ``Color``s and ``Group``s to the legacy form """
+    return [item.to_dict() for item in obj]
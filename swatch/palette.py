@@ -0,0 +1,371 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+A compact, columnar alternative to the lists of dicts returned by
+``swatch.parse(…)``: color values live in one float32 array per color mode,
+swatch types, modes and groups in small integer arrays and names in a single
+interned table. NumPy is optional – when it is installed, ``Palette.array(…)``
+hands out zero-copy ``(N, width)`` views of the value columns.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from array import array
+import io
+import mmap
+import struct
+import sys
+
+from . import parser
+
+MODES = ('RGB', 'Gray', 'CMYK', 'LAB')
+MODE_WIDTHS = { 'RGB'  : 3,
+                'Gray' : 1,
+                'CMYK' : 4,
+                'LAB'  : 3 }
+RAW_MODES = { b'RGB ' : 0,
+              b'Gray' : 1,
+              b'CMYK' : 2,
+              b'LAB ' : 3 }
+
+# The packed format: a header, then each column's raw, native-endian bytes in
+# ``COLUMNS`` order – the header and every column padded to an 8-byte boundary,
+# so the columns can be used in place from an mmap – then the character offsets
+# of every name and, finally, every name concatenated and encoded as UTF-8.
+PACK_MAGIC = b'SWPC'
+PACK_VERSION = 2
+PACK_HEADER = struct.Struct('<4sBc2x' + 'I' * 13)
+COLUMNS = (('name_ids', 'I'), ('types', 'B'), ('modes', 'B'), ('rows', 'I'),
+           ('groups', 'i'), ('group_name_ids', 'I'), ('group_starts', 'I'))
+BYTEORDER = b'<' if sys.byteorder == 'little' else b'>'
+
+def padded(size):
+    return (size + 7) & ~7
+
+def pack_columns(header, magic, version, columns, blob):
+    """ Return `columns` – ``array``s – and the bytes `blob`, packed behind `header`
+        
+        `header` is a ``struct.Struct`` of the `magic`, the `version` and the
+        byte order, then the length of each column and of `blob`. The header,
+        and then each column – as-is, in native byte order – is padded to an
+        8-byte boundary.
+    """
+    parts = [header.pack(magic, version, BYTEORDER,
+                         *([len(column) for column in columns] + [len(blob)])),
+             bytes(padded(header.size) - header.size)]
+    for column in columns:
+        raw = column.tobytes()
+        parts.append(raw + bytes(padded(len(raw)) - len(raw)))
+    parts.append(blob)
+    return b''.join(parts)
+
+def unpack_columns(view, header, magic, version, typecodes, what):
+    """ Return the columns packed by ``pack_columns(…)`` into the ``memoryview``
+        `view` – as views of the `typecodes` – and the blob after them
+        
+        Nothing is copied. Data that isn’t `what` (named in the message),
+        or that was packed on a machine of the other byte order, raises a
+        ``ValueError``.
+    """
+    if len(view) < header.size:
+        raise ValueError("not a %s (too short)" % what)
+    fields = header.unpack_from(view)
+    if fields[:3] != (magic, version, BYTEORDER):
+        raise ValueError("not a %s (or packed on an incompatible machine)" % what)
+    lengths, blob_length = fields[3:-1], fields[-1]
+    columns = []
+    offset = padded(header.size)
+    for length, typecode in zip(lengths, typecodes):
+        size = length * struct.calcsize(typecode)
+        if offset + size > len(view):
+            raise ValueError("%s is truncated" % what)
+        columns.append(view[offset:offset + size].cast(typecode))
+        offset += padded(size)
+    if offset + blob_length != len(view):
+        raise ValueError("%s is truncated or has trailing data" % what)
+    return columns, view[offset:]
+
+def _float_column(raw):
+    """ Convert a run of big-endian float32 bytes to a native ``array('f')`` """
+    column = array('f')
+    column.frombytes(raw)
+    if sys.byteorder == 'little':
+        column.byteswap()
+    return column
+
+class Palette(object):
+    """ Columnar storage for the colors and color groups of an ``.ase`` file
+        
+        Every swatch is a row, addressed by its position in the file:
+        
+        • ``names`` is the interned table of every distinct swatch and group
+          name; ``name_ids[i]`` indexes into it.
+        • ``types[i]`` indexes into ``parser.COLOR_TYPES``.
+        • ``modes[i]`` indexes into ``palette.MODES``, and ``rows[i]`` is the
+          row of swatch ``i`` within the value column for that mode.
+        • ``groups[i]`` indexes into the group table, or is ``-1`` for swatches
+          that live outside of any color group.
+        • ``values[mode]`` is a flat ``array('f')`` of ``MODE_WIDTHS[mode]``
+          floats per swatch of that mode.
+        
+        The group table (``group_name_ids``, ``group_starts``) records the name
+        of each group and the index of the first swatch inside it, which is
+        enough to rebuild the original ordering – empty groups included.
+    """
+    
+    def __init__(self):
+        self.names = []
+        self.name_ids = array('I')
+        self.types = array('B')
+        self.modes = array('B')
+        self.rows = array('I')
+        self.groups = array('i')
+        self.group_name_ids = array('I')
+        self.group_starts = array('I')
+        self.values = dict((mode, array('f')) for mode in MODES)
+        self._interned = None
+    
+    def __len__(self):
+        return len(self.types)
+    
+    def __iter__(self):
+        return self.iter_objects()
+    
+    def __getitem__(self, index):
+        """ Return the legacy color ``dict`` for the swatch at `index` """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("palette index out of range")
+        return self.color_dict(index)
+    
+    def intern(self, name):
+        """ Return the index of `name` in the name table, adding it if needed """
+        if self._interned is None:
+            self._interned = dict((name, index) for index, name in enumerate(self.names))
+        try:
+            return self._interned[name]
+        except KeyError:
+            self._interned[name] = index = len(self.names)
+            self.names.append(name)
+            return index
+    
+    def add_group(self, name):
+        """ Start a new color group at the current position, returning its index """
+        self.group_name_ids.append(self.intern(name))
+        self.group_starts.append(len(self))
+        return len(self.group_starts) - 1
+    
+    def add_color(self, name, mode, values, color_type, group=-1):
+        """ Append a single swatch to the palette """
+        column = self.values[mode]
+        self.name_ids.append(self.intern(name))
+        self.types.append(parser.COLOR_TYPES.index(color_type))
+        self.modes.append(MODES.index(mode))
+        self.rows.append(len(column) // MODE_WIDTHS[mode])
+        self.groups.append(group)
+        column.extend(values)
+    
+    @property
+    def group_count(self):
+        return len(self.group_starts)
+    
+    def name(self, index):
+        return self.names[self.name_ids[index]]
+    
+    def mode(self, index):
+        return MODES[self.modes[index]]
+    
+    def color_values(self, index):
+        """ Return the color values of the swatch at `index` as a ``list`` """
+        mode = MODES[self.modes[index]]
+        width = MODE_WIDTHS[mode]
+        start = self.rows[index] * width
+        return self.values[mode][start:start + width].tolist()
+    
+    def color_dict(self, index):
+        """ Build the legacy color ``dict`` for the swatch at `index` """
+        return {
+            'name': self.names[self.name_ids[index]],
+            'type': parser.COLOR_TYPES[self.types[index]],
+            'data': {
+                'mode': MODES[self.modes[index]],
+                'values': self.color_values(index)
+            }
+        }
+    
+    def iter_objects(self):
+        """ Lazily generate the legacy list of colors and color groups
+            
+            The objects are equal to those ``swatch.parse(…)`` returns for the
+            same file – but are built on demand, one top-level object at a time.
+        """
+        count = len(self)
+        group_count = self.group_count
+        next_group = 0
+        index = 0
+        while index < count or next_group < group_count:
+            if next_group < group_count and self.group_starts[next_group] <= index:
+                folder = {
+                    'name': self.names[self.group_name_ids[next_group]],
+                    'type': 'Color Group',
+                    'swatches': []
+                }
+                while index < count and self.groups[index] == next_group:
+                    folder['swatches'].append(self.color_dict(index))
+                    index += 1
+                next_group += 1
+                yield folder
+            else:
+                yield self.color_dict(index)
+                index += 1
+    
+    def to_list(self):
+        """ Return the legacy list of colors and color groups """
+        return list(self.iter_objects())
+    
+    def array(self, mode):
+        """ Return the value column for `mode` as an ``(N, width)`` NumPy array
+            
+            The array shares memory with the palette – no values are copied.
+            Requires NumPy.
+        """
+        import numpy
+        column = self.values[mode]
+        if not column:
+            return numpy.zeros((0, MODE_WIDTHS[mode]), dtype=numpy.float32)
+        return numpy.frombuffer(column, dtype=numpy.float32).reshape(-1, MODE_WIDTHS[mode])
+    
+    def nbytes(self):
+        """ Approximate the memory used by the palette’s arrays and name table """
+        arrays = [self.name_ids, self.types, self.modes, self.rows, self.groups,
+                  self.group_name_ids, self.group_starts] + list(self.values.values())
+        return (sum(column.itemsize * len(column) for column in arrays) +
+                sum(sys.getsizeof(name) for name in self.names))
+    
+    def pack(self):
+        """ Return the palette in a compact binary form, for ``Palette.unpack(…)``
+            
+            The arrays are written as-is, in native byte order, so the packed
+            form is only meant to be read back on the same kind of machine.
+        """
+        columns = [getattr(self, name) for name, typecode in COLUMNS]
+        columns += [self.values[mode] for mode in MODES]
+        text = ''.join(self.names)
+        offsets = array('I', [0])
+        for name in self.names:
+            offsets.append(offsets[-1] + len(name))
+        columns.append(offsets)
+        return pack_columns(PACK_HEADER, PACK_MAGIC, PACK_VERSION, columns,
+                            text.encode('utf-8'))
+    
+    @classmethod
+    def unpack(cls, buf):
+        """ Rebuild a palette from the output of ``Palette.pack()``
+            
+            The columns of the returned palette are read-only ``memoryview``s
+            over `buf` itself – nothing is copied, save for the name table – so
+            unpacking straight from an ``mmap`` is very nearly free.
+        """
+        typecodes = [typecode for name, typecode in COLUMNS] + ['f'] * len(MODES) + ['I']
+        columns, blob = unpack_columns(memoryview(buf), PACK_HEADER, PACK_MAGIC, PACK_VERSION,
+                                       typecodes, "packed palette")
+        text = str(blob, 'utf-8')
+        
+        palette = cls()
+        for (name, typecode), column in zip(COLUMNS, columns):
+            setattr(palette, name, column)
+        for mode, column in zip(MODES, columns[len(COLUMNS):]):
+            palette.values[mode] = column
+        offsets = columns[-1]
+        palette.names = [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        return palette
+    
+    @classmethod
+    def from_objects(cls, obj):
+        """ Build a palette from a legacy list of colors and color groups """
+        palette = cls()
+        for item in obj:
+            if item.get('type') == 'Color Group':
+                group = palette.add_group(item['name'])
+                for color in item['swatches']:
+                    data = color['data']
+                    palette.add_color(color['name'], data['mode'], data['values'],
+                                      color['type'], group)
+            else:
+                data = item['data']
+                palette.add_color(item['name'], data['mode'], data['values'], item['type'])
+        return palette
+    
+    @classmethod
+    def from_buffer(cls, buf, offset=0):
+        """ Fill a palette straight from ASE chunk bytes in `buf`
+            
+            Color values are copied as raw big-endian bytes into one buffer per
+            mode and converted to native floats in a single pass at the end.
+            Chunks are walked, and decoded, by the same rules as
+            ``parser.parse_buffer`` – so a palette holds the same colors the
+            dicts would, or the same ``ParseError`` is raised.
+        """
+        palette = cls()
+        raw_values = [bytearray() for mode in MODES]
+        counts = [0] * len(MODES)
+        group = -1
+        
+        def color(view, start, end):
+            title, title_end = parser.title_for_buffer(view, start)
+            mode = RAW_MODES.get(bytes(view[title_end:title_end + 4]))
+            values_start = title_end + 4
+            if mode is not None and values_start + 4 * MODE_WIDTHS[MODES[mode]] + 2 == end:
+                # the usual layout: the values are copied as they are
+                type_name = parser.COLOR_TYPES[parser.SWATCH_TYPE.unpack_from(view, end - 2)[0]]
+                raw = view[values_start:end - 2]
+            else:
+                color_mode, values, type_name = parser.color_for_buffer(view, title_end, end)
+                mode = MODES.index(color_mode)
+                raw = struct.pack('>%df' % len(values), *values)
+            
+            palette.name_ids.append(palette.intern(title))
+            palette.types.append(parser.COLOR_TYPES.index(type_name))
+            palette.modes.append(mode)
+            palette.rows.append(counts[mode])
+            palette.groups.append(group)
+            raw_values[mode] += raw
+            counts[mode] += 1
+        
+        def folder(view, start, end):
+            nonlocal group
+            group = palette.add_group(parser.dict_for_buffer(view, start, end)['name'])
+        
+        def folder_end():
+            nonlocal group
+            group = -1
+        
+        with memoryview(buf) as view:
+            view = view.cast('B') if view.format != 'B' else view
+            parser.walk_buffer(view, offset, color, folder, folder_end)
+        
+        for mode, raw in zip(MODES, raw_values):
+            palette.values[mode] = _float_column(raw)
+        return palette
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """ Build a palette from the complete contents of an ``.ase`` file """
+        parser.read_header(data)
+        return cls.from_buffer(data, parser.FILE_HEADER.size)
+    
+    @classmethod
+    def from_file(cls, filename):
+        """ Build a palette from an ``.ase`` file, memory-mapping it if possible """
+        with io.open(filename, 'rb') as handle:
+            try:
+                data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                return cls.from_bytes(handle.read())
+            try:
+                return cls.from_bytes(data)
+            finally:
+                data.close()
@@ -10,10 +10,19 @@ With notes from:
 All Rights Reserved
 MIT Licensed, see LICENSE.TXT for details
 """
-import logging
+from contextvars import ContextVar
+from operator import itemgetter
 import struct
+import sys
 import os
 
+# the active `swatch.instrument.Collector`, if any (see ``swatch.instrument``)
+COLLECTOR = ContextVar('swatch.instrument.collector', default=None)
+
+HEADER = b'ASEF'
+V_MAJOR = 1
+V_MINOR = 0
+FILE_HEADER = struct.Struct('!4sHHI')
 
 def parse_chunk(handle):
     """ Generate object dicts for arbitrary chunks, until the
@@ -24,29 +33,23 @@ def parse_chunk(handle):
     while chunk_type:
         if chunk_type == b'\x00\x01':
             # a single color
-            logging.debug("[swatch.parser] parse_chunk saw single color")
             out = dict_for_chunk(handle)
             yield out
         
         elif chunk_type == b'\xC0\x01':
             # folder/palate
-            logging.debug("[swatch.parser] parse_chunk saw folder")
             out = dict_for_chunk(handle)
             out['swatches'] = [x for x in colors(handle)]
             yield out
         
         elif chunk_type == b'\xC0\x02':
             # this signals the end of a folder
-            logging.debug("[swatch.parser] parse_chunk saw end of folder")
-            assert handle.read(4) == b'\x00\x00\x00\x00'
-            pass
+            if handle.read(4) != b'\x00\x00\x00\x00':
+                raise ParseError("folder end chunk with a body")
         
-        else:
-            # the file is malformed?
-            logging.debug("[swatch.parser] parse_chunk got malformed ase file")
-            assert chunk_type in [
-                b'\xC0\x01', b'\x00\x01', b'\xC0\x02', b'\x00\x02']
-            pass
+        elif chunk_type != b'\x00\x02':
+            # the file is malformed
+            raise ParseError("unknown chunk type %r" % chunk_type)
         
         chunk_type = handle.read(2)
 
@@ -96,3 +99,690 @@ def dict_for_chunk(handle):
         })
     
     return output
+
+
+# Chunk type tags, as they appear (big-endian) at the head of every chunk
+COLOR_CHUNK = 0x0001
+FOLDER_CHUNK = 0xC001
+FOLDER_END_CHUNK = 0xC002
+UNKNOWN_CHUNK = 0x0002
+
+CHUNK_NAMES = { COLOR_CHUNK      : 'color',
+                FOLDER_CHUNK     : 'folder',
+                FOLDER_END_CHUNK : 'folder-end',
+                UNKNOWN_CHUNK    : 'unknown' }
+
+CHUNK_HEAD = struct.Struct('>HI')
+COLOR_CHUNK_HEAD = struct.Struct('>HIH')  # chunk type, chunk length, title length
+TITLE_LENGTH = struct.Struct('>H')
+COLOR_MODE = struct.Struct('!4s')
+SWATCH_TYPE = struct.Struct('>h')
+
+# the number of values in a color, by mode
+MODE_WIDTHS = dict((mode, struct.calcsize(codec) // 4) for mode, codec in COLOR_MODES.items())
+
+class ParseError(ValueError):
+    """ Malformed ``.ase`` data – `offset`, if known, is where in the file the problem is """
+    
+    def __init__(self, message, offset=None):
+        if offset is not None:
+            message = '%s (at byte %d)' % (message, offset)
+        super(ParseError, self).__init__(message)
+        self.offset = offset
+
+# what decoding a malformed chunk can raise, to be reported as a ParseError
+DECODE_ERRORS = (KeyError, IndexError, OverflowError, struct.error, UnicodeDecodeError)
+
+def read_header(buf):
+    """ Check the ``.ase`` file header at the start of `buf`, returning the chunk count it records """
+    if len(buf) < FILE_HEADER.size:
+        raise ParseError("truncated file header", 0)
+    header, v_major, v_minor, chunk_count = FILE_HEADER.unpack_from(buf)
+    if header != HEADER:
+        raise ParseError("not an .ase file (header %r)" % bytes(header), 0)
+    if (v_major, v_minor) != (V_MAJOR, V_MINOR):
+        raise ParseError("unsupported version %d.%d" % (v_major, v_minor), 4)
+    return chunk_count
+
+def color_tail_size(code):
+    """ Return the size of what follows the name in a color chunk – the mode `code`, the
+        values and the type – or ``None`` if `code` isn’t a color mode
+    """
+    mode = code.strip()
+    if mode not in COLOR_MODES:
+        return None
+    return COLOR_MODE.size + struct.calcsize(COLOR_MODES[mode]) + SWATCH_TYPE.size
+
+# the size of the rest of a color chunk after its name, by (padded) mode
+COLOR_TAILS = dict((mode.ljust(4), color_tail_size(mode)) for mode in COLOR_MODES)
+
+def validate_buffer(buf):
+    """ Check the structure of the whole ``.ase`` file in `buf`, raising a ``ParseError``
+        
+        Only chunk heads, lengths, name lengths, color modes and types are
+        looked at – no names are decoded and no values unpacked, let alone
+        dicts built. Returns a ``dict`` of the number of chunks of each type.
+    """
+    unpack_head = CHUNK_HEAD.unpack_from
+    unpack_color_head = COLOR_CHUNK_HEAD.unpack_from
+    unpack_title_length = TITLE_LENGTH.unpack_from
+    unpack_mode = COLOR_MODE.unpack_from
+    unpack_type = SWATCH_TYPE.unpack_from
+    tails = COLOR_TAILS
+    type_count = len(COLOR_TYPES)
+    
+    with memoryview(buf) as view:
+        view = view.cast('B') if view.format != 'B' else view
+        chunk_count = read_header(view)
+        counts = dict.fromkeys(CHUNK_NAMES.values(), 0)
+        colors = 0
+        end = len(view)
+        offset = FILE_HEADER.size
+        open_folder = False
+        
+        while offset < end:
+            if end - offset >= 8:
+                # a color chunk’s head and title length, in one go
+                chunk_type, chunk_length, title_length = unpack_color_head(view, offset)
+            elif end - offset >= 6:
+                chunk_type, chunk_length = unpack_head(view, offset)
+                title_length = 0
+            else:
+                raise ParseError("truncated chunk head", offset)
+            start = offset + 6
+            chunk_end = start + chunk_length
+            if chunk_end > end:
+                raise ParseError("chunk runs %d bytes past the end of the file" % (
+                                 chunk_end - end), offset)
+            
+            if chunk_type == COLOR_CHUNK:
+                if chunk_length < 2:
+                    raise ParseError("chunk too short for a name", offset)
+                title_end = start + 2 + 2 * title_length
+                tail = chunk_end - title_end
+                if tail < COLOR_MODE.size + SWATCH_TYPE.size:
+                    raise ParseError("color chunk too short for its name, mode and type", offset)
+                code = unpack_mode(view, title_end)[0]
+                expected = tails.get(code) or color_tail_size(code)
+                if expected is None:
+                    raise ParseError("unknown color mode %r" % code, title_end)
+                if tail != expected:
+                    raise ParseError("%s color has %d bytes of mode, values and type, not %d" % (
+                                     code.strip().decode('ascii'), tail, expected), offset)
+                # the type is a big-endian short: its high byte is always 0
+                if view[chunk_end - 2] or view[chunk_end - 1] >= type_count:
+                    raise ParseError("unknown color type %d" % unpack_type(view, chunk_end - 2)[0],
+                                     chunk_end - 2)
+                colors += 1
+                offset = chunk_end
+                continue
+            
+            if chunk_type == FOLDER_CHUNK:
+                if chunk_length < 2:
+                    raise ParseError("chunk too short for a name", offset)
+                if start + 2 + 2 * unpack_title_length(view, start)[0] > chunk_end:
+                    raise ParseError("name runs past the end of its chunk", offset)
+                open_folder = True
+            
+            elif chunk_type == FOLDER_END_CHUNK:
+                if chunk_length:
+                    raise ParseError("folder end chunk with a body", offset)
+                if not open_folder:
+                    raise ParseError("folder end chunk outside of a folder", offset)
+                open_folder = False
+            
+            elif chunk_type != UNKNOWN_CHUNK:
+                raise ParseError("unknown chunk type 0x%04X" % chunk_type, offset)
+            
+            counts[CHUNK_NAMES[chunk_type]] += 1
+            offset = chunk_end
+        
+        counts['color'] = colors
+        if sum(counts.values()) != chunk_count:
+            raise ParseError("header records %d chunks, but there are %d" % (
+                             chunk_count, sum(counts.values())), 8)
+        return counts
+
+def parse_buffer(buf, offset=0):
+    """ Return a list of object dicts for every chunk found in `buf`
+        
+        `buf` may be ``bytes``, a ``memoryview``, an ``mmap`` or anything
+        else supporting the buffer protocol; chunks are walked in-place
+        starting at `offset` (i.e. just past the file header) and bytes
+        are only copied when the output dicts are built.
+        
+        Well-formed data is decoded by ``decode_buffer``; anything it turns
+        down is decoded here a chunk at a time, to the same dicts (or the
+        same ``ParseError``) as ever.
+    """
+    collector = COLLECTOR.get()
+    if collector is not None:
+        from .instrument import parse_buffer
+        return parse_buffer(collector, buf, offset)
+    with memoryview(buf) as view:
+        view = view.cast('B') if view.format != 'B' else view
+        output = decode_buffer(view, offset)
+        if output is not None:
+            return output
+        return tree_for_buffer(view, offset, color_dict_for_buffer, folder_for_buffer)
+
+def walk_buffer(view, offset, color, folder, folder_end, tally=None):
+    """ Walk the chunks in `view`, from `offset` on, calling back for each one
+        
+        ``color(view, start, end)`` is called for every color chunk, and
+        ``folder(view, start, end)`` for every folder chunk, with the bounds
+        of the chunk’s body; ``folder_end()`` for the end of every folder.
+        `tally`, if given, is called with the type and the total size of
+        every chunk (see `swatch.instrument`). Malformed data raises a
+        ``ParseError``, whether the walk or a callback comes across it.
+        
+        This is the one chunk loop behind every whole-buffer parser – of
+        dicts, of `swatch.Color`s or of a `swatch.Palette`.
+    """
+    unpack_head = CHUNK_HEAD.unpack_from
+    head_size = CHUNK_HEAD.size
+    end = len(view)
+    
+    try:
+        while offset < end:
+            if end - offset < head_size:
+                raise ParseError("truncated chunk head", offset)
+            chunk_type, chunk_length = unpack_head(view, offset)
+            start = offset + head_size
+            chunk_end = start + chunk_length
+            if chunk_end > end:
+                raise ParseError("truncated chunk", offset)
+            if tally is not None:
+                tally(chunk_type, chunk_end - offset)
+            
+            if chunk_type == COLOR_CHUNK:
+                color(view, start, chunk_end)
+            
+            elif chunk_type == FOLDER_CHUNK:
+                folder(view, start, chunk_end)
+            
+            elif chunk_type == FOLDER_END_CHUNK:
+                if chunk_length:
+                    raise ParseError("folder end chunk with a body", offset)
+                folder_end()
+            
+            elif chunk_type != UNKNOWN_CHUNK:
+                raise ParseError("unknown chunk type 0x%04X" % chunk_type, offset)
+            
+            offset = chunk_end
+    
+    except DECODE_ERRORS as error:
+        raise ParseError("malformed chunk: %s" % error, offset)
+
+def tree_for_buffer(view, offset, decode, group, tally=None):
+    """ Return the list of colors and color groups in `view`, from `offset` on
+        
+        Each color is built by ``decode(view, start, end)``; each group by
+        ``group(view, start, end)``, which returns the group and the list its
+        colors go in. The chunks are walked by ``walk_buffer``.
+    """
+    output = []
+    add = output.append
+    
+    def color(view, start, end):
+        add(decode(view, start, end))
+    
+    def folder(view, start, end):
+        nonlocal add
+        obj, swatches = group(view, start, end)
+        output.append(obj)
+        add = swatches.append
+    
+    def folder_end():
+        nonlocal add
+        add = output.append
+    
+    walk_buffer(view, offset, color, folder, folder_end, tally)
+    return output
+
+def title_for_buffer(view, start):
+    """ Return the name at the head of the chunk body starting at `start`, and where it ends """
+    title_end = start + TITLE_LENGTH.size + (TITLE_LENGTH.unpack_from(view, start)[0] * 2)
+    return str(view[start + TITLE_LENGTH.size:title_end], 'utf-16be').strip('\0'), title_end
+
+def color_for_buffer(view, title_end, end):
+    """ Return the mode, values and type of the color chunk body ending at `end`,
+        whose name ends at `title_end` – e.g. ``('RGB', [1.0, 0.5, 0.0], 'Spot')``
+        
+        Every decoder of color chunks keeps to these rules: the mode may be
+        padded with whitespace on either side; the values follow it; the type
+        is the chunk’s last two bytes (and, as ever, an index into
+        ``COLOR_TYPES`` – so a type of -1 is ``'Process'``). A chunk too
+        short for its mode, values and type raises an ``IndexError``.
+    """
+    color_mode = COLOR_MODE.unpack_from(view, title_end)[0].strip()
+    codec = COLOR_MODES[color_mode]
+    if title_end + COLOR_MODE.size + struct.calcsize(codec) + SWATCH_TYPE.size > end:
+        raise IndexError("color chunk too short for its mode, values and type")
+    values = list(struct.unpack_from(codec, view, title_end + COLOR_MODE.size))
+    swatch_type_index = SWATCH_TYPE.unpack_from(view, end - SWATCH_TYPE.size)[0]
+    return color_mode.decode('utf-8'), values, COLOR_TYPES[swatch_type_index]
+
+def dict_for_buffer(view, start, end):
+    """ Return a dict with decoded information for the chunk occupying
+        ``view[start:end]`` – the chunk body, sans type and length.
+    """
+    title, title_end = title_for_buffer(view, start)
+    if title_end > end:
+        raise IndexError("name runs past the end of its chunk")
+    
+    output = {
+        'name': title,
+        'type': 'Color Group'  # default to color group
+    }
+    
+    if title_end < end:
+        color_mode, color_values, swatch_type = color_for_buffer(view, title_end, end)
+        output.update({
+            'data': {
+                'mode': color_mode,
+                'values': color_values
+            },
+            'type': swatch_type
+        })
+    
+    return output
+
+def color_dict_for_buffer(view, start, end):
+    """ Return the dict for the color chunk occupying ``view[start:end]``
+        
+        Unlike ``dict_for_buffer``, this never mistakes a color chunk with no
+        mode, values or type for a folder: it raises an ``IndexError``.
+    """
+    title, title_end = title_for_buffer(view, start)
+    color_mode, color_values, swatch_type = color_for_buffer(view, title_end, end)
+    return {
+        'name': title,
+        'type': swatch_type,
+        'data': {
+            'mode': color_mode,
+            'values': color_values
+        }
+    }
+
+def folder_for_buffer(view, start, end):
+    """ Return the dict for the folder chunk occupying ``view[start:end]``, and
+        the list its colors go in – as ``tree_for_buffer`` expects
+    """
+    folder = dict_for_buffer(view, start, end)
+    folder['swatches'] = []
+    return folder, folder['swatches']
+
+# The fast path: color chunks with the same head – type, length and name length
+# – share a layout, so runs of them can be unpacked wholesale
+CHUNK_KEY = struct.Struct('>Q')  # a chunk’s type, length and name length, as one number
+COLOR_CODECS = {}
+COLOR_CODECS_SIZE = 4096
+NUL = b'\0\0'
+
+# the (interned) name of each mode, by the number of values it has, keyed by the
+# NUL that ends a color’s name followed by its padded mode code
+MODE_NAMES = dict((width, dict((NUL + mode.ljust(4), sys.intern(mode.decode('ascii')))
+                               for mode in COLOR_MODES if MODE_WIDTHS[mode] == width))
+                  for width in set(MODE_WIDTHS.values()))
+
+def color_codec(key):
+    """ Return ``(codec, modes)`` for color chunks with the ``CHUNK_KEY`` `key` – or
+        ``None`` if no color mode fits them
+        
+        `codec` is a ``struct.Struct`` for the whole chunk, unpacking its name
+        (sans the NUL that ends it), that NUL and its mode, its values and its
+        type; `modes` names the modes with as many values.
+    """
+    title_length = key & 0xFFFF
+    size = (key >> 16 & 0xFFFFFFFF) - TITLE_LENGTH.size - 2 * title_length \
+                                    - COLOR_MODE.size - SWATCH_TYPE.size
+    if not title_length or size < 0 or size % 4 or size // 4 not in MODE_NAMES:
+        return None
+    codec = (struct.Struct('>%dx%ds%ds%dfh' % (CHUNK_KEY.size, 2 * title_length - len(NUL),
+                                                len(NUL) + COLOR_MODE.size, size // 4)),
+             MODE_NAMES[size // 4])
+    if len(COLOR_CODECS) < COLOR_CODECS_SIZE:
+        COLOR_CODECS[key] = codec
+    return codec
+
+def decode_buffer(view, offset=0):
+    """ Return the list ``parse_buffer`` would for the chunks in `view` – or ``None``
+        
+        Each run of color chunks with the same head is unpacked by a single
+        ``iter_unpack``. Their dicts hold the raw names to begin with; at the
+        end, every name in the file is decoded at once – joined by NULs, then
+        split at them. Anything out of the ordinary – a malformed chunk, an
+        oddly padded mode, a name that isn’t ended by a NUL or holds another
+        one – returns ``None``, leaving the chunk-at-a-time decoder to deal
+        with it.
+    """
+    unpack_key = CHUNK_KEY.unpack_from
+    color_codecs = COLOR_CODECS
+    types = COLOR_TYPES
+    colors = []
+    extend = colors.extend
+    groups = []  # (number of colors before it, group dict or None for a group end)
+    end = len(view)
+    limit = end - CHUNK_KEY.size
+    
+    try:
+        while offset < end:
+            if offset > limit:
+                # too close to the end for a color chunk
+                chunk_type, chunk_length = CHUNK_HEAD.unpack_from(view, offset)
+                key = chunk_type << 48 | chunk_length << 16
+            else:
+                key = unpack_key(view, offset)[0]
+            chunk_type = key >> 48
+            size = CHUNK_HEAD.size + (key >> 16 & 0xFFFFFFFF)
+            
+            if chunk_type == COLOR_CHUNK:
+                codec = color_codecs.get(key) or color_codec(key)
+                if codec is None:
+                    return None
+                codec, modes = codec
+                start = offset
+                offset += size
+                while offset <= limit and unpack_key(view, offset)[0] == key:
+                    offset += size
+                if offset > end:
+                    return None
+                # a name not ended by a NUL makes for a mode that isn’t in `modes`
+                extend([{'name': record[0],
+                         'type': types[record[-1]],
+                         'data': {'mode': modes[record[1]],
+                                  'values': [*record[2:-1]]}}
+                        for record in codec.iter_unpack(view[start:offset])])
+                continue
+            
+            if offset + size > end:
+                return None
+            if chunk_type == FOLDER_CHUNK:
+                folder = dict_for_buffer(view, offset + CHUNK_HEAD.size, offset + size)
+                folder['swatches'] = []
+                groups.append((len(colors), folder))
+            elif chunk_type == FOLDER_END_CHUNK:
+                if size != CHUNK_HEAD.size:
+                    return None
+                groups.append((len(colors), None))
+            elif chunk_type != UNKNOWN_CHUNK:
+                return None
+            offset += size
+        
+        names = NUL.join(map(itemgetter('name'), colors)).decode('utf-16be').split('\0')
+        if len(names) != len(colors) and colors:
+            return None
+        for color, name in zip(colors, names):
+            color['name'] = name
+    
+    except DECODE_ERRORS:
+        return None
+    
+    output = []
+    container = output
+    done = 0
+    for position, folder in groups:
+        container.extend(colors[done:position])
+        done = position
+        if folder is None:
+            container = output
+        else:
+            output.append(folder)
+            container = folder['swatches']
+    container.extend(colors[done:])
+    return output
+
+def objects_for_buffer(buf, offset=0):
+    """ Like ``parse_buffer``, but return `swatch.Color` and `swatch.Group` objects """
+    collector = COLLECTOR.get()
+    if collector is not None:
+        from .instrument import parse_buffer
+        return parse_buffer(collector, buf, offset, objects=True)
+    from .objects import Color, Group
+    with memoryview(buf) as view:
+        view = view.cast('B') if view.format != 'B' else view
+        return tree_for_buffer(view, offset, Color.from_buffer, Group.for_buffer)
+
+# Event names generated by ``iter_events`` (and ``swatch.iterparse``)
+START_GROUP = 'start-group'
+COLOR = 'color'
+END_GROUP = 'end-group'
+
+def read_exactly(handle, size):
+    """ Read exactly `size` bytes from `handle`, unless it is exhausted first
+        
+        Pipes, sockets and compressed streams may return short reads; this
+        keeps reading until `size` bytes have arrived or the stream ends.
+    """
+    data = handle.read(size)
+    if data is None:
+        data = b''
+    if len(data) < size and data:
+        parts = [data]
+        remaining = size - len(data)
+        while remaining:
+            part = handle.read(remaining)
+            if not part:
+                break
+            parts.append(part)
+            remaining -= len(part)
+        data = b''.join(parts)
+    return data
+
+def iter_events(handle):
+    """ Generate ``(event, object)`` pairs for chunks read from `handle`
+        
+        Events are one of ``START_GROUP``, ``COLOR`` or ``END_GROUP``; the
+        objects are the same dicts ``parse_buffer`` builds, except that color
+        groups carry no ``swatches`` list – their colors are the ``COLOR``
+        events that arrive between a group’s start and end events.
+        
+        Only one chunk is held in memory at a time and `handle` is only ever
+        read from (never seeked), so any non-seekable stream will do.
+    """
+    state = IncrementalParser(header=False)
+    head = read_exactly(handle, CHUNK_HEAD.size)
+    
+    while head:
+        if len(head) != CHUNK_HEAD.size:
+            raise ParseError("truncated chunk head")
+        chunk_type, chunk_length = CHUNK_HEAD.unpack(head)
+        data = read_exactly(handle, chunk_length)
+        if len(data) != chunk_length:
+            raise ParseError("truncated chunk")
+        for event in state.chunk(chunk_type, data, 0, chunk_length):
+            yield event
+        head = read_exactly(handle, CHUNK_HEAD.size)
+    
+    for event in state.close():
+        yield event
+
+class IncrementalParser(object):
+    """ A sans-IO parser: ``feed(…)`` it bytes as they arrive, get events back
+        
+        Nothing here does any I/O – data can come from a socket, an HTTP body,
+        a multipart upload, a message queue or an ``asyncio`` stream, in pieces
+        of any size. Each call to ``feed(data)`` returns a list of the
+        ``(event, object)`` pairs (as described in ``iter_events``) for the
+        chunks completed by `data`; ``close()`` signals the end of the data,
+        returning any final events.
+            
+            >>> state = swatch.parser.IncrementalParser()
+            >>> for piece in request.iter_content(4096):
+            ...     for event, obj in state.feed(piece):
+            ...         handle(event, obj)
+            >>> for event, obj in state.close():
+            ...     handle(event, obj)
+        
+        Complete chunks are decoded straight out of the data they arrived in.
+        Only a chunk that straddles two calls to ``feed(…)`` is copied, once,
+        into a single buffer that is reused (and grown as needed) for the life
+        of the parser – as that partial chunk is always completed before any
+        other is started, it always begins at the start of the buffer.
+        
+        With ``header=False``, the data is expected to start straight away with
+        the first chunk, rather than with the ``ASEF`` file header.
+        
+        A parser created within `swatch.instrument.collect()` reports to that
+        collector, even if it is fed elsewhere.
+    """
+    
+    def __init__(self, header=True, buffer_size=4096):
+        self.buffer = bytearray(buffer_size)
+        self.pending = 0
+        self.expect_header = header
+        self.chunk_count = None
+        self.folder = None
+        self.bytes_fed = 0
+        self.collector = COLLECTOR.get()
+        self.decode = color_dict_for_buffer if self.collector is None else self.collector.decode
+    
+    def feed(self, data):
+        """ Add `data` to the parse, returning a list of newly completed events """
+        events = []
+        with memoryview(data) as view:
+            view = view.cast('B') if view.format != 'B' else view
+            self.bytes_fed += len(view)
+            offset = self._complete_pending(view, events) if self.pending else 0
+            if self.pending:
+                return events
+            offset = self._parse(view, offset, events)
+            self._stash(view, offset, len(view))
+        return events
+    
+    def _needed(self):
+        """ Return how many bytes the buffered partial header or chunk still lacks """
+        if self.expect_header:
+            return FILE_HEADER.size - self.pending
+        if self.pending < CHUNK_HEAD.size:
+            return CHUNK_HEAD.size - self.pending
+        return CHUNK_HEAD.size + CHUNK_HEAD.unpack_from(self.buffer)[1] - self.pending
+    
+    def _stash(self, view, start, end):
+        """ Append ``view[start:end]`` to the buffered partial chunk """
+        size = self.pending + end - start
+        if size > len(self.buffer):
+            grown = bytearray(max(size, 2 * len(self.buffer)))
+            grown[:self.pending] = self.buffer[:self.pending]
+            self.buffer = grown
+        self.buffer[self.pending:size] = view[start:end]
+        self.pending = size
+    
+    def _complete_pending(self, view, events):
+        """ Fill the buffered partial chunk from `view`; parse it once it’s complete """
+        offset = 0
+        while offset < len(view):
+            needed = self._needed()
+            take = min(needed, len(view) - offset)
+            self._stash(view, offset, offset + take)
+            offset += take
+            if take < needed:
+                break
+            if self.expect_header or self.pending > CHUNK_HEAD.size or self._needed() == 0:
+                with memoryview(self.buffer) as buffered:
+                    self._parse(buffered[:self.pending], 0, events)
+                self.pending = 0
+                break
+        return offset
+    
+    def _parse(self, view, offset, events):
+        """ Parse every complete chunk in `view`, from `offset`; return where they end """
+        available = len(view)
+        
+        if self.expect_header:
+            if available - offset < FILE_HEADER.size:
+                return offset
+            self.chunk_count = read_header(view[offset:offset + FILE_HEADER.size])
+            self.expect_header = False
+            offset += FILE_HEADER.size
+            if self.collector is not None:
+                self.collector.bytes_read += FILE_HEADER.size
+        
+        while available - offset >= CHUNK_HEAD.size:
+            chunk_type, chunk_length = CHUNK_HEAD.unpack_from(view, offset)
+            chunk_end = offset + CHUNK_HEAD.size + chunk_length
+            if chunk_end > available:
+                break
+            events.extend(self.chunk(chunk_type, view, offset + CHUNK_HEAD.size, chunk_end))
+            offset = chunk_end
+        
+        return offset
+    
+    def chunk(self, chunk_type, buf, start, end):
+        """ Return the events for one complete chunk, occupying ``buf[start:end]`` """
+        if self.collector is not None:
+            self.collector.read(chunk_type, CHUNK_HEAD.size + end - start)
+        
+        if chunk_type == COLOR_CHUNK:
+            try:
+                return [(COLOR, self.decode(buf, start, end))]
+            except DECODE_ERRORS as error:
+                raise ParseError("malformed chunk: %s" % error)
+        
+        elif chunk_type == FOLDER_CHUNK:
+            events = self.end_group()
+            try:
+                self.folder = dict_for_buffer(buf, start, end)
+            except DECODE_ERRORS as error:
+                raise ParseError("malformed chunk: %s" % error)
+            events.append((START_GROUP, self.folder))
+            return events
+        
+        elif chunk_type == FOLDER_END_CHUNK:
+            if start != end:
+                raise ParseError("folder end chunk with a body")
+            return self.end_group()
+        
+        elif chunk_type != UNKNOWN_CHUNK:
+            # the file is malformed
+            raise ParseError("unknown chunk type 0x%04X" % chunk_type)
+        
+        return []
+    
+    def end_group(self):
+        """ Close the open color group (if any), returning its ``END_GROUP`` event """
+        if self.folder is None:
+            return []
+        folder, self.folder = self.folder, None
+        return [(END_GROUP, folder)]
+    
+    def close(self):
+        """ Signal the end of the data, returning the final events (if any) """
+        if self.pending or self.expect_header:
+            raise ParseError("truncated data")
+        return self.end_group()
+
+def tree_for_events(events):
+    """ Assemble ``(event, object)`` pairs into the legacy list of colors and groups """
+    output = []
+    folder = None
+    for event, obj in events:
+        if event == COLOR:
+            if folder is None:
+                output.append(obj)
+            else:
+                folder['swatches'].append(obj)
+        elif event == START_GROUP:
+            folder = dict(obj, swatches=[])
+            output.append(folder)
+        elif event == END_GROUP:
+            folder = None
+    return output
+
+def events_for_tree(obj):
+    """ Generate ``(event, object)`` pairs for a legacy list of colors and groups
+        
+        This is the inverse of ``tree_for_events``: group events carry the
+        group’s name and type, and are followed by a ``COLOR`` event for each
+        of its colors.
+    """
+    for item in obj:
+        if item.get('type') == 'Color Group':
+            folder = {'name': item['name'], 'type': 'Color Group'}
+            yield START_GROUP, folder
+            for color in item['swatches']:
+                yield COLOR, color
+            yield END_GROUP, folder
+        else:
+            yield COLOR, item
@@ -0,0 +1,218 @@
+# encoding: utf-8
+"""
+swatch, a parser for adobe swatch exchange files
+Copyright (c) 2014 Marcos A. Ojeda http://generic.cx/
+
+Mapping images onto palettes: every pixel to its nearest swatch.
+
+A ``Quantizer`` matches the colors of a whole RGB cube – 32³ cells, by
+default – against the palette once, in CIELAB, and keeps the result as a
+lookup table. Mapping an image is then a couple of shifts and a table lookup
+per pixel, done a band of rows at a time across a pool of threads (NumPy
+releases the GIL while it works):
+
+    >>> from swatch.quantize import Quantizer
+    >>> quantizer = Quantizer(swatch.parse("tests/fixtures/xterm colors.ase"))
+    >>> indices, remapped = quantizer.quantize(image)
+    >>> quantizer.names[indices[0, 0]], quantizer.colors[indices[0, 0]]
+
+Images are ``(height, width, 3)`` (or ``…, 4)``, whose alpha is passed
+through) arrays of ``uint8`` or of floats in [0, 1]. NumPy is required.
+
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy
+
+from . import colorspace
+
+METRICS = ('76', '2000')
+
+# the most distances computed at once – a block of rows against every swatch –
+# which bounds the memory used: ΔE76 needs a couple of float64 arrays of that
+# size (about 25MB in all), ΔE2000 a few dozen (so it gets smaller blocks)
+BLOCK = 1 << 20
+BLOCK_2000 = 1 << 18
+
+def nearest_ids(labs, matrix, metric='76', rows=None):
+    """ Return the index of the nearest row of `matrix` for every row of `labs`
+        
+        Both are ``(N, 3)`` CIELAB arrays. ΔE76 distances are computed as
+        ``|a|² - 2a·b + |b|²``, one matrix product per block of rows; ΔE2000
+        ones with ``colorspace.delta_e2000_array``. Blocks are sized to fit
+        ``BLOCK`` (or ``BLOCK_2000``) distances, and are at most `rows` long.
+    """
+    if metric not in METRICS:
+        raise ValueError("unknown metric: %r (expected one of %s)" % (metric, METRICS))
+    if not len(matrix):
+        raise ValueError("can't find the nearest of no colors")
+    ids = numpy.empty(len(labs), dtype=numpy.intp)
+    step = max(1, (BLOCK if metric == '76' else BLOCK_2000) // len(matrix))
+    if rows:
+        step = min(step, rows)
+    norms = (matrix ** 2).sum(axis=1)
+    for start in range(0, len(labs), step):
+        block = labs[start:start + step]
+        if metric == '76':
+            distances = norms - 2 * block.dot(matrix.T)
+        else:
+            distances = colorspace.delta_e2000_array(numpy, block[:, None, :], matrix[None, :, :])
+        ids[start:start + step] = distances.argmin(axis=1)
+    return ids
+
+class Quantizer(object):
+    """ Maps images onto the swatches of a palette
+        
+        `palette` is a `swatch.Palette`, a list as returned by
+        `swatch.parse(…)` or the name of an ``.ase`` file. `bits` is the
+        precision of the lookup table – ``2 ** bits`` cells per channel (at
+        most 8, where every 8-bit color has a cell of its own) – and `metric`
+        is the color difference used to fill it, ΔE76 (``'76'``) or
+        CIEDE2000 (``'2000'``). `jobs` is the number of threads images are
+        mapped with, defaulting to the number of CPUs.
+        
+        • ``colors``: the swatches as an ``(N, 3)`` ``uint8`` sRGB array
+        • ``names``: their names
+        • ``lut``: the nearest swatch for each cell, as a flat array
+    """
+    
+    def __init__(self, palette, bits=5, metric='76', jobs=None):
+        from .palette import Palette
+        if isinstance(palette, str):
+            palette = Palette.from_file(palette)
+        elif not isinstance(palette, Palette):
+            palette = Palette.from_objects(palette)
+        if not len(palette):
+            raise ValueError("can't quantize to an empty palette")
+        if not 1 <= bits <= 8:
+            raise ValueError("bits must be between 1 and 8, not %r" % bits)
+        self.bits = bits
+        self.metric = metric
+        self.jobs = jobs or os.cpu_count() or 1
+        self.names = [palette.name(index) for index in range(len(palette))]
+        rgb = colorspace.convert_palette(palette, 'RGB', use_numpy=True)
+        self.colors = numpy.rint(numpy.clip(rgb, 0, 1) * 255).astype(numpy.uint8)
+        self.labs = colorspace.convert_palette(palette, 'CIELAB', use_numpy=True)
+        self.dtype = numpy.uint8 if len(palette) <= 256 else numpy.uint16
+        self.lut = self.build()
+    
+    def __len__(self):
+        return len(self.colors)
+    
+    def build(self):
+        """ Match the center of every cell of the RGB cube to its nearest swatch """
+        cells = 1 << self.bits
+        width = 256 // cells
+        centers = (numpy.arange(cells) * width + (width - 1) / 2.0) / 255.0
+        cube = numpy.stack(numpy.meshgrid(centers, centers, centers, indexing='ij'), axis=-1)
+        labs = colorspace.convert(cube.reshape(-1, 3), 'RGB', 'CIELAB', use_numpy=True)
+        return nearest_ids(labs, self.labs, self.metric).astype(self.dtype)
+    
+    def keys(self, pixels):
+        """ Return the lookup table cell of every pixel of a ``uint8`` image """
+        bits, shift = self.bits, 8 - self.bits
+        dtype = numpy.uint16 if bits <= 5 else numpy.uint32
+        keys = (pixels[..., 0] >> shift).astype(dtype)
+        keys <<= bits
+        keys |= pixels[..., 1] >> shift
+        keys <<= bits
+        keys |= pixels[..., 2] >> shift
+        return keys
+    
+    def indices(self, image):
+        """ Return the index of the nearest swatch for every pixel of `image` """
+        pixels = as_pixels(image)
+        output = numpy.empty(pixels.shape[:2], dtype=self.dtype)
+        def band(rows):
+            self.lut.take(self.keys(pixels[rows]), out=output[rows])
+        self.bands(band, len(pixels))
+        return output
+    
+    def remap(self, indices, alpha=None):
+        """ Return the image of the swatch colors for an array of `indices` """
+        remapped = self.colors.take(indices, axis=0)
+        if alpha is not None:
+            remapped = numpy.concatenate((remapped, alpha[..., None]), axis=-1)
+        return remapped
+    
+    def quantize(self, image, dither=False):
+        """ Map `image` onto the palette, returning ``(indices, remapped)``
+            
+            `indices` holds the index of each pixel’s swatch (see ``names`` and
+            ``colors``), and `remapped` is the image redrawn in the swatches’
+            colors, as ``uint8``. With `dither`, the error of each pixel is
+            diffused into the next row (see ``dithered_indices``).
+        """
+        pixels = as_pixels(image)
+        if dither:
+            indices = self.dithered_indices(pixels)
+        else:
+            indices = self.indices(pixels)
+        alpha = pixels[..., 3] if pixels.shape[-1] == 4 else None
+        return indices, self.remap(indices, alpha)
+    
+    def dithered_indices(self, image):
+        """ ``indices(…)``, with error-diffusion dithering
+            
+            Floyd–Steinberg’s rightward share of the error can only be applied
+            one pixel at a time; here the whole error is spread over the three
+            pixels below instead (¼, ½, ¼), so that each row is mapped in one
+            vectorized step. Rows depend on the one above, so this runs in a
+            single thread.
+        """
+        pixels = as_pixels(image)
+        height, width = pixels.shape[:2]
+        output = numpy.empty((height, width), dtype=self.dtype)
+        colors = self.colors.astype(numpy.float32)
+        carried = numpy.zeros((width, 3), dtype=numpy.float32)
+        spread = numpy.empty_like(carried)
+        for y in range(height):
+            row = pixels[y, :, :3] + carried
+            numpy.clip(row, 0, 255, out=row)
+            indices = self.lut.take(self.keys(row.astype(numpy.uint8)))
+            output[y] = indices
+            error = row - colors.take(indices, axis=0)
+            numpy.multiply(error, 0.5, out=spread)
+            spread[1:] += error[:-1] * 0.25
+            spread[:-1] += error[1:] * 0.25
+            carried, spread = spread, carried
+        return output
+    
+    def iter_quantize(self, tiles, dither=False):
+        """ Generate ``quantize(tile, dither)`` for every image in `tiles` """
+        for tile in tiles:
+            yield self.quantize(tile, dither)
+    
+    def bands(self, function, height):
+        """ Call `function` with a ``slice`` for every band of rows, across threads """
+        jobs = min(self.jobs, max(1, height // 64))
+        if jobs == 1:
+            function(slice(0, height))
+            return
+        # a few bands per thread, so that an uneven band doesn't hold up the rest
+        step = -(-height // (jobs * 4))
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(function, [slice(start, start + step)
+                                         for start in range(0, height, step)]))
+
+def as_pixels(image):
+    """ Return `image` as a ``(height, width, channels)`` ``uint8`` array """
+    image = numpy.asarray(image)
+    if image.ndim != 3 or image.shape[-1] not in (3, 4):
+        raise ValueError("expected a (height, width, 3 or 4) image, not %r" % (image.shape,))
+    if image.dtype == numpy.uint8:
+        return image
+    if image.dtype.kind == 'f':
+        return numpy.rint(numpy.clip(image, 0, 1) * 255).astype(numpy.uint8)
+    return numpy.clip(image, 0, 255).astype(numpy.uint8)
+
+def quantize(palette, image, dither=False, bits=5, metric='76'):
+    """ Map `image` onto `palette`, returning ``(indices, remapped)``
+        
+        A shortcut for ``Quantizer(palette, bits, metric).quantize(image, dither)``
+        – keep the ``Quantizer`` around to map many images onto one palette.
+    """
+    return Quantizer(palette, bits, metric).quantize(image, dither)
@@ -10,7 +10,61 @@ With notes from:
 All Rights Reserved
 MIT Licensed, see LICENSE.TXT for details
 """
+from collections.abc import Mapping
+from codecs import utf_16_be_encode
+from contextlib import contextmanager
+from time import perf_counter
+import io
+import os
 import struct
+import tempfile
+
+from .objects import Color, Group, Mode, encode_title
+from .parser import (COLLECTOR, CHUNK_HEAD, COLOR_CHUNK, FOLDER_CHUNK, FOLDER_END_CHUNK,
+                     FILE_HEADER, HEADER, V_MAJOR, V_MINOR)
+
+# the permissions ``open(…)`` gives a new file, once the umask is known
+CREATION_MODE = None
+
+def creation_mode():
+    global CREATION_MODE
+    if CREATION_MODE is None:
+        umask = os.umask(0o022)
+        os.umask(umask)
+        CREATION_MODE = 0o666 & ~umask
+    return CREATION_MODE
+
+@contextmanager
+def replacing(destination, mode='wb', sync=True, **options):
+    """ Open a temporary file beside `destination` for writing, and rename it
+        over `destination` once the ``with`` block is done
+        
+        Nobody ever sees a partly written `destination`: if the block raises,
+        the temporary file is removed and `destination` is left as it was. An
+        existing `destination` keeps its permissions, and a new one gets those
+        ``open(…)`` would give it. With `sync`, the data is flushed to disk
+        before the rename. `mode` and `options` are as for ``io.open(…)``.
+    """
+    directory = os.path.dirname(os.path.abspath(destination))
+    descriptor, temporary = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with io.open(descriptor, mode, **options) as handle:
+            yield handle
+            handle.flush()
+            if sync:
+                os.fsync(handle.fileno())
+        try:
+            permissions = os.stat(destination).st_mode & 0o7777
+        except FileNotFoundError:
+            permissions = creation_mode()
+        os.chmod(temporary, permissions)
+        os.replace(temporary, destination)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
 
 
 def chunk_count(swatch):
@@ -20,11 +74,15 @@ def chunk_count(swatch):
         returning 1 for a single color and 2 for each folder –
         plus 1 for each color it contains.
     """
-    if type(swatch) is dict:
+    if type(swatch) is dict or isinstance(swatch, Mapping):
         if 'data' in swatch:
             return 1
         if 'swatches' in swatch:
             return 2 + len(swatch['swatches'])
+    elif isinstance(swatch, Color):
+        return 1
+    elif isinstance(swatch, Group):
+        return 2 + len(swatch.swatches)
     else:
         return sum(map(chunk_count, swatch))
 
@@ -36,6 +94,8 @@ COLOR_MODES = { b'RGB'  : '!fff',
 
 def chunk_for_object(obj):
     """ Return an encoded byte-chunk for a color or a folder """
+    if isinstance(obj, (Color, Group)):
+        return b''.join(chunks_for_object(obj))
     chunk_type = obj.get('type')
     if chunk_type == 'Color Group':
         return chunk_for_folder(obj)
@@ -68,26 +128,8 @@ def chunk_for_color(obj):
         that the global/spot/process short is a terminator, it's actually used
         to indicate how Illustrator should deal with the color.
     """
-    title = obj['name'] + '\0'
-    title_length = len(title)
-    chunk = struct.pack('>H', title_length)
-    chunk += title.encode('utf-16be')
-    
-    mode = obj['data']['mode'].encode()
-    values = obj['data']['values']
-    color_type = obj['type']
-    
-    if mode in COLOR_MODES:
-        padded_mode = mode.decode().ljust(4).encode()
-        chunk += struct.pack('!4s', padded_mode)         # the color mode
-        chunk += struct.pack(COLOR_MODES[mode], *values) # the color values
-    
-    if color_type in COLOR_TYPES:
-        color_int = COLOR_TYPES.index(color_type)
-        chunk += struct.pack('>h', color_int) # append swatch mode
-    
-    chunk = struct.pack('>I', len(chunk)) + chunk # prepend the chunk size
-    return b'\x00\x01' + chunk # swatch color header
+    codec, args = color_record(obj)
+    return codec.pack(*args)
 
 def chunk_for_folder(obj):
     """ Produce a byte-chunk for a folder of colors.
@@ -111,18 +153,346 @@ def chunk_for_folder(obj):
         they're just a terminating string – but there's something nice about
         how the b'\xC0\x02' matches with the folder's header.
     """
-    title = obj['name'] + '\0'
-    title_length = len(title)
-    chunk_body = struct.pack('>H', title_length) # title length
-    chunk_body += title.encode('utf-16be') # title
+    return b''.join(chunks_for_object(obj))
 
-    chunk_head = b'\xC0\x01' # folder header
-    chunk_head += struct.pack('>I', len(chunk_body))
-    # precede entire chunk by folder header and size of folder
-    chunk = chunk_head + chunk_body
 
-    chunk += b''.join([chunk_for_color(c) for c in obj['swatches']])
+FOLDER_END = struct.pack('>HI', FOLDER_END_CHUNK, 0)
+MODE_CODES = dict((mode.value, mode.code) for mode in Mode)
+TYPE_CODES = dict((color_type, index) for index, color_type in enumerate(COLOR_TYPES))
 
-    chunk += b'\xC0\x02' # folder terminator chunk
-    chunk += b'\x00\x00\x00\x00' # folder terminator
-    return chunk
+# the size of a color chunk in each mode, less its title
+CHUNK_BODIES = dict((mode.value, CHUNK_HEAD.size + 2 + mode.struct.size) for mode in Mode)
+
+# whole-chunk codecs, by mode (or None, for folders) and then by the size of
+# the encoded title: a color chunk is a single struct – chunk head, title,
+# padded mode, the color values and the global/spot/process short – so it is
+# packed with one call. (The title field is one NUL wider than the name, so
+# ``struct`` pads in the terminator itself.)
+CHUNK_STRUCTS = dict((mode, {}) for mode in [None] + [mode.value for mode in Mode])
+
+def chunk_struct(mode, title_size):
+    """ Return the ``struct.Struct`` for a color chunk in `mode` (or a folder
+        head, for ``None``) whose encoded title is `title_size` bytes long
+    """
+    structs = CHUNK_STRUCTS[mode]
+    codec = structs.get(title_size)
+    if codec is None:
+        if mode is None:
+            codec = struct.Struct('>HIH%ds' % title_size)
+        else:
+            codec = struct.Struct('>HIH%ds4s%dfh' % (title_size, Mode(mode).width))
+        structs[title_size] = codec
+    return codec
+
+def color_record(obj):
+    """ Return the ``(codec, arguments)`` that pack the chunk for the color `obj` """
+    if isinstance(obj, Color):
+        title = encode_title(obj.name)
+        mode = obj.mode
+        codec = chunk_struct(mode.value, len(title))
+        return codec, (COLOR_CHUNK, codec.size - CHUNK_HEAD.size, len(title) >> 1, title,
+                       mode.code) + obj.values + (obj.type,)
+    title = encode_title(obj['name'])
+    data = obj['data']
+    mode = data['mode']
+    codec = chunk_struct(mode, len(title))
+    return codec, (COLOR_CHUNK, codec.size - CHUNK_HEAD.size, len(title) >> 1, title,
+                   MODE_CODES[mode]) + tuple(data['values']) + (TYPE_CODES[obj['type']],)
+
+def folder_record(name):
+    """ Return the ``(codec, arguments)`` that pack the head chunk of the folder `name` """
+    title = encode_title(name)
+    codec = chunk_struct(None, len(title))
+    return codec, (FOLDER_CHUNK, codec.size - CHUNK_HEAD.size, len(title) >> 1, title)
+
+def group_items(obj):
+    """ Return the name and colors of `obj` if it is a folder, or ``None`` """
+    if isinstance(obj, Group):
+        return obj.name, obj.swatches
+    if (type(obj) is dict or isinstance(obj, Mapping)) and obj.get('type') == 'Color Group':
+        return obj['name'], obj['swatches']
+    return None
+
+def pack_color_into(buf, offset, obj):
+    """ Pack the chunk for the color `obj` into `buf`, starting at `offset`
+        
+        `buf` must be writable and large enough (see ``color_chunk_size``);
+        returns the offset just past the packed chunk.
+    """
+    codec, args = color_record(obj)
+    codec.pack_into(buf, offset, *args)
+    return offset + codec.size
+
+def color_chunk_size(obj):
+    """ Return the total size in bytes of the chunk for the color `obj` """
+    return color_record(obj)[0].size
+
+def chunks_for_object(obj):
+    """ Generate the byte-chunks for a color, or for a folder and each of its colors """
+    group = group_items(obj)
+    if group is None:
+        yield chunk_for_color(obj)
+        return
+    name, swatches = group
+    codec, args = folder_record(name)
+    yield codec.pack(*args)
+    for color in swatches:
+        yield chunk_for_color(color)
+    yield FOLDER_END
+
+def title_size(name):
+    """ Return the size in bytes of `name`, encoded as a title """
+    if name.isascii():
+        return 2 * len(name) + 2
+    return len(encode_title(name))
+
+def encoded_size(obj):
+    """ Return the exact size in bytes of the encoded swatch list `obj`, and its chunk count """
+    size = FILE_HEADER.size
+    count = 0
+    bodies = CHUNK_BODIES
+    for item in obj:
+        group = group_items(item)
+        if group is None:
+            colors = (item,)
+        else:
+            size += CHUNK_HEAD.size + 2 + title_size(group[0]) + len(FOLDER_END)
+            count += 2
+            colors = group[1]
+        count += len(colors)
+        for color in colors:
+            if type(color) is dict or not isinstance(color, Color):
+                name = color['name']
+                size += bodies[color['data']['mode']]
+            else:
+                name = color.name
+                size += bodies[color.mode.value]
+            size += 2 * len(name) + 2 if name.isascii() else title_size(name)
+    return size, count
+
+def pack_into(buf, offset, obj):
+    """ Pack the chunks of the swatch list `obj` into `buf`, starting at `offset`
+        
+        `buf` must be writable and large enough (see ``encoded_size``);
+        returns the offset just past the last packed chunk. Each chunk is
+        packed with a single call, spelled out for each color width – calls
+        with ``*values`` are markedly slower.
+    """
+    structs = CHUNK_STRUCTS
+    mode_codes = MODE_CODES
+    type_codes = TYPE_CODES
+    head_size = CHUNK_HEAD.size
+    folder_end = len(FOLDER_END)
+    for item in obj:
+        group = group_items(item)
+        if group is None:
+            colors = (item,)
+        else:
+            codec, args = folder_record(group[0])
+            codec.pack_into(buf, offset, *args)
+            offset += codec.size
+            colors = group[1]
+        for color in colors:
+            if type(color) is dict or not isinstance(color, Color):
+                title = utf_16_be_encode(color['name'])[0]
+                data = color['data']
+                mode = data['mode']
+                code = mode_codes[mode]
+                values = data['values']
+                color_type = type_codes[color['type']]
+            else:
+                title = utf_16_be_encode(color.name)[0]
+                code = color.mode.code
+                mode = color.mode.value
+                values = color.values
+                color_type = color.type
+            title_size = len(title) + 2
+            codec = structs[mode].get(title_size) or chunk_struct(mode, title_size)
+            width = len(values)
+            if width == 3:
+                codec.pack_into(buf, offset, COLOR_CHUNK, codec.size - head_size, title_size >> 1,
+                                title, code, values[0], values[1], values[2], color_type)
+            elif width == 4:
+                codec.pack_into(buf, offset, COLOR_CHUNK, codec.size - head_size, title_size >> 1,
+                                title, code, values[0], values[1], values[2], values[3], color_type)
+            elif width == 1:
+                codec.pack_into(buf, offset, COLOR_CHUNK, codec.size - head_size, title_size >> 1,
+                                title, code, values[0], color_type)
+            else:
+                codec.pack_into(buf, offset, COLOR_CHUNK, codec.size - head_size, title_size >> 1,
+                                title, code, *(tuple(values) + (color_type,)))
+            offset += codec.size
+        if group is not None:
+            buf[offset:offset + folder_end] = FOLDER_END
+            offset += folder_end
+    return offset
+
+def encode(obj):
+    """ Encode a whole swatch list – file header included – as ``bytes``
+        
+        The exact size of the output is computed first, so that every chunk
+        can then be packed straight into a single preallocated buffer.
+    """
+    if not isinstance(obj, (list, tuple)):
+        obj = list(obj)
+    collector = COLLECTOR.get()
+    if collector is not None:
+        return profiled_encode(collector, obj)
+    size, count = encoded_size(obj)
+    return bytes(pack_file(obj, size, count))
+
+def pack_file(obj, size, count):
+    """ Pack the file header and the chunks of `obj` into a new ``bytearray``
+        of the `size` and chunk `count` given by ``encoded_size(obj)``
+        
+        Should `obj` no longer match that size – its colors changed, or were
+        an iterator consumed by the sizing – a ``RuntimeError`` is raised.
+    """
+    buf = bytearray(size)
+    FILE_HEADER.pack_into(buf, 0, HEADER, V_MAJOR, V_MINOR, count)
+    end = pack_into(buf, FILE_HEADER.size, obj)
+    if end != size:
+        raise RuntimeError("swatches sized at %d bytes were packed into %d bytes" % (size, end))
+    return buf
+
+def profiled_encode(collector, obj):
+    """ ``encode(obj)``, reporting to the `swatch.instrument.Collector` `collector` """
+    began = perf_counter()
+    size, count = encoded_size(obj)
+    sized = perf_counter()
+    buf = pack_file(obj, size, count)
+    packed = perf_counter()
+    
+    collector.timings['sizing'] += sized - began
+    collector.timings['packing'] += packed - sized
+    folders = sum(1 for item in obj if group_items(item) is not None)
+    collector.written['color'] += count - 2 * folders
+    collector.written['folder'] += folders
+    collector.written['folder-end'] += folders
+    collector.bytes_written += size
+    return bytes(buf)
+
+class Writer(object):
+    """ Write colors and folders straight to a binary file object, one chunk at a time
+        
+        Each chunk is packed into a reusable, preallocated ``bytearray`` and
+        handed to `handle` as soon as it is complete, so nothing larger than
+        a single chunk is ever held in memory:
+            
+            >>> with swatch.Writer(handle) as out:
+            ...     out.start_group('Accent Colors')
+            ...     for color in colors_from_database():
+            ...         out.write_color(color)
+            ...     out.end_group()
+        
+        The ASE header records the number of chunks in the file. When
+        `chunk_count` is known up front it is written immediately (and checked
+        on ``close()``) – otherwise a placeholder is written and backpatched
+        on ``close()``, which requires a seekable `handle`.
+        
+        A writer created within `swatch.instrument.collect()` reports every
+        chunk it writes to that collector.
+    """
+    
+    def __init__(self, handle, chunk_count=None):
+        seekable = getattr(handle, 'seekable', None)
+        if chunk_count is None and not (seekable and seekable()):
+            raise ValueError("chunk_count is required to write to a non-seekable stream")
+        self.handle = handle
+        self.chunk_count = chunk_count
+        self.chunks_written = 0
+        self.in_group = False
+        self.closed = False
+        self.buffer = bytearray(256)
+        self.collector = COLLECTOR.get()
+        if self.collector is not None:
+            self.collector.bytes_written += FILE_HEADER.size
+        self.header_offset = handle.tell() if chunk_count is None else None
+        handle.write(FILE_HEADER.pack(HEADER, V_MAJOR, V_MINOR, chunk_count or 0))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+    
+    def _reserve(self, size):
+        if len(self.buffer) < size:
+            # never resize in place – a previous write may still hold a view
+            self.buffer = bytearray(max(size, 2 * len(self.buffer)))
+        return self.buffer
+    
+    def write_color(self, obj):
+        """ Write a single color – a ``dict`` or a `swatch.Color` """
+        codec, args = color_record(obj)
+        buf = self._reserve(codec.size)
+        codec.pack_into(buf, 0, *args)
+        self.handle.write(memoryview(buf)[:codec.size])
+        self.chunks_written += 1
+        if self.collector is not None:
+            self.collector.wrote(COLOR_CHUNK, codec.size)
+    
+    def start_group(self, name):
+        """ Begin a folder named `name`; colors written until ``end_group()`` go in it """
+        if self.in_group:
+            self.end_group()
+        codec, args = folder_record(name)
+        buf = self._reserve(codec.size)
+        codec.pack_into(buf, 0, *args)
+        self.handle.write(memoryview(buf)[:codec.size])
+        self.chunks_written += 1
+        if self.collector is not None:
+            self.collector.wrote(FOLDER_CHUNK, codec.size)
+        self.in_group = True
+    
+    def end_group(self):
+        """ End the current folder – raising a ``ValueError`` if no folder is open """
+        if not self.in_group:
+            raise ValueError("no folder to end")
+        self.handle.write(FOLDER_END)
+        self.chunks_written += 1
+        if self.collector is not None:
+            self.collector.wrote(FOLDER_END_CHUNK, len(FOLDER_END))
+        self.in_group = False
+    
+    def write(self, obj):
+        """ Write a color or a folder – folders along with all their colors
+            
+            `obj` may be a legacy ``dict``, a `swatch.Color` or a `swatch.Group`.
+        """
+        group = group_items(obj)
+        if group is None:
+            self.write_color(obj)
+            return
+        name, swatches = group
+        self.start_group(name)
+        for color in swatches:
+            self.write_color(color)
+        self.end_group()
+    
+    def write_event(self, event, obj):
+        """ Write the chunk for an ``(event, object)`` pair, as generated by `swatch.iterparse(…)` """
+        if event == 'color':
+            self.write_color(obj)
+        elif event == 'start-group':
+            self.start_group(obj['name'])
+        elif event == 'end-group':
+            self.end_group()
+    
+    def close(self):
+        """ Finish any open folder and make sure the header’s chunk count is right """
+        if self.closed:
+            return
+        if self.in_group:
+            self.end_group()
+        self.closed = True
+        if self.header_offset is None:
+            if self.chunks_written != self.chunk_count:
+                raise ValueError("expected %d chunks, but %d were written" % (
+                                 self.chunk_count, self.chunks_written))
+        else:
+            position = self.handle.tell()
+            self.handle.seek(self.header_offset + 8)
+            self.handle.write(struct.pack('>I', self.chunks_written))
+            self.handle.seek(position)
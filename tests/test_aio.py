@@ -0,0 +1,81 @@
+# encoding: utf-8
+"""
+swatch.tests.test_aio
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+class TestSwatchAsyncio(unittest.TestCase):
+    """ Tests for aio.py """
+    
+    def read_fixture(self, basepath):
+        import os
+        with open(os.path.join("tests", "fixtures", basepath + ".ase"), "rb") as handle:
+            return handle.read()
+    
+    def stream_reader(self, data, piece=7):
+        """ Return a StreamReader that receives `data` a few bytes at a time """
+        import asyncio
+        reader = asyncio.StreamReader()
+        
+        async def trickle():
+            for start in range(0, len(data), piece):
+                reader.feed_data(data[start:start + piece])
+                await asyncio.sleep(0)
+            reader.feed_eof()
+        
+        return reader, trickle()
+    
+    def test_parse_stream(self):
+        import asyncio, swatch
+        from swatch import aio
+        for basepath in ("sampler", "solarized", "empty white folder"):
+            data = self.read_fixture(basepath)
+            
+            async def parse():
+                reader, trickle = self.stream_reader(data)
+                task = asyncio.ensure_future(trickle)
+                swatches = await aio.parse_stream(reader, read_size=5)
+                await task
+                return swatches
+            
+            self.assertEqual(swatch.parse_bytes(data), asyncio.run(parse()))
+    
+    def test_iterparse_stream(self):
+        import asyncio
+        from swatch import aio
+        data = self.read_fixture("single white swatch in folder")
+        
+        async def events():
+            reader, trickle = self.stream_reader(data, piece=3)
+            await trickle
+            return [event async for event, obj in aio.iterparse_stream(reader)]
+        
+        self.assertEqual(asyncio.run(events()), ['start-group', 'color', 'end-group'])
+    
+    def test_write_stream(self):
+        import asyncio, swatch
+        from swatch import aio
+        data = self.read_fixture("xterm colors")
+        
+        class Writer(object):
+            def __init__(self):
+                self.data = bytearray()
+                self.drains = 0
+            async def write(self, data):
+                self.data += data
+            async def drain(self):
+                self.drains += 1
+        
+        writer = Writer()
+        asyncio.run(aio.write_stream(swatch.parse_bytes(data), writer, write_size=1024))
+        self.assertEqual(data, bytes(writer.data))
+        self.assertGreater(writer.drains, 1)
+
+if __name__ == '__main__':
+    unittest.main()
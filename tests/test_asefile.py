@@ -0,0 +1,140 @@
+# encoding: utf-8
+"""
+swatch.tests.test_asefile
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+FIXTURES = ("white swatch no folder", "empty white folder", "single white swatch in folder",
+            "solarized", "sampler", "xterm colors")
+
+def flatten(obj):
+    colors = []
+    for item in obj:
+        colors.extend(item['swatches'] if item.get('type') == 'Color Group' else [item])
+    return colors
+
+class TestSwatchFile(unittest.TestCase):
+    """ Tests for asefile.py """
+    
+    def fixture(self, basepath):
+        import os
+        return os.path.join("tests", "fixtures", basepath + ".ase")
+    
+    def test_positions(self):
+        import swatch
+        for basepath in FIXTURES:
+            parsed = swatch.parse(self.fixture(basepath))
+            colors = flatten(parsed)
+            with swatch.open(self.fixture(basepath)) as lib:
+                self.assertEqual(len(colors), len(lib), basepath)
+                self.assertEqual(colors, list(lib), basepath)
+                self.assertEqual(colors[1:3], lib[1:3], basepath)
+                if colors:
+                    self.assertEqual(colors[-1], lib[-1], basepath)
+                self.assertEqual([color['name'] for color in colors], lib.names(), basepath)
+                groups = [item for item in parsed if item.get('type') == 'Color Group']
+                self.assertEqual([group['name'] for group in groups], lib.groups(), basepath)
+                for number, group in enumerate(groups):
+                    self.assertEqual(group, lib.group(number), basepath)
+                    self.assertEqual(group, lib.group(group['name']), basepath)
+    
+    def test_names(self):
+        import swatch
+        colors = flatten(swatch.parse(self.fixture("xterm colors")))
+        with swatch.open(self.fixture("xterm colors")) as lib:
+            for color in colors:
+                # the first color of a repeated name wins
+                first = next(other for other in colors if other['name'] == color['name'])
+                self.assertEqual(first, lib[color['name']])
+                self.assertIn(color['name'], lib)
+            self.assertNotIn('No Such Color', lib)
+            self.assertIsNone(lib.get('No Such Color'))
+            self.assertRaises(KeyError, lambda: lib['No Such Color'])
+            self.assertRaises(IndexError, lambda: lib[len(colors)])
+    
+    def test_objects(self):
+        import swatch
+        with swatch.open(self.fixture("sampler"), objects=True) as lib:
+            objects = swatch.parse(self.fixture("sampler"), objects=True)
+            self.assertEqual([item for item in objects if isinstance(item, swatch.Color)],
+                             [lib[position] for position in range(len(lib)) if lib.group_of(position) is None])
+            self.assertEqual([item for item in objects if isinstance(item, swatch.Group)],
+                             [lib.group(number) for number in range(len(lib.groups()))])
+    
+    def test_sidecar(self):
+        import swatch, os, shutil, tempfile
+        from swatch.asefile import INDEX_SUFFIX, ChunkIndex
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "xterm.ase")
+            shutil.copy(self.fixture("xterm colors"), path)
+            with swatch.open(path, sidecar=True) as lib:
+                built = lib.index
+            self.assertTrue(os.path.exists(path + INDEX_SUFFIX))
+            with swatch.open(path, sidecar=True) as lib:
+                self.assertIsNot(built, lib.index)
+                self.assertEqual(built.pack(), lib.index.pack())
+                self.assertEqual(swatch.parse(path)[0]['swatches'][7], lib[7])
+            
+            # a changed file makes the sidecar stale
+            swatch.write(swatch.parse(self.fixture("solarized")), path)
+            stat = os.stat(path)
+            self.assertIsNone(ChunkIndex.load(path + INDEX_SUFFIX, (stat.st_mtime_ns, stat.st_size)))
+            with swatch.open(path, sidecar=True) as lib:
+                self.assertEqual(flatten(swatch.parse(path)), list(lib))
+        finally:
+            shutil.rmtree(directory)
+    
+    def test_torn_sidecar(self):
+        import swatch, os, shutil, tempfile
+        from swatch.asefile import INDEX_SUFFIX, ChunkIndex
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "xterm.ase")
+            shutil.copy(self.fixture("xterm colors"), path)
+            with swatch.open(path, sidecar=True) as lib:
+                stamp = lib.index.stamp
+            with open(path + INDEX_SUFFIX, "rb") as handle:
+                packed = handle.read()
+            for torn in (packed[:-400], packed[:-4], packed + bytes(4)):
+                self.assertRaises(ValueError, ChunkIndex.unpack, torn)
+                with open(path + INDEX_SUFFIX, "wb") as handle:
+                    handle.write(torn)
+                self.assertIsNone(ChunkIndex.load(path + INDEX_SUFFIX, stamp))
+                with swatch.open(path, sidecar=True) as lib:
+                    self.assertEqual(len(lib), len(lib.index.groups))
+                    self.assertEqual(flatten(swatch.parse(path)), list(lib))
+        finally:
+            shutil.rmtree(directory)
+    
+    def test_corrupt(self):
+        import swatch, os, struct, tempfile
+        from unittest import mock
+        from swatch.asefile import ChunkIndex, SwatchFile
+        with open(self.fixture("sampler"), "rb") as handle:
+            data = handle.read()
+        long_name = bytearray(data)
+        struct.pack_into('>H', long_name, 18, 1000)  # the first chunk's name length
+        for bad in (data[:-3], data[:-9], data[:12] + b"\x00", bytes(long_name),
+                    data[:12] + b"\xc0\x09" + data[14:]):
+            self.assertRaises(swatch.ParseError, swatch.parse_bytes, bad)
+            self.assertRaises(swatch.ParseError, ChunkIndex.build, bad)
+        
+        close = SwatchFile.close
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corrupt.ase")
+            for bad in (b"ASEX" + data[4:], data[:-3]):
+                with open(path, "wb") as handle:
+                    handle.write(bad)
+                with mock.patch.object(SwatchFile, 'close', autospec=True, side_effect=close) as closed:
+                    self.assertRaises(swatch.ParseError, swatch.open, path)
+                self.assertEqual(1, closed.call_count)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+# encoding: utf-8
+"""
+swatch.tests.test_batch
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+class TestSwatchBatch(unittest.TestCase):
+    """ Tests for batch.py """
+    
+    def setUp(self):
+        import tempfile
+        super(TestSwatchBatch, self).setUp()
+        self.output = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.output)
+        super(TestSwatchBatch, self).tearDown()
+    
+    def fixtures(self, extension):
+        import glob, os
+        return sorted(glob.glob(os.path.join("tests", "fixtures", "*" + extension)))
+    
+    def test_convert_to_json(self):
+        import swatch, json
+        from swatch import batch
+        sources = self.fixtures(".ase")
+        results = batch.convert(sources, self.output, to='json', jobs=2, chunksize=2)
+        self.assertEqual([result.source for result in results], sources)
+        for result in results:
+            self.assertIsNone(result.error)
+            with open(result.destination) as handle:
+                self.assertEqual(swatch.parse(result.source), json.load(handle))
+    
+    def test_convert_to_ase(self):
+        from swatch import batch
+        sources = self.fixtures(".json")
+        for result in batch.convert(sources, self.output, to='ase', jobs=1):
+            self.assertIsNone(result.error)
+            with open(result.source[:-len(".json")] + ".ase", "rb") as expected:
+                with open(result.destination, "rb") as generated:
+                    self.assertEqual(expected.read(), generated.read())
+    
+    def test_errors_per_file(self):
+        import os
+        from swatch import batch
+        bogus = os.path.join(self.output, "bogus.ase")
+        with open(bogus, "wb") as handle:
+            handle.write(b"not an ase file")
+        sources = [bogus] + self.fixtures(".ase")[:1]
+        results = batch.convert(sources, os.path.join(self.output), to='json', jobs=2)
+        self.assertIsNotNone(results[0].error)
+        self.assertIsNone(results[1].error)
+    
+    def test_command_line(self):
+        from swatch.__main__ import main
+        self.assertEqual(main(['convert', '-j', '1', '-o', self.output] + self.fixtures(".ase")), 0)
+        self.assertEqual(main(['convert', '-j', '1', '-o', self.output, 'missing.ase']), 1)
+    
+    def test_convert_onto_itself(self):
+        import os, shutil
+        from swatch.__main__ import main
+        source = os.path.join(self.output, "sampler.ase")
+        shutil.copy(os.path.join("tests", "fixtures", "sampler.ase"), source)
+        with open(source, "rb") as handle:
+            original = handle.read()
+        self.assertEqual(main(['convert', '-j', '1', '-t', 'ase', '-o', self.output, source]), 1)
+        with open(source, "rb") as handle:
+            self.assertEqual(original, handle.read())
+    
+    def test_colliding_destinations(self):
+        import os, shutil
+        from swatch import batch
+        from swatch.__main__ import main
+        sources = []
+        for directory in ("a", "b"):
+            os.mkdir(os.path.join(self.output, directory))
+            sources.append(os.path.join(self.output, directory, "x.ase"))
+            shutil.copy(os.path.join("tests", "fixtures", "sampler.ase"), sources[-1])
+        converted = os.path.join(self.output, "converted")
+        self.assertRaises(ValueError, batch.convert, sources, converted)
+        self.assertEqual(main(['convert', '-j', '1', '-o', converted] + sources), 1)
+        self.assertFalse(os.path.exists(converted))
+    
+    def test_convert_generator(self):
+        import os
+        from swatch import batch
+        sources = [os.path.join("tests", "fixtures", name + ".ase") for name in ("sampler", "solarized")]
+        results = batch.convert((source for source in sources), self.output, jobs=1)
+        self.assertEqual(sources, [result.source for result in results])
+        self.assertTrue(all(result.error is None for result in results))
+    
+    def test_failed_convert_keeps_destination(self):
+        import os
+        from swatch import batch
+        destination = os.path.join(self.output, "bogus.json")
+        with open(destination, "w") as handle:
+            handle.write("[]")
+        result = batch.convert_file(self.bogus(), destination)
+        self.assertIn('ParseError', result.error)
+        with open(destination) as handle:
+            self.assertEqual("[]", handle.read())
+        self.assertEqual(sorted(os.listdir(self.output)), ["bogus.ase", "bogus.json"])
+    
+    def run_main(self, *argv):
+        import io, json
+        from contextlib import redirect_stdout
+        from swatch.__main__ import main
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = main(list(argv))
+        return status, [json.loads(line) for line in output.getvalue().splitlines()]
+    
+    def bogus(self):
+        import os
+        bogus = os.path.join(self.output, "bogus.ase")
+        with open(bogus, "wb") as handle:
+            handle.write(b"ASEF\x00\x01\x00\x00\x00\x00\x00\x01\x00\x01")
+        return bogus
+    
+    def test_expand(self):
+        import os
+        from swatch import batch
+        fixtures = os.path.join("tests", "fixtures")
+        ase = self.fixtures(".ase")
+        self.assertEqual(batch.expand([fixtures]), ase)
+        self.assertEqual(batch.expand([os.path.join(fixtures, "*.ase"), ase[0]]), ase)
+        self.assertEqual(batch.expand(["missing.ase"]), ["missing.ase"])
+        self.assertEqual(batch.expand([os.path.join(fixtures, "*.missing")]), [])
+    
+    def test_validate_command(self):
+        status, reports = self.run_main('validate', '-j', '1', *self.fixtures(".ase"))
+        self.assertEqual(status, 0)
+        self.assertEqual(len(reports), len(self.fixtures(".ase")))
+        self.assertTrue(all(report['valid'] for report in reports))
+        
+        status, reports = self.run_main('validate', '-j', '2', '-q', self.bogus(), *self.fixtures(".ase"))
+        self.assertEqual(status, 1)
+        self.assertEqual(len(reports), 1)
+        self.assertFalse(reports[0]['valid'])
+        self.assertIn('ParseError', reports[0]['error'])
+    
+    def test_info_and_stats_commands(self):
+        import os
+        sampler = os.path.join("tests", "fixtures", "sampler.ase")
+        status, reports = self.run_main('info', '-j', '1', sampler)
+        self.assertEqual(status, 0)
+        info = reports[0]
+        self.assertEqual(info['colors'], 5)
+        self.assertEqual(info['chunks']['folder'], 1)
+        self.assertEqual(sum(info['modes'].values()), 5)
+        self.assertEqual(info['size'], os.path.getsize(sampler))
+        
+        status, reports = self.run_main('stats', '-j', '1', os.path.join("tests", "fixtures"))
+        self.assertEqual(status, 0)
+        self.assertEqual(len(reports), 1)
+        stats = reports[0]
+        self.assertEqual(stats['files'], len(self.fixtures(".ase")))
+        self.assertEqual(stats['invalid'], 0)
+        self.assertEqual(sum(stats['modes'].values()), stats['colors'])
+    
+    def test_dump_json_command(self):
+        import swatch
+        sources = self.fixtures(".ase")[:2]
+        status, reports = self.run_main('dump-json', '-j', '1', *sources)
+        self.assertEqual(status, 0)
+        for report in reports:
+            self.assertEqual(report['swatches'], swatch.parse(report['file']))
+    
+    def test_no_files(self):
+        import os
+        status, reports = self.run_main('validate', os.path.join("tests", "fixtures", "*.missing"))
+        self.assertEqual(status, 2)
+        self.assertEqual(reports, [])
+
+if __name__ == '__main__':
+    unittest.main()
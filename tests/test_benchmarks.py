@@ -0,0 +1,41 @@
+# encoding: utf-8
+"""
+swatch.tests.test_benchmarks
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+class TestSwatchBenchmarks(unittest.TestCase):
+    """ Smoke tests for benchmarks/bench_swatch.py """
+    
+    def test_synthetic_palette(self):
+        import swatch
+        from benchmarks import bench_swatch
+        palette = bench_swatch.synthetic_palette(25, group_size=10)
+        self.assertEqual(len(palette), 3)
+        self.assertEqual(bench_swatch.swatch_count(palette), 25)
+        data = swatch.dumps(palette)
+        self.assertEqual(data, swatch.dumps(swatch.parse_bytes(data)))
+    
+    def test_report(self):
+        import json, os, tempfile
+        from benchmarks import bench_swatch
+        descriptor, output = tempfile.mkstemp(suffix=".json")
+        os.close(descriptor)
+        try:
+            bench_swatch.main(['--no-corpus', '-s', '10', '-r', '1', '-o', output])
+            with open(output) as handle:
+                report = json.load(handle)
+        finally:
+            os.unlink(output)
+        self.assertEqual(sorted(result['benchmark'] for result in report['results']),
+                         ['dumps', 'parse', 'roundtrip'])
+        self.assertEqual(report['meta']['swatch_version'], __import__('swatch').__version__)
+
+if __name__ == '__main__':
+    unittest.main()
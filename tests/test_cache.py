@@ -0,0 +1,163 @@
+# encoding: utf-8
+"""
+swatch.tests.test_cache
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+class TestSwatchCache(unittest.TestCase):
+    """ Tests for cache.py """
+    
+    def setUp(self):
+        import tempfile
+        super(TestSwatchCache, self).setUp()
+        self.directory = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.directory)
+        super(TestSwatchCache, self).tearDown()
+    
+    def fixture(self, basepath):
+        import os
+        return os.path.join("tests", "fixtures", basepath + ".ase")
+    
+    def test_pack_round_trip(self):
+        import swatch
+        for basepath in ("sampler", "solarized", "empty white folder", "xterm colors"):
+            palette = swatch.Palette.from_file(self.fixture(basepath))
+            unpacked = swatch.Palette.unpack(palette.pack())
+            self.assertEqual(palette.to_list(), unpacked.to_list())
+        self.assertRaises(ValueError, swatch.Palette.unpack, b'ASEF' + bytes(60))
+    
+    def test_hits_and_misses(self):
+        import swatch
+        from swatch.cache import ParseCache
+        cache = ParseCache(self.directory)
+        for basepath in ("sampler", "solarized"):
+            expected = swatch.parse(self.fixture(basepath))
+            self.assertEqual(expected, swatch.parse(self.fixture(basepath), cache=cache))
+            self.assertEqual(expected, swatch.parse(self.fixture(basepath), cache=cache))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        self.assertEqual(len(cache.entries()), 2)
+    
+    def test_invalidation(self):
+        import os, shutil, swatch
+        from swatch.cache import ParseCache
+        cache = ParseCache(self.directory, verify=True)
+        path = os.path.join(self.directory, "palette.ase")
+        shutil.copy(self.fixture("sampler"), path)
+        cache.load(path)
+        shutil.copy(self.fixture("solarized"), path)
+        os.utime(path, (0, 0))
+        self.assertEqual(swatch.parse(path), cache.parse(path))
+        self.assertEqual(cache.misses, 2)
+    
+    def test_changed_while_parsing(self):
+        import os, shutil, swatch
+        from unittest import mock
+        from swatch.cache import ParseCache
+        cache = ParseCache(self.directory)
+        path = os.path.join(self.directory, "palette.ase")
+        shutil.copy(self.fixture("sampler"), path)
+        from_bytes = swatch.Palette.from_bytes
+        
+        def rewritten(data):
+            # the file changes after it was read, but before its entry is stored
+            shutil.copy(self.fixture("solarized"), path)
+            return from_bytes(data)
+        
+        with mock.patch.object(swatch.Palette, 'from_bytes', side_effect=rewritten):
+            self.assertEqual(swatch.parse(self.fixture("sampler")), cache.parse(path))
+        self.assertIsNone(cache.get(path))
+        self.assertEqual(swatch.parse(path), cache.parse(path))
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+    
+    def test_eviction(self):
+        from swatch.cache import ParseCache
+        cache = ParseCache(self.directory)
+        cache.load(self.fixture("xterm colors"))
+        size = cache.entries()[0][1]
+        cache.max_bytes = size + 1
+        cache.load(self.fixture("sampler"))
+        cache.load(self.fixture("solarized"))
+        self.assertLessEqual(sum(entry[1] for entry in cache.entries()), size + 1)
+        cache.clear()
+        self.assertEqual(cache.entries(), [])
+    
+    def test_memory_cache(self):
+        import swatch
+        from swatch.cache import MemoryCache, thaw
+        cache = MemoryCache()
+        expected = swatch.parse(self.fixture("sampler"))
+        first = swatch.parse(self.fixture("sampler"), cache=cache)
+        self.assertEqual(expected, thaw(first))
+        self.assertIs(first, cache.parse(self.fixture("sampler")))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+    
+    def test_memory_cache_is_frozen(self):
+        from swatch.cache import MemoryCache, thaw
+        import swatch
+        cache = MemoryCache()
+        tree = cache.parse(self.fixture("solarized"))
+        with self.assertRaises(TypeError):
+            tree[0]['name'] = 'oops'
+        self.assertIsInstance(tree[0]['swatches'], tuple)
+        palette = cache.load(self.fixture("solarized"))
+        self.assertRaises(TypeError, palette.values['LAB'].__setitem__, 0, 1.0)
+        self.assertEqual(swatch.parse(self.fixture("solarized")), thaw(tree))
+    
+    def test_memory_cache_round_trip(self):
+        import io, os, swatch
+        from swatch.cache import MemoryCache, thaw
+        for name in ("sampler", "solarized", "white swatch no folder"):
+            tree = MemoryCache().parse(self.fixture(name))
+            with open(self.fixture(name), "rb") as handle:
+                raw = handle.read()
+            self.assertEqual(raw, swatch.dumps(tree))
+            handle = io.BytesIO()
+            swatch.dump(tree, handle)
+            self.assertEqual(raw, handle.getvalue())
+            for extension in (".json", ".ndjson"):
+                path = os.path.join(self.directory, name + extension)
+                swatch.formats.write(tree, path)
+                self.assertEqual(thaw(tree), swatch.formats.parse(path))
+    
+    def test_memory_cache_invalidation(self):
+        import os, shutil
+        from swatch.cache import MemoryCache
+        cache = MemoryCache()
+        discarded = []
+        cache.on_invalidate(discarded.append)
+        path = os.path.join(self.directory, "palette.ase")
+        shutil.copy(self.fixture("sampler"), path)
+        before = cache.parse(path)
+        shutil.copy(self.fixture("solarized"), path)
+        os.utime(path, (0, 0))
+        self.assertNotEqual(before, cache.parse(path))
+        self.assertEqual(len(discarded), 1)
+        cache.invalidate(path)
+        self.assertNotIn(path, cache)
+        self.assertEqual(len(discarded), 2)
+    
+    def test_memory_cache_bounds(self):
+        from swatch.cache import MemoryCache
+        cache = MemoryCache(max_entries=2)
+        for basepath in ("sampler", "solarized", "xterm colors"):
+            cache.load(self.fixture(basepath))
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn(self.fixture("sampler"), cache)
+        cache.max_bytes = 1
+        cache.parse(self.fixture("solarized"))
+        self.assertEqual(len(cache), 0)
+        cache.clear()
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
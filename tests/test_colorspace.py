@@ -0,0 +1,71 @@
+# encoding: utf-8
+"""
+swatch.tests.test_colorspace
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import pytest
+import unittest
+
+class TestSwatchColorspace(unittest.TestCase):
+    """ Tests for colorspace.py """
+    
+    def assertRowsAlmostEqual(self, first, second, places=4):
+        self.assertEqual(len(first), len(second))
+        for row, other in zip(first, second):
+            for value, expected in zip(row, other):
+                self.assertAlmostEqual(value, expected, places=places)
+    
+    def test_known_values(self):
+        from swatch import colorspace
+        lab = colorspace.convert([(1, 0, 0), (1, 1, 1), (0, 0, 0)], 'RGB', 'CIELAB', use_numpy=False)
+        self.assertRowsAlmostEqual(lab, [(54.2917, 80.8125, 69.8850),
+                                         (100.0, 0.0, 0.0),
+                                         (0.0, 0.0, 0.0)], places=3)
+    
+    def test_round_trips(self):
+        from swatch import colorspace
+        rgb = [(0.2, 0.5, 0.7), (1.0, 0.0, 0.0), (0.01, 0.02, 0.03), (0.5, 0.5, 0.5)]
+        for space in ('LAB', 'CIELAB', 'XYZ', 'linearRGB', 'CMYK'):
+            there = colorspace.convert(rgb, 'RGB', space, use_numpy=False)
+            back = colorspace.convert(there, space, 'RGB', use_numpy=False)
+            self.assertRowsAlmostEqual(rgb, back)
+    
+    def test_gray(self):
+        from swatch import colorspace
+        gray = colorspace.convert([(0.25, 0.25, 0.25), (1, 1, 1)], 'RGB', 'Gray', use_numpy=False)
+        self.assertRowsAlmostEqual(gray, [(0.25,), (1.0,)])
+        self.assertEqual(colorspace.convert([(0.75,)], 'Gray', 'RGB', use_numpy=False),
+                         [(0.75, 0.75, 0.75)])
+    
+    def test_route(self):
+        from swatch import colorspace
+        self.assertEqual(colorspace.route('LAB', 'XYZ'), [('LAB', 'CIELAB'), ('CIELAB', 'XYZ')])
+        self.assertEqual(colorspace.route('CMYK', 'CMYK'), [])
+        self.assertRaises(ValueError, colorspace.route, 'HSV', 'RGB')
+    
+    def test_convert_palette(self):
+        import swatch, os
+        from swatch import colorspace
+        base = os.path.join("tests", "fixtures", "solarized.ase")
+        ase = swatch.parse(base)
+        colors = [color for item in ase for color in item.get('swatches', [item])]
+        expected = [colorspace.convert([color['data']['values']], color['data']['mode'], 'RGB',
+                                       use_numpy=False)[0] for color in colors]
+        self.assertRowsAlmostEqual(expected, colorspace.convert_palette(ase, 'RGB', use_numpy=False))
+    
+    def test_numpy_matches_python(self):
+        pytest.importorskip('numpy')
+        import swatch, os
+        from swatch import colorspace
+        palette = swatch.Palette.from_file(os.path.join("tests", "fixtures", "sampler.ase"))
+        for target in ('RGB', 'LAB', 'CMYK', 'Gray', 'XYZ'):
+            self.assertRowsAlmostEqual(colorspace.convert_palette(palette, target, use_numpy=False),
+                                       colorspace.convert_palette(palette, target, use_numpy=True).tolist())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# encoding: utf-8
+"""
+swatch.tests.test_diff
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+def color(name, values, mode='RGB', color_type='Process'):
+    return {'name': name, 'type': color_type, 'data': {'mode': mode, 'values': list(values)}}
+
+class TestSwatchDiff(unittest.TestCase):
+    """ Tests for diff.py """
+    
+    def setUp(self):
+        super(TestSwatchDiff, self).setUp()
+        self.maxDiff = 10000
+        self.old = [
+            color('red', (1.0, 0.0, 0.0)),
+            color('green', (0.0, 1.0, 0.0)),
+            {'name': 'neutrals', 'type': 'Color Group', 'swatches': [
+                color('black', (0.0,), 'Gray'),
+                color('white', (1.0,), 'Gray'),
+                color('mid', (0.5,), 'Gray')
+            ]},
+            color('blue', (0.0, 0.0, 1.0)),
+            color('teal', (0.0, 0.5, 0.5)),
+            color('gone', (0.3, 0.1, 0.9)),
+        ]
+        self.new = [
+            color('red', (1.0, 0.0, 0.0)),
+            color('green', (0.0, 0.9, 0.0)),                        # shifted
+            {'name': 'neutrals', 'type': 'Color Group', 'swatches': [
+                color('black', (0.0,), 'Gray'),
+                color('white', (1.0,), 'Gray', 'Spot'),             # retyped
+                color('mid', (0.5,), 'Gray')
+            ]},
+            color('navy', (0.0, 0.0, 1.0)),                         # renamed, same values
+            color('dark teal', (0.0, 0.5, 0.502)),                  # renamed, nearly the same
+            color('orange', (1.0, 0.5, 0.0)),                       # added
+        ]
+    
+    def test_kinds(self):
+        from swatch import diff
+        changes = diff.compare(self.old, self.new)
+        self.assertEqual(changes.summary(), {'unchanged': 3, 'shifted': 1, 'retyped': 1,
+                                             'renamed': 2, 'added': 1, 'removed': 1})
+        shifted, = changes.shifted
+        self.assertEqual((shifted.old['name'], shifted.new['data']['values']), ('green', [0.0, 0.9, 0.0]))
+        self.assertGreater(shifted.delta_e, 1.0)
+        renamed = dict((change.old['name'], change) for change in changes.renamed)
+        self.assertEqual(renamed['blue'].new['name'], 'navy')
+        self.assertEqual(renamed['blue'].delta_e, 0.0)
+        self.assertEqual(renamed['teal'].new['name'], 'dark teal')
+        self.assertGreater(renamed['teal'].delta_e, 0.0)
+        self.assertEqual(changes.added[0].new['name'], 'orange')
+        self.assertEqual(changes.removed[0].old['name'], 'gone')
+        self.assertEqual(changes.retyped[0].new['type'], 'Spot')
+    
+    def test_threshold(self):
+        from swatch import diff
+        changes = diff.compare(self.old, self.new, threshold=0)
+        self.assertEqual([change.old['name'] for change in changes.renamed], ['blue'])
+        self.assertEqual(sorted(change.new['name'] for change in changes.added), ['dark teal', 'orange'])
+    
+    def test_patch_round_trip(self):
+        import json
+        from swatch import diff
+        changes = diff.compare(self.old, self.new)
+        patch = json.loads(json.dumps(changes.patch))
+        self.assertEqual(diff.apply(patch, self.old), self.new)
+        self.assertEqual(diff.compare(self.old, self.old).patch['ops'],
+                         [['copy', 0, 2], ['start-group', 'neutrals'], ['copy', 2, 3], ['end-group'],
+                          ['copy', 5, 3]])
+        self.assertRaises(ValueError, diff.apply, patch, self.old[:1])
+        self.assertRaises(ValueError, diff.apply, dict(patch, format='other'), self.old)
+    
+    def test_files_and_streams(self):
+        import io, os, shutil, swatch, tempfile
+        from swatch import diff
+        output = tempfile.mkdtemp()
+        try:
+            old = os.path.join(output, "old.ase")
+            new = os.path.join(output, "new.ase")
+            swatch.write(self.old, old)
+            swatch.write(self.new, new)
+            # streams of events are consumed once, and compare just the same
+            events = swatch.iterparse(new)
+            changes = diff.compare(old, events)
+            self.assertEqual(changes.summary(), diff.compare(self.old, self.new).summary())
+            patched = os.path.join(output, "patched.ase")
+            diff.apply(changes.patch, old, patched)
+            with io.open(new, "rb") as expected, io.open(patched, "rb") as result:
+                self.assertEqual(expected.read(), result.read())
+        finally:
+            shutil.rmtree(output)
+
+if __name__ == '__main__':
+    unittest.main()
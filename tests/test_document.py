@@ -0,0 +1,167 @@
+# encoding: utf-8
+"""
+swatch.tests.test_document
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+class TestSwatchDocument(unittest.TestCase):
+    """ Tests for document.py """
+    
+    def setUp(self):
+        import os, shutil, tempfile
+        super(TestSwatchDocument, self).setUp()
+        self.maxDiff = 10000
+        self.output = tempfile.mkdtemp()
+        self.sampler = os.path.join(self.output, "sampler.ase")
+        shutil.copy(os.path.join("tests", "fixtures", "sampler.ase"), self.sampler)
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.output)
+        super(TestSwatchDocument, self).tearDown()
+    
+    def read(self, path):
+        with open(path, "rb") as handle:
+            return handle.read()
+    
+    def colors(self, tree):
+        return [color for item in tree for color in item.get('swatches', [item])]
+    
+    def with_unknown_chunks(self):
+        """ The sampler, with a chunk of type 0x0002 and one of 0x7777 after its first color """
+        import struct
+        from swatch import parser
+        data = self.read(self.sampler)
+        first = parser.FILE_HEADER.size
+        first_end = first + parser.CHUNK_HEAD.size + parser.CHUNK_HEAD.unpack_from(data, first)[1]
+        extra = struct.pack('>HI3s', 0x0002, 3, b'abc') + struct.pack('>HI', 0x7777, 0)
+        header = parser.FILE_HEADER.unpack_from(data)
+        return (parser.FILE_HEADER.pack(*(header[:3] + (header[3] + 2,))) +
+                data[first:first_end] + extra + data[first_end:])
+    
+    def test_unchanged_round_trip(self):
+        import glob, os, swatch
+        for filename in glob.glob(os.path.join("tests", "fixtures", "*.ase")):
+            doc = swatch.edit(filename)
+            self.assertEqual(doc.to_bytes(), self.read(filename))
+            self.assertEqual(list(doc), self.colors(swatch.parse(filename)))
+            self.assertFalse(doc.modified)
+    
+    def test_patch_in_place(self):
+        import swatch
+        original = self.read(self.sampler)
+        expected = self.colors(swatch.parse(self.sampler))
+        doc = swatch.edit(self.sampler)
+        name = doc[1]['name']
+        values = [0.25, 0.5, 0.75, 1.0][:len(doc[1]['data']['values'])]
+        doc.recolor(name, values)
+        expected[1]['data']['values'] = values
+        self.assertTrue(doc.patchable())
+        written = doc.save()
+        self.assertLess(written, 100)
+        self.assertFalse(doc.modified)
+        data = self.read(self.sampler)
+        self.assertEqual(len(data), len(original))
+        self.assertEqual(self.colors(swatch.parse(self.sampler)), expected)
+        self.assertEqual(doc.to_bytes(), data)
+        self.assertEqual(doc[name]['data']['values'], values)
+    
+    def test_rewrite_preserves_unknown_chunks(self):
+        import swatch
+        data = self.with_unknown_chunks()
+        with open(self.sampler, "wb") as handle:
+            handle.write(data)
+        doc = swatch.edit(self.sampler)
+        self.assertEqual(doc.to_bytes(), data)
+        name = "A much, much longer name than before"
+        grown = 2 * (len(name) - len(doc[0]['name']))
+        doc.rename(0, name)
+        self.assertFalse(doc.patchable())
+        doc.save()
+        saved = self.read(self.sampler)
+        self.assertEqual(len(saved), len(data) + grown)
+        self.assertIn(b'abc', saved)
+        self.assertIn(b'\x77\x77\x00\x00\x00\x00', saved)
+        self.assertEqual(doc.to_bytes(), saved)
+        self.assertEqual(swatch.edit(self.sampler)[0]['name'], name)
+    
+    def test_structure_edits(self):
+        import io, swatch
+        from swatch import parser
+        tree = swatch.parse(self.sampler)
+        doc = swatch.edit(self.sampler)
+        group = doc.groups()[0]
+        white = {'name': 'White', 'type': 'Process', 'data': {'mode': 'Gray', 'values': [1.0]}}
+        doc.append(white, group=group)
+        doc.insert(0, white)
+        del doc[-1]
+        doc.rename_group(group, "Renamed")
+        self.assertEqual(doc.groups(), ["Renamed"])
+        
+        # the sampler is a single group: the insert lands in it, and the append is deleted
+        self.assertEqual(len(tree), 1)
+        tree[0]['name'] = "Renamed"
+        tree[0]['swatches'].insert(0, white)
+        
+        output = io.BytesIO()
+        doc.write(output)
+        self.assertEqual(swatch.parse_bytes(output.getvalue()), tree)
+        self.assertEqual(doc.to_list(), tree)
+        # the header’s chunk count follows the inserts and deletes
+        counts = parser.validate_buffer(output.getvalue())
+        self.assertEqual(parser.FILE_HEADER.unpack_from(output.getvalue())[3], sum(counts.values()))
+    
+    def test_write_to_handles(self):
+        import gzip, io, os, swatch
+        doc = swatch.edit(self.sampler)
+        doc.rename(0, "Renamed")
+        data = doc.to_bytes()
+        path = os.path.join(self.output, "out.ase")
+        
+        # a buffered file already holding data keeps it, and its place
+        with open(path, "wb") as handle:
+            handle.write(b"before")
+            doc.write(handle)
+            self.assertEqual(len(b"before") + len(data), handle.tell())
+            handle.write(b"after")
+        self.assertEqual(b"before" + data + b"after", self.read(path))
+        
+        # a compressed file has its data compressed
+        with gzip.open(path, "wb") as handle:
+            doc.write(handle)
+        self.assertEqual(data, gzip.decompress(self.read(path)))
+        
+        # unbuffered files and descriptors
+        with open(path, "wb", buffering=0) as handle:
+            handle.write(b"before")
+            doc.write(handle)
+        self.assertEqual(b"before" + data, self.read(path))
+        descriptor = os.open(path, os.O_WRONLY | os.O_TRUNC)
+        try:
+            swatch.document.write_spans(descriptor, doc.spans())
+        finally:
+            os.close(descriptor)
+        self.assertEqual(data, self.read(path))
+        
+        doc.write(path)
+        self.assertEqual(data, self.read(path))
+    
+    def test_lookup_errors(self):
+        import swatch
+        doc = swatch.edit(self.sampler)
+        self.assertRaises(KeyError, doc.__getitem__, "no such color")
+        self.assertRaises(IndexError, doc.__getitem__, len(doc))
+        self.assertRaises(KeyError, doc.rename_group, "no such group", "x")
+        self.assertNotIn("no such color", doc)
+        self.assertIn(doc[0]['name'], doc)
+        self.assertRaises(ValueError, swatch.document.Document(self.read(self.sampler)).save)
+        self.assertRaises(swatch.ParseError, swatch.document.Document, self.read(self.sampler)[:-3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+# encoding: utf-8
+"""
+swatch.tests.test_formats
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+FIXTURES = ("white swatch no folder", "empty white folder", "single white swatch in folder",
+            "solarized", "sampler", "xterm colors")
+
+def flatten(obj):
+    colors = []
+    for item in obj:
+        colors.extend(item['swatches'] if item.get('type') == 'Color Group' else [item])
+    return colors
+
+def rgb_palette():
+    """ A palette that 8-bit RGB formats can hold without loss """
+    def color(name, r, g, b):
+        return {'name': name, 'type': 'Process',
+                'data': {'mode': 'RGB', 'values': [r / 255.0, g / 255.0, b / 255.0]}}
+    return [color('Loose & “quoted”', 255, 0, 0),
+            {'name': 'Greens', 'type': 'Color Group',
+             'swatches': [color('Green %d' % value, 0, value, 0) for value in (64, 128, 255)]},
+            {'name': 'Empty', 'type': 'Color Group', 'swatches': []},
+            color('Straggler', 1, 2, 3)]
+
+class TestSwatchFormats(unittest.TestCase):
+    """ Tests for the swatch.formats package """
+    
+    def setUp(self):
+        import tempfile
+        super(TestSwatchFormats, self).setUp()
+        self.maxDiff = 10000
+        self.directory = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.directory)
+        super(TestSwatchFormats, self).tearDown()
+    
+    def path(self, name):
+        import os
+        return os.path.join(self.directory, name)
+    
+    def fixture(self, basepath):
+        import os
+        return os.path.join("tests", "fixtures", basepath + ".ase")
+    
+    def test_lossless_formats(self):
+        import swatch
+        from swatch import formats
+        for basepath in FIXTURES:
+            original = swatch.parse(self.fixture(basepath))
+            for extension in ('ase', 'csv', 'ndjson', 'jsonl', 'json'):
+                destination = self.path('palette.' + extension)
+                formats.convert(self.fixture(basepath), destination)
+                self.assertEqual(original, formats.parse(destination), (basepath, extension))
+            with open(self.fixture(basepath), 'rb') as handle:
+                self.assertEqual(handle.read(), swatch.dumps(formats.parse(self.path('palette.csv'))))
+    
+    def test_rgb_formats(self):
+        from swatch import formats
+        palette = rgb_palette()
+        for extension in ('gpl', 'html'):
+            destination = self.path('palette.' + extension)
+            formats.write(palette, destination)
+            self.assertEqual(palette, formats.parse(destination), extension)
+    
+    def test_rgb_conversion(self):
+        import swatch
+        from swatch import formats
+        original = swatch.parse(self.fixture("sampler"))
+        formats.convert(self.fixture("sampler"), self.path('sampler.gpl'))
+        converted = formats.parse(self.path('sampler.gpl'))
+        self.assertEqual([color['name'] for color in flatten(original)],
+                         [color['name'] for color in flatten(converted)])
+        self.assertTrue(all(color['data']['mode'] == 'RGB' for color in flatten(converted)))
+    
+    def test_aco(self):
+        import swatch
+        from swatch import formats
+        original = flatten(swatch.parse(self.fixture("sampler")))
+        formats.convert(self.fixture("sampler"), self.path('sampler.aco'))
+        converted = formats.parse(self.path('sampler.aco'))
+        # Photoshop swatches have no groups
+        self.assertEqual(len(original), len(converted))
+        for before, after in zip(original, converted):
+            self.assertEqual(before['name'], after['name'])
+            self.assertEqual(before['data']['mode'], after['data']['mode'])
+            for value, decoded in zip(before['data']['values'], after['data']['values']):
+                self.assertAlmostEqual(value, decoded, delta=0.01)
+        
+        # without a version 2 section, colors are named after themselves
+        with open(self.path('sampler.aco'), 'rb') as handle:
+            data = handle.read()
+        with open(self.path('unnamed.aco'), 'wb') as handle:
+            handle.write(data[:4 + 10 * len(original)])
+        unnamed = formats.parse(self.path('unnamed.aco'))
+        self.assertEqual([color['data'] for color in converted], [color['data'] for color in unnamed])
+    
+    def test_swatchbook(self):
+        import swatch, os
+        from swatch import formats
+        name = "Color Systems International - Colorizer"
+        source = os.path.join("swatches", "html", name + ".html")
+        formats.write_events(formats.iterparse(source, color_type='Spot'), self.path(name + '.ase'))
+        with open(os.path.join("swatches", "ase", name + ".ase"), 'rb') as handle:
+            bundled = handle.read()
+        with open(self.path(name + '.ase'), 'rb') as handle:
+            self.assertEqual(bundled, handle.read())
+    
+    def test_batch(self):
+        import swatch, glob, os
+        import swatch.formats
+        from swatch import batch
+        sources = sorted(glob.glob(os.path.join("swatches", "html", "*.html")))[:4]
+        results = batch.convert(sources, self.directory, to='ase', jobs=1)
+        self.assertEqual([None] * len(sources), [result.error for result in results])
+        for source, result in zip(sources, results):
+            with open(result.destination, 'rb') as handle:
+                self.assertEqual(swatch.dumps(swatch.formats.parse(source)), handle.read())
+        result = batch.convert_file(sources[0], self.path('nope.xyz'))
+        self.assertIn('unsupported format', result.error)
+
+if __name__ == '__main__':
+    unittest.main()
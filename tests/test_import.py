@@ -0,0 +1,62 @@
+# encoding: utf-8
+"""
+swatch.tests.test_import
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+# generous, so that slow machines don’t trip it – a cold ``import swatch``
+# takes a few milliseconds on ordinary hardware
+IMPORT_BUDGET = 0.03
+
+def fresh_interpreter(*args):
+    """ Run a new Python with `args`, from the root of the repository """
+    import os, subprocess, sys
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable] + list(args), cwd=root, check=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+
+class TestImport(unittest.TestCase):
+    """ Tests for lazy loading in __init__.py """
+    
+    def test_modules_loaded(self):
+        output = fresh_interpreter("-c", "import sys; before = set(sys.modules); import swatch; "
+                                   "print('\\n'.join(sorted(set(sys.modules) - before)))").stdout
+        loaded = output.split()
+        self.assertEqual(['swatch', 'swatch.parser'],
+                         [name for name in loaded if name.startswith('swatch')])
+        for heavy in ('numpy', 'enum', 'concurrent', 'contextlib', 'html', 'csv', 'zlib'):
+            self.assertNotIn(heavy, loaded)
+    
+    def test_import_budget(self):
+        timings = []
+        for attempt in range(3):
+            stderr = fresh_interpreter("-X", "importtime", "-c", "import swatch").stderr
+            for line in stderr.splitlines():
+                # “import time: self [us] | cumulative | imported package”
+                if line.rstrip().endswith('| swatch'):
+                    timings.append(int(line.split('|')[1]) / 1e6)
+        self.assertEqual(3, len(timings))
+        self.assertLess(min(timings), IMPORT_BUDGET)
+    
+    def test_lazy_names(self):
+        import swatch
+        self.assertIs(swatch.Color, __import__('swatch.objects').objects.Color)
+        self.assertIs(swatch.Writer, swatch.writer.Writer)
+        self.assertIs(swatch.Palette, swatch.palette.Palette)
+        self.assertIn('Color', dir(swatch))
+        self.assertIn('formats', dir(swatch))
+        with self.assertRaises(AttributeError):
+            swatch.no_such_thing
+        from swatch import Mode, merge
+        self.assertEqual('RGB', Mode.RGB.value)
+        self.assertTrue(callable(merge.merge))
+
+if __name__ == '__main__':
+    unittest.main()
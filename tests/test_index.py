@@ -0,0 +1,100 @@
+# encoding: utf-8
+"""
+swatch.tests.test_index
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import pytest
+import unittest
+
+class TestSwatchIndex(unittest.TestCase):
+    """ Tests for index.py """
+    
+    def setUp(self):
+        import os
+        from swatch.index import NearestColorIndex
+        super(TestSwatchIndex, self).setUp()
+        self.fixture = os.path.join("tests", "fixtures", "xterm colors.ase")
+        self.index = NearestColorIndex().add(self.fixture)
+    
+    def brute_force(self, color, k):
+        from swatch import colorspace
+        lab = self.index.to_lab(color, 'RGB')
+        return sorted((colorspace.delta_e76(lab, other), id) for id, other in enumerate(self.index.labs))[:k]
+    
+    def test_exact_match(self):
+        color = self.index.color(42)
+        match = self.index.nearest(color['data']['values'], mode=color['data']['mode'])[0]
+        self.assertAlmostEqual(match.distance, 0.0)
+        self.assertEqual(match.name, color['name'])
+        self.assertEqual(match.source, self.fixture)
+    
+    def test_matches_brute_force(self):
+        import random
+        generator = random.Random(1)
+        for _ in range(50):
+            color = (generator.random(), generator.random(), generator.random())
+            expected = self.brute_force(color, 4)
+            found = self.index.nearest(color, k=4)
+            self.assertEqual([round(distance, 6) for distance, id in expected],
+                             [round(match.distance, 6) for match in found])
+    
+    def test_within(self):
+        color = (0.5, 0.25, 0.75)
+        expected = [id for distance, id in self.brute_force(color, len(self.index)) if distance <= 20]
+        self.assertEqual(sorted(expected), sorted(match.id for match in self.index.within(color, 20)))
+    
+    def test_delta_e2000(self):
+        from swatch import colorspace
+        color = (0.9, 0.1, 0.3)
+        lab = self.index.to_lab(color, 'RGB')
+        expected = min(colorspace.delta_e2000(lab, other) for other in self.index.labs)
+        self.assertAlmostEqual(self.index.nearest(color, metric='2000')[0].distance, expected)
+        self.assertRaises(ValueError, self.index.nearest, color, metric='94')
+    
+    def test_known_delta_e2000(self):
+        from swatch import colorspace
+        self.assertAlmostEqual(colorspace.delta_e2000((50, 2.6772, -79.7751), (50, 0, -82.7485)),
+                               2.0425, places=4)
+        self.assertAlmostEqual(colorspace.delta_e2000((50, 2.49, -0.001), (50, -2.49, 0.0011)),
+                               7.2195, places=4)
+    
+    def test_batch_query(self):
+        numpy = pytest.importorskip('numpy')
+        image = numpy.random.RandomState(0).random_sample((16, 8, 3))
+        ids = self.index.nearest_ids(image)
+        self.assertEqual(ids.shape, (16, 8))
+        # compare colors rather than ids, as xterm has a few duplicate colors
+        self.assertEqual(self.index.labs[ids[3, 4]],
+                         self.index.labs[self.index.nearest(image[3, 4])[0].id])
+        ids = self.index.nearest_ids(image, metric='2000')
+        self.assertEqual(self.index.labs[ids[5, 1]],
+                         self.index.labs[self.index.nearest(image[5, 1], metric='2000')[0].id])
+    
+    def test_batch_query_blocks(self):
+        numpy = pytest.importorskip('numpy')
+        from swatch import quantize
+        image = numpy.random.RandomState(1).random_sample((40, 3))
+        expected = [self.index.labs[self.index.nearest(color)[0].id] for color in image]
+        # blocks of a row or two at a time, bounded by the budget or by `chunksize`
+        budget = quantize.BLOCK
+        quantize.BLOCK = 2 * len(self.index)
+        try:
+            self.assertEqual(expected, [self.index.labs[id] for id in self.index.nearest_ids(image)])
+        finally:
+            quantize.BLOCK = budget
+        self.assertEqual(expected, [self.index.labs[id]
+                                    for id in self.index.nearest_ids(image, chunksize=3)])
+    
+    def test_nearest_none(self):
+        from swatch.index import KDTree, NearestColorIndex
+        self.assertRaises(ValueError, self.index.nearest, (0.5, 0.5, 0.5), k=0)
+        self.assertRaises(ValueError, KDTree(self.index.labs).nearest, (50.0, 0.0, 0.0), 0)
+        self.assertEqual([], NearestColorIndex().nearest((0.5, 0.5, 0.5)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# encoding: utf-8
+"""
+swatch.tests.test_instrument
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+class TestInstrument(unittest.TestCase):
+    """ Tests for instrument.py """
+    
+    def fixture(self, basepath):
+        import os
+        return os.path.join("tests", "fixtures", basepath + ".ase")
+    
+    def test_parse(self):
+        import io, os
+        import swatch
+        from swatch import instrument
+        filename = self.fixture("sampler")
+        expected = swatch.parse(filename)
+        self.assertIsNone(instrument.active())
+        for parse in (swatch.parse,
+                      lambda filename: swatch.to_dicts(swatch.parse(filename, objects=True)),
+                      lambda filename: swatch.parser.tree_for_events(swatch.iterparse(filename))):
+            with instrument.collect() as stats:
+                self.assertIs(stats, instrument.active())
+                self.assertEqual(expected, parse(filename))
+            self.assertIsNone(instrument.active())
+            self.assertEqual({'color': 5, 'folder': 1, 'folder-end': 1}, stats.chunks)
+            self.assertEqual(os.path.getsize(filename), stats.bytes_read)
+            self.assertEqual(set(['names', 'values', 'objects']), set(stats.timings))
+            self.assertEqual([filename], list(stats.files))
+            self.assertEqual(7, stats.files[filename]['chunks_read'])
+        
+        with instrument.collect() as stats:
+            state = swatch.parser.IncrementalParser()
+            with io.open(filename, 'rb') as handle:
+                data = handle.read()
+            for start in range(0, len(data), 7):
+                state.feed(data[start:start + 7])
+            state.close()
+        self.assertEqual({'color': 5, 'folder': 1, 'folder-end': 1}, stats.chunks)
+        self.assertEqual(len(data), stats.bytes_read)
+    
+    def test_parse_malformed(self):
+        import struct
+        import swatch
+        from swatch import instrument
+        
+        def color_chunk(mode, color_type=2):
+            body = struct.pack('>H', 2) + 'A\0'.encode('utf-16be') + mode + struct.pack('>3fh', 0.25, 0.5, 0.75, color_type)
+            return struct.pack('>HI', 1, len(body)) + body
+        
+        def ase_file(*chunks):
+            return b'ASEF' + struct.pack('>HHI', 1, 0, len(chunks)) + b''.join(chunks)
+        
+        # a truncated chunk is never counted, as it is never read
+        for data, counted in ((ase_file(color_chunk(b' RGB')), 1), (ase_file(color_chunk(b'RGB ', -1)), 1),
+                              (ase_file(color_chunk(b'RGB ', 7)), 1), (ase_file(color_chunk(b'XYZ ')), 1),
+                              (ase_file(color_chunk(b'RGB '))[:-3], 0)):
+            for objects in (False, True):
+                try:
+                    expected = swatch.parse_bytes(data, objects)
+                except swatch.ParseError as error:
+                    expected = str(error)
+                with instrument.collect() as stats:
+                    try:
+                        output = swatch.parse_bytes(data, objects)
+                    except swatch.ParseError as error:
+                        output = str(error)
+                self.assertEqual(expected, output)
+                self.assertEqual(counted, stats.chunks['color'])
+    
+    def test_write(self):
+        import io, os, tempfile
+        import swatch
+        from swatch import instrument
+        obj = swatch.parse(self.fixture("sampler"))
+        seen = []
+        with instrument.collect(callback=lambda *args: seen.append(args)) as stats:
+            data = swatch.dumps(obj)
+            swatch.dump(obj, io.BytesIO())
+            with tempfile.TemporaryDirectory() as directory:
+                destination = os.path.join(directory, "sampler.ase")
+                swatch.write(obj, destination)
+        self.assertEqual({'color': 15, 'folder': 3, 'folder-end': 3}, stats.written)
+        self.assertEqual(3 * len(data), stats.bytes_written)
+        self.assertEqual(set(['sizing', 'packing']), set(stats.timings))
+        self.assertEqual([destination], [filename for filename, totals in seen])
+        self.assertEqual(len(data), seen[0][1]['bytes_written'])
+        self.assertEqual(0, seen[0][1]['bytes_read'])
+    
+    def test_disabled(self):
+        import swatch
+        from swatch import instrument
+        with instrument.collect() as stats:
+            pass
+        swatch.parse(self.fixture("sampler"))
+        swatch.dumps(swatch.parse(self.fixture("sampler")))
+        self.assertEqual(0, stats.bytes_read + stats.bytes_written)
+        self.assertFalse(stats.files)
+
+if __name__ == '__main__':
+    unittest.main()
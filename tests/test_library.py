@@ -0,0 +1,98 @@
+# encoding: utf-8
+"""
+swatch.tests.test_library
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+class TestSwatchLibrary(unittest.TestCase):
+    """ Tests for library.py """
+    
+    def setUp(self):
+        import glob, os, tempfile
+        from swatch import library
+        super(TestSwatchLibrary, self).setUp()
+        self.maxDiff = 10000
+        self.output = tempfile.mkdtemp()
+        self.sources = sorted(glob.glob(os.path.join("tests", "fixtures", "*.ase")))
+        self.path = os.path.join(self.output, "fixtures.swlib")
+        self.count = library.build(self.sources, self.path)
+        self.library = library.open(self.path)
+    
+    def tearDown(self):
+        import shutil
+        self.library.close()
+        shutil.rmtree(self.output)
+        super(TestSwatchLibrary, self).tearDown()
+    
+    def label(self, source):
+        import os
+        return os.path.splitext(os.path.basename(source))[0]
+    
+    def test_palettes_round_trip(self):
+        import swatch
+        self.assertEqual(self.library.palettes(), [self.label(source) for source in self.sources])
+        self.assertEqual(len(self.library), self.count)
+        for source in self.sources:
+            self.assertIn(self.label(source), self.library)
+            self.assertEqual(self.library.palette(self.label(source)), swatch.parse(source))
+        self.assertNotIn("missing", self.library)
+        self.assertRaises(KeyError, self.library.palette, "missing")
+    
+    def test_export(self):
+        import swatch, os
+        for source in self.sources:
+            destination = os.path.join(self.output, os.path.basename(source))
+            self.library.export(self.label(source), destination)
+            self.assertEqual(swatch.parse(destination), swatch.parse(source))
+    
+    def test_groups(self):
+        import swatch, os
+        sampler = swatch.parse(os.path.join("tests", "fixtures", "sampler.ase"))
+        folders = [item for item in sampler if item.get('type') == 'Color Group']
+        self.assertEqual(self.library.group_names("sampler"), [folder['name'] for folder in folders])
+        self.assertEqual(self.library.group("sampler", folders[0]['name']), folders[0])
+        self.assertRaises(KeyError, self.library.group, "sampler", "missing")
+    
+    def test_find_across_palettes(self):
+        import swatch
+        expected = [(self.label(source), color)
+                    for source in self.sources
+                    for item in swatch.parse(source)
+                    for color in item.get('swatches', [item])
+                    if color['name'] == 'White']
+        self.assertTrue(expected)
+        hits = self.library.find('White')
+        self.assertEqual([(hit.palette, hit.color) for hit in hits], expected)
+        self.assertEqual(self.library.find('no such color'), [])
+    
+    def test_search_prefix(self):
+        import swatch
+        expected = [color['name']
+                    for source in self.sources
+                    for item in swatch.parse(source)
+                    for color in item.get('swatches', [item])
+                    if color['name'].startswith('Gr')]
+        names = [hit.color['name'] for hit in self.library.search('Gr')]
+        self.assertGreater(len(names), 3)
+        self.assertEqual(names, sorted(expected, key=lambda name: name.encode('utf-8')))
+        self.assertEqual(len(self.library.search('Gr', limit=3)), 3)
+    
+    def test_build_from_lists_and_errors(self):
+        import swatch, os
+        from swatch import library
+        solarized = swatch.parse(os.path.join("tests", "fixtures", "solarized.ase"))
+        data = library.pack([("solarized", solarized), ("again", solarized)])
+        with library.Library(data) as lib:
+            self.assertEqual(lib.palette("again"), solarized)
+        self.assertRaises(ValueError, library.pack, [("same", solarized), ("same", solarized)])
+        self.assertRaises(ValueError, library.Library, b"SWPC" + data[4:])
+        self.assertRaises(ValueError, library.Library, data[:-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# encoding: utf-8
+"""
+swatch.tests.test_merge
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+def color(name, values, mode='RGB'):
+    return {'name': name, 'type': 'Process', 'data': {'mode': mode, 'values': list(values)}}
+
+def flatten(obj):
+    colors = []
+    for item in obj:
+        colors.extend(item['swatches'] if item.get('type') == 'Color Group' else [item])
+    return colors
+
+class TestMerge(unittest.TestCase):
+    """ Tests for merge.py """
+    
+    def test_keys(self):
+        from swatch.merge import merge
+        first = [color('red', (1, 0, 0)), color('black', (0,), 'Gray')]
+        second = [color('rouge', (1, 0, 0)), color('nearly red', (0.999, 0.001, 0)),
+                  color('noir', (0, 0, 0))]
+        merged = merge([first, second], key='values')
+        self.assertEqual(['red', 'black', 'nearly red', 'noir'], [c['name'] for c in merged])
+        merged = merge([first, second], key='quantized')
+        self.assertEqual(['red', 'black', 'noir'], [c['name'] for c in merged])
+        merged = merge([first, second], key='quantized', steps=10000)
+        self.assertEqual(['red', 'black', 'nearly red', 'noir'], [c['name'] for c in merged])
+        merged = merge([first, [color('red', (0, 1, 0))]], key='name')
+        self.assertEqual([1, 0, 0], merged[0]['data']['values'])
+        self.assertEqual(2, len(merged))
+    
+    def test_name_policies(self):
+        from swatch.merge import Merger, merge
+        first = [color('red', (1, 0, 0))]
+        second = [color('red', (0.9, 0, 0)), color('red', (0.8, 0, 0))]
+        merged = merge([first, second], names='keep')
+        self.assertEqual(['red'] * 3, [c['name'] for c in merged])
+        merged = merge([first, second], names='rename')
+        self.assertEqual(['red', 'red (2)', 'red (3)'], [c['name'] for c in merged])
+        self.assertEqual('red', second[0]['name'])
+        merged = merge([first, second], names='first')
+        self.assertEqual([first[0]], merged)
+        merger = Merger(names='last').add(first).add(second)
+        self.assertEqual([second[1]], merger.tree)
+        self.assertEqual(1, len(merger))
+        with self.assertRaises(ValueError):
+            merge([first, second], names='error')
+        with self.assertRaises(ValueError):
+            Merger(names='whatever')
+    
+    def test_group_policies(self):
+        from swatch.merge import Merger, merge
+        first = [color('white', (1,), 'Gray'),
+                 {'name': 'reds', 'type': 'Color Group', 'swatches': [color('red', (1, 0, 0))]}]
+        second = [{'name': 'reds', 'type': 'Color Group', 'swatches': [color('maroon', (.5, 0, 0))]},
+                  color('black', (0,), 'Gray')]
+        merged = merge([first, second])
+        self.assertEqual(['white', 'reds', 'black'], [item['name'] for item in merged])
+        self.assertEqual(['red', 'maroon'], [c['name'] for c in merged[1]['swatches']])
+        merged = merge([first, second], groups='flatten')
+        self.assertEqual(['white', 'red', 'maroon', 'black'], [c['name'] for c in merged])
+        merger = Merger(groups='source').add(first, 'first').add(second, 'second')
+        self.assertEqual(['first', 'second'], [item['name'] for item in merger.tree])
+        self.assertEqual(['maroon', 'black'], [c['name'] for c in merger.tree[1]['swatches']])
+    
+    def test_libraries(self):
+        import glob, os, tempfile
+        import swatch
+        from swatch.merge import Merger
+        filenames = sorted(glob.glob(os.path.join("swatches", "ase", "NCS*.ase")) +
+                           glob.glob(os.path.join("swatches", "ase", "RAL*.ase")))
+        if not filenames:
+            self.skipTest("no NCS or RAL libraries")
+        colors = []
+        for filename in filenames:
+            colors.extend(flatten(swatch.parse(filename)))
+        merger = Merger(groups='source')
+        for filename in filenames:
+            merger.add(filename)
+        unique = set((c['data']['mode'], tuple(c['data']['values'])) for c in colors)
+        self.assertEqual(len(unique), len(merger))
+        self.assertEqual(len(colors), merger.stats['read'])
+        self.assertEqual(len(colors) - len(unique), merger.stats['duplicates'])
+        names = [c['name'] for c in flatten(merger.tree)]
+        self.assertEqual(len(names), len(set(names)))
+        
+        with tempfile.TemporaryDirectory() as directory:
+            destination = os.path.join(directory, "merged.ase")
+            merger.write(destination)
+            self.assertEqual(swatch.dumps(merger.tree), open(destination, 'rb').read())
+            self.assertEqual(merger.tree, swatch.parse(destination))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# encoding: utf-8
+"""
+swatch.tests.test_objects
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import unittest
+
+FIXTURES = ("white swatch no folder", "empty white folder", "single white swatch in folder",
+            "solarized", "sampler", "xterm colors")
+
+class TestSwatchObjects(unittest.TestCase):
+    """ Tests for objects.py """
+    
+    def fixture(self, basepath):
+        import os
+        return os.path.join("tests", "fixtures", basepath)
+    
+    def test_parse_objects(self):
+        import swatch
+        for basepath in FIXTURES:
+            base = self.fixture(basepath)
+            objects = swatch.parse(base + ".ase", objects=True)
+            self.assertEqual(swatch.from_dicts(swatch.parse(base + ".ase")), objects, basepath)
+            self.assertEqual(swatch.parse(base + ".ase"), swatch.to_dicts(objects), basepath)
+    
+    def test_write_objects(self):
+        import swatch, io
+        for basepath in FIXTURES:
+            base = self.fixture(basepath)
+            with open(base + ".ase", "rb") as handle:
+                raw = handle.read()
+            objects = swatch.parse_bytes(raw, objects=True)
+            self.assertEqual(raw, swatch.dumps(objects), basepath)
+            self.assertEqual(raw, b''.join(swatch.dump_iter(objects)), basepath)
+            stream = io.BytesIO()
+            swatch.dump(objects, stream)
+            self.assertEqual(raw, stream.getvalue(), basepath)
+    
+    def test_color(self):
+        from swatch import Color, ColorType, Mode
+        color = Color('white', 'RGB', [1.0, 1.0, 1.0], 'Global')
+        self.assertIs(color.mode, Mode.RGB)
+        self.assertIs(color.type, ColorType.Global)
+        self.assertEqual(color.values, (1.0, 1.0, 1.0))
+        self.assertEqual(color, Color.from_dict(color.to_dict()))
+        self.assertNotEqual(color, Color('white', Mode.Gray, [1.0]))
+        self.assertFalse(hasattr(color, '__dict__'))
+        with self.assertRaises(ValueError):
+            Color('nope', 'HSV', [0, 0, 0])
+    
+    def test_group(self):
+        from swatch import Color, Group
+        group = Group('grays', [Color('black', 'Gray', [0.0]), Color('white', 'Gray', [1.0])])
+        self.assertEqual(len(group), 2)
+        self.assertEqual([color.name for color in group], ['black', 'white'])
+        self.assertEqual(group, Group.from_dict(group.to_dict()))
+        self.assertEqual(group.to_dict()['type'], 'Color Group')
+    
+    def test_parse_malformed_objects(self):
+        import swatch, struct
+        
+        def color_chunk(mode=b'RGB ', values=(0.25, 0.5, 0.75), color_type=2, tail=b''):
+            body = (struct.pack('>H', 2) + 'A\0'.encode('utf-16be') + mode +
+                    struct.pack('>%dfh' % len(values), *(tuple(values) + (color_type,))) + tail)
+            return struct.pack('>HI', 1, len(body)) + body
+        
+        chunks = {
+            'padded mode': color_chunk(mode=b' RGB'),
+            'tab-padded mode': color_chunk(mode=b'LAB\t'),
+            'trailing bytes': color_chunk(tail=b'\0\0\0\1'),
+            'negative type': color_chunk(color_type=-1),
+            'unknown type': color_chunk(color_type=7),
+            'unknown mode': color_chunk(mode=b'HSV '),
+            'short values': color_chunk(mode=b'CMYK'),
+            'no mode': struct.pack('>HIH', 1, 6, 2) + 'A\0'.encode('utf-16be')
+        }
+        for reason, chunk in chunks.items():
+            data = b'ASEF' + struct.pack('>HHI', 1, 0, 1) + chunk
+            try:
+                expected = swatch.parse_bytes(data)
+            except swatch.ParseError as error:
+                with self.assertRaises(swatch.ParseError, msg=reason) as raised:
+                    swatch.parse_bytes(data, objects=True)
+                self.assertEqual(str(error), str(raised.exception), reason)
+            else:
+                self.assertEqual(expected, swatch.to_dicts(swatch.parse_bytes(data, objects=True)),
+                                 reason)
+
+if __name__ == '__main__':
+    unittest.main()
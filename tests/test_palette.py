@@ -0,0 +1,110 @@
+# encoding: utf-8
+"""
+swatch.tests.test_palette
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import pytest
+import unittest
+
+class TestSwatchPalette(unittest.TestCase):
+    """ Tests for palette.py """
+    
+    def setUp(self):
+        super(TestSwatchPalette, self).setUp()
+        self.maxDiff = 10000
+    
+    def compare_with_json(self, basepath):
+        import swatch, os, json
+        base = os.path.join("tests", "fixtures", basepath)
+        with open(base + ".json") as handle:
+            palette = swatch.Palette.from_file(base + ".ase")
+            js = json.load(handle)
+            return js, palette
+    
+    def test_single_swatch(self):
+        js, palette = self.compare_with_json("white swatch no folder")
+        self.assertEqual(js, palette.to_list(), "single swatch palette differs")
+    
+    def test_empty_file(self):
+        js, palette = self.compare_with_json("empty white folder")
+        self.assertEqual(len(palette), 0)
+        self.assertEqual(palette.group_count, 1)
+        self.assertEqual(js, palette.to_list(), "empty named folder palette differs")
+    
+    def test_LAB(self):
+        js, palette = self.compare_with_json("solarized")
+        self.assertEqual(js, palette.to_list(), "LAB palette differs from solarized data")
+    
+    def test_matches_parse(self):
+        import swatch, os
+        base = os.path.join("tests", "fixtures", "sampler.ase")
+        ase = swatch.parse(base)
+        palette = swatch.Palette.from_file(base)
+        self.assertEqual(ase, palette.to_list())
+        self.assertEqual(ase, swatch.Palette.from_objects(ase).to_list())
+    
+    def test_columns(self):
+        js, palette = self.compare_with_json("xterm colors")
+        self.assertEqual(len(palette), 256)
+        self.assertEqual(len(palette.values['RGB']), 256 * 3)
+        self.assertEqual(palette.name(0), js[0]['swatches'][0]['name'])
+        self.assertEqual(palette[-1], palette.color_dict(255))
+        self.assertTrue(all(group == 0 for group in palette.groups))
+    
+    def test_numpy_view(self):
+        numpy = pytest.importorskip('numpy')
+        js, palette = self.compare_with_json("xterm colors")
+        values = palette.array('RGB')
+        self.assertEqual(values.shape, (256, 3))
+        numpy.testing.assert_allclose(values, [item['data']['values'] for item in js[0]['swatches']],
+                                      rtol=1e-6)
+    
+    def test_malformed_matches_parse(self):
+        import swatch, struct
+        
+        def color_chunk(mode=b'RGB ', values=(0.25, 0.5, 0.75), color_type=2, tail=b''):
+            body = (struct.pack('>H', 2) + 'A\0'.encode('utf-16be') + mode +
+                    struct.pack('>%df' % len(values), *values) + tail + struct.pack('>h', color_type))
+            return struct.pack('>HI', 1, len(body)) + body
+        
+        odd = {
+            'padded mode': color_chunk(mode=b' RGB'),
+            'tab-padded mode': color_chunk(mode=b'LAB\t'),
+            'trailing bytes': color_chunk(tail=b'\0\0'),
+            'negative type': color_chunk(color_type=-1),
+            'unknown type': color_chunk(color_type=3),
+            'unknown mode': color_chunk(mode=b'XYZ '),
+            'short values': color_chunk(mode=b'CMYK'),
+            'no mode': struct.pack('>HIH', 1, 6, 2) + 'A\0'.encode('utf-16be')
+        }
+        for reason, chunk in odd.items():
+            data = b'ASEF' + struct.pack('>HHI', 1, 0, 1) + chunk
+            try:
+                expected = swatch.parse_bytes(data)
+            except swatch.ParseError as error:
+                expected = str(error)
+            try:
+                output = swatch.Palette.from_bytes(data).to_list()
+            except swatch.ParseError as error:
+                output = str(error)
+            self.assertEqual(expected, output, reason)
+    
+    def test_packed_alignment(self):
+        import swatch
+        from swatch.palette import PACK_HEADER, padded
+        js, palette = self.compare_with_json("sampler")
+        packed = palette.pack()
+        offset = padded(PACK_HEADER.size)
+        self.assertEqual(0, offset % 8)
+        # the columns start straight after the padded header
+        self.assertEqual(palette.name_ids.tobytes(),
+                         packed[offset:offset + palette.name_ids.itemsize * len(palette)])
+        self.assertEqual(js, swatch.Palette.unpack(packed).to_list())
+
+if __name__ == '__main__':
+    unittest.main()
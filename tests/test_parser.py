@@ -61,6 +61,173 @@ class TestSwatchParser(unittest.TestCase):
         js[0]['swatches'] = []
         ase[0]['swatches'] = []
         self.assertEqual(js, ase, "XTerm color dict stubs compare unequal in parser test")
+    
+    def test_parse_bytes(self):
+        import swatch, os
+        base = os.path.join("tests", "fixtures", "sampler.ase")
+        with open(base, "rb") as handle:
+            raw = handle.read()
+        ase = swatch.parse(base)
+        self.assertEqual(ase, swatch.parse_bytes(raw), "parse_bytes differs from parse")
+        self.assertEqual(ase, swatch.parse_bytes(bytearray(raw)), "parse_bytes fails with a bytearray")
+        self.assertEqual(ase, swatch.parse_buffer(memoryview(raw)), "parse_buffer fails with a memoryview")
+    
+    def test_legacy_chunk_parser(self):
+        import swatch, os, io
+        base = os.path.join("tests", "fixtures", "solarized.ase")
+        with open(base, "rb") as handle:
+            handle.seek(12)
+            legacy = list(swatch.parser.parse_chunk(io.BytesIO(handle.read())))
+        self.assertEqual(swatch.parse(base), legacy, "buffer parser differs from parse_chunk")
+    
+    def test_fast_decoder(self):
+        import swatch, io, json
+        for basepath in ("tests/fixtures/sampler.ase", "tests/fixtures/solarized.ase",
+                         "tests/fixtures/empty white folder.ase", "tests/fixtures/xterm colors.ase",
+                         "swatches/ase/RAL CLASSIC.ase"):
+            with open(basepath, "rb") as handle:
+                raw = handle.read()
+            fast = swatch.parser.decode_buffer(memoryview(raw), 12)
+            self.assertIsNotNone(fast, basepath + " misses the fast path")
+            legacy = list(swatch.parser.parse_chunk(io.BytesIO(raw[12:])))
+            # the same dicts, down to the order of their keys
+            self.assertEqual(json.dumps(legacy), json.dumps(fast), basepath)
+    
+    def color_chunk(self, title, mode=b'RGB ', values=(0.25, 0.5, 0.75), color_type=2):
+        import struct
+        body = (struct.pack('>H', len(title) // 2) + title + mode +
+                struct.pack('>%dfh' % len(values), *(tuple(values) + (color_type,))))
+        return struct.pack('>HI', 1, len(body)) + body
+    
+    def ase_file(self, *chunks):
+        import struct
+        return b'ASEF' + struct.pack('>HHI', 1, 0, len(chunks)) + b''.join(chunks)
+    
+    def test_fast_decoder_fallback(self):
+        import swatch, io
+        odd = {
+            'no terminator': self.color_chunk('AB'.encode('utf-16be')),
+            'inner NUL': self.color_chunk('A\0B\0'.encode('utf-16be')),
+            'padded mode': self.color_chunk('A\0'.encode('utf-16be'), mode=b' RGB'),
+            'tab-padded mode': self.color_chunk('A\0'.encode('utf-16be'), mode=b'LAB\t')
+        }
+        plain = self.color_chunk('Plain\0'.encode('utf-16be'))
+        for reason, chunk in odd.items():
+            data = self.ase_file(plain, chunk, plain)
+            self.assertIsNone(swatch.parser.decode_buffer(memoryview(data), 12), reason)
+            legacy = list(swatch.parser.parse_chunk(io.BytesIO(data[12:])))
+            self.assertEqual(legacy, swatch.parse_bytes(data), reason)
+        
+        data = self.ase_file(self.color_chunk('\U0001F3A8 art\0'.encode('utf-16be')), plain)
+        self.assertEqual(['\U0001F3A8 art', 'Plain'],
+                         [color['name'] for color in swatch.parser.decode_buffer(memoryview(data), 12)])
+        
+        data = self.ase_file(plain, self.color_chunk('Bad\0'.encode('utf-16be'), color_type=7))
+        self.assertRaises(swatch.parser.ParseError, swatch.parse_bytes, data)
+    
+    def test_iterparse_events(self):
+        import swatch, os
+        base = os.path.join("tests", "fixtures", "single white swatch in folder.ase")
+        events = [(event, obj['name']) for event, obj in swatch.iterparse(base)]
+        self.assertEqual([event for event, name in events],
+                         ['start-group', 'color', 'end-group'])
+        self.assertEqual(events[0][1], events[-1][1])
+    
+    def test_iterparse_tree(self):
+        import swatch, os
+        for basepath in ("sampler", "solarized", "empty white folder", "xterm colors"):
+            base = os.path.join("tests", "fixtures", basepath + ".ase")
+            tree = swatch.parser.tree_for_events(swatch.iterparse(base))
+            self.assertEqual(swatch.parse(base), tree, "iterparse differs for " + basepath)
+    
+    def test_iterparse_unseekable(self):
+        import swatch, os, io
+        
+        class Trickle(io.RawIOBase):
+            """ A non-seekable stream that returns at most 5 bytes per read """
+            def __init__(self, data):
+                self.data = io.BytesIO(data)
+            def readable(self):
+                return True
+            def readinto(self, buf):
+                chunk = self.data.read(min(len(buf), 5))
+                buf[:len(chunk)] = chunk
+                return len(chunk)
+        
+        base = os.path.join("tests", "fixtures", "sampler.ase")
+        with open(base, "rb") as handle:
+            stream = Trickle(handle.read())
+        tree = swatch.parser.tree_for_events(swatch.iterparse(stream))
+        self.assertEqual(swatch.parse(base), tree, "iterparse fails on short reads")
+    
+    def incremental_parse(self, data, piece):
+        import swatch
+        state = swatch.parser.IncrementalParser(buffer_size=8)
+        events = []
+        for start in range(0, len(data), piece):
+            events.extend(state.feed(data[start:start + piece]))
+        events.extend(state.close())
+        return swatch.parser.tree_for_events(events)
+    
+    def test_incremental_parser(self):
+        import swatch, os
+        for basepath in ("sampler", "solarized", "empty white folder", "single white swatch in folder"):
+            base = os.path.join("tests", "fixtures", basepath + ".ase")
+            with open(base, "rb") as handle:
+                data = handle.read()
+            expected = swatch.parse(base)
+            for piece in (1, 2, 5, 6, 7, 12, 13, 64, len(data)):
+                self.assertEqual(expected, self.incremental_parse(data, piece),
+                                 "%s fails fed %d bytes at a time" % (basepath, piece))
+    
+    def test_incremental_parser_events(self):
+        import swatch, os
+        base = os.path.join("tests", "fixtures", "single white swatch in folder.ase")
+        with open(base, "rb") as handle:
+            data = handle.read()
+        state = swatch.parser.IncrementalParser()
+        self.assertEqual(state.feed(data[:20]), [])
+        events = state.feed(memoryview(data)[20:])
+        self.assertEqual([event for event, obj in events], ['start-group', 'color', 'end-group'])
+        self.assertEqual(state.close(), [])
+        self.assertEqual(state.bytes_fed, len(data))
+    
+    def test_incremental_parser_truncated(self):
+        import swatch, os
+        base = os.path.join("tests", "fixtures", "sampler.ase")
+        with open(base, "rb") as handle:
+            data = handle.read()
+        state = swatch.parser.IncrementalParser()
+        state.feed(data[:-3])
+        self.assertRaises(swatch.ParseError, state.close)
+    
+    def test_validate(self):
+        import swatch, os
+        base = os.path.join("tests", "fixtures", "sampler.ase")
+        self.assertEqual(swatch.validate(base),
+                         {'color': 5, 'folder': 1, 'folder-end': 1, 'unknown': 0})
+    
+    def test_validate_corrupt(self):
+        import swatch, io, os
+        base = os.path.join("tests", "fixtures", "sampler.ase")
+        with open(base, "rb") as handle:
+            data = handle.read()
+        validate = swatch.parser.validate_buffer
+        for bad in (data[:8], b"ASEX" + data[4:], data[:-3], data[:12] + b"\xc0\x09" + data[14:]):
+            with self.assertRaises(swatch.ParseError) as raised:
+                validate(bad)
+            self.assertIsNotNone(raised.exception.offset)
+            # the decoding parsers agree with the validator
+            self.assertRaises(swatch.ParseError, swatch.parse_bytes, bad)
+            self.assertRaises(swatch.ParseError, list, swatch.iterparse(io.BytesIO(bad)))
+    
+    def test_validate_agrees_with_parser(self):
+        import swatch, glob, os
+        for filename in glob.glob(os.path.join("tests", "fixtures", "*.ase")):
+            chunks = swatch.validate(filename)
+            tree = swatch.parse(filename)
+            colors = sum(len(item.get('swatches', [item])) for item in tree)
+            self.assertEqual(chunks['color'], colors)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,92 @@
+# encoding: utf-8
+"""
+swatch.tests.test_quantize
+
+Copyright (c) 2019 Marcos A. Ojeda http://generic.cx/
+All Rights Reserved
+MIT Licensed, see LICENSE.TXT for details
+"""
+from __future__ import print_function
+
+import pytest
+import unittest
+
+class TestSwatchQuantize(unittest.TestCase):
+    """ Tests for quantize.py """
+    
+    def setUp(self):
+        import os
+        super(TestSwatchQuantize, self).setUp()
+        self.xterm = os.path.join("tests", "fixtures", "xterm colors.ase")
+    
+    def grays(self, *levels):
+        return [{'name': 'gray %s' % level, 'type': 'Process',
+                 'data': {'mode': 'Gray', 'values': [level]}} for level in levels]
+    
+    def test_palette_colors_map_to_themselves(self):
+        np = pytest.importorskip('numpy')
+        import os
+        from swatch.quantize import Quantizer
+        quantizer = Quantizer(os.path.join("tests", "fixtures", "solarized.ase"))
+        self.assertEqual(len(quantizer), 26)
+        image = quantizer.colors[None, :, :]
+        indices, remapped = quantizer.quantize(image)
+        np.testing.assert_array_equal(remapped, image)
+    
+    def test_lookup_table_matches_exact_search(self):
+        np = pytest.importorskip('numpy')
+        from swatch import colorspace
+        from swatch.quantize import Quantizer, nearest_ids
+        quantizer = Quantizer(self.xterm, bits=6)
+        pixels = np.random.RandomState(0).randint(0, 256, (40, 30, 3)).astype(np.uint8)
+        labs = colorspace.convert(pixels.reshape(-1, 3) / 255.0, 'RGB', 'CIELAB')
+        exact = nearest_ids(labs, quantizer.labs)
+        # pixels are matched by the center of their cell, so allow near-ties
+        found = quantizer.indices(pixels).reshape(-1)
+        distances = ((quantizer.labs[found] - labs) ** 2).sum(axis=1) ** 0.5
+        best = ((quantizer.labs[exact] - labs) ** 2).sum(axis=1) ** 0.5
+        self.assertLess((distances - best).max(), 3.0)
+    
+    def test_threads_and_shapes(self):
+        np = pytest.importorskip('numpy')
+        from swatch.quantize import Quantizer
+        pixels = np.random.RandomState(1).randint(0, 256, (300, 17, 4)).astype(np.uint8)
+        single = Quantizer(self.xterm, jobs=1)
+        threaded = Quantizer(self.xterm, jobs=4)
+        indices, remapped = threaded.quantize(pixels)
+        np.testing.assert_array_equal(indices, single.indices(pixels))
+        self.assertEqual(indices.shape, (300, 17))
+        self.assertEqual(remapped.shape, (300, 17, 4))
+        np.testing.assert_array_equal(remapped[..., 3], pixels[..., 3])
+        # floats in [0, 1] map as their 8-bit equivalents
+        np.testing.assert_array_equal(single.indices(pixels[..., :3] / 255.0),
+                                      single.indices(pixels[..., :3]))
+    
+    def test_dither(self):
+        np = pytest.importorskip('numpy')
+        from swatch.quantize import quantize
+        gradient = np.tile(np.linspace(0, 1, 256)[None, :, None], (64, 1, 3))
+        indices, flat = quantize(self.grays(0.0, 1.0), gradient)
+        indices, dithered = quantize(self.grays(0.0, 1.0), gradient, dither=True)
+        target = (gradient * 255).mean(axis=0)
+        # dithering preserves the average tone of each column, thresholding doesn't
+        self.assertLess(np.abs(dithered.mean(axis=0) - target).mean(), 10)
+        self.assertGreater(np.abs(flat.mean(axis=0) - target).mean(), 50)
+    
+    def test_errors(self):
+        np = pytest.importorskip('numpy')
+        from swatch.quantize import Quantizer
+        self.assertRaises(ValueError, Quantizer, [])
+        self.assertRaises(ValueError, Quantizer, self.grays(0.5), bits=9)
+        self.assertRaises(ValueError, Quantizer, self.grays(0.5), metric='94')
+        self.assertRaises(ValueError, Quantizer(self.grays(0.5)).indices, np.zeros((4, 4)))
+    
+    def test_ciede2000(self):
+        np = pytest.importorskip('numpy')
+        from swatch.quantize import Quantizer
+        quantizer = Quantizer(self.xterm, bits=4, metric='2000')
+        self.assertEqual(quantizer.lut.shape, (16 ** 3,))
+        self.assertLess(quantizer.lut.max(), 256)
+
+if __name__ == '__main__':
+    unittest.main()
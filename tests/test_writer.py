@@ -51,6 +51,129 @@ class TestSwatchWriter(unittest.TestCase):
     def test_xterm_colors(self):
         raw, generated = self.compare_with_ase("xterm colors")
         self.assertEqual(raw, generated, "XTerm colors compare unequal in writer test")
+    
+    def load_json(self, basepath):
+        import os, json
+        base = os.path.join("tests", "fixtures", basepath)
+        with open(base + ".json") as swatch_data:
+            obj = json.load(swatch_data)
+        with open(base + ".ase", 'rb') as raw_ase:
+            return obj, raw_ase.read()
+    
+    def test_dump(self):
+        import swatch, io
+        obj, raw = self.load_json("sampler")
+        handle = io.BytesIO()
+        swatch.dump(obj, handle)
+        self.assertEqual(raw, handle.getvalue(), "dump differs from dumps")
+        self.assertEqual(raw, b''.join(swatch.dump_iter(obj)), "dump_iter differs from dumps")
+    
+    def test_encode_size_mismatch(self):
+        import swatch
+        from swatch import instrument
+        
+        class Fading(dict):
+            """ A color that is CMYK when first looked at, and gray ever after """
+            def __getitem__(self, key):
+                if key == 'data':
+                    self.looks = getattr(self, 'looks', 0) + 1
+                    if self.looks > 1:
+                        return {'mode': 'Gray', 'values': [0.5]}
+                return dict.__getitem__(self, key)
+        
+        def fading():
+            return [Fading(name='Ink', type='Process', data={'mode': 'CMYK', 'values': [0, 0, 0, 1]})]
+        
+        self.assertRaises(RuntimeError, swatch.dumps, fading())
+        with instrument.collect():
+            self.assertRaises(RuntimeError, swatch.dumps, fading())
+    
+    def test_streaming_writer_backpatch(self):
+        import swatch, io
+        obj, raw = self.load_json("xterm colors")
+        handle = io.BytesIO()
+        with swatch.Writer(handle) as out:
+            out.start_group(obj[0]['name'])
+            for color in iter(obj[0]['swatches']):
+                out.write_color(color)
+        self.assertEqual(raw, handle.getvalue(), "Writer chunk count was not backpatched")
+    
+    def test_streaming_writer_events(self):
+        import swatch, io, os
+        obj, raw = self.load_json("solarized")
+        handle = io.BytesIO()
+        with swatch.Writer(handle) as out:
+            for event, item in swatch.iterparse(io.BytesIO(raw)):
+                out.write_event(event, item)
+        self.assertEqual(raw, handle.getvalue(), "iterparse events don't round-trip")
+    
+    def test_streaming_writer_end_group(self):
+        import swatch, io
+        obj, raw = self.load_json("single white swatch in folder")
+        handle = io.BytesIO()
+        with swatch.Writer(handle) as out:
+            self.assertRaises(ValueError, out.end_group)
+            for event, item in swatch.iterparse(io.BytesIO(raw)):
+                out.write_event(event, item)
+            self.assertRaises(ValueError, out.write_event, 'end-group', obj[0])
+        # no stray folder end chunks were written
+        self.assertEqual(raw, handle.getvalue())
+    
+    def test_streaming_writer_unseekable(self):
+        import swatch, io
+        obj, raw = self.load_json("white swatch no folder")
+        
+        class Sink(io.RawIOBase):
+            def __init__(self):
+                self.data = bytearray()
+            def writable(self):
+                return True
+            def write(self, b):
+                self.data += b
+                return len(b)
+        
+        self.assertRaises(ValueError, swatch.Writer, Sink())
+        sink = Sink()
+        with swatch.Writer(sink, chunk_count=1) as out:
+            out.write(obj[0])
+        self.assertEqual(raw, bytes(sink.data))
+        
+        out = swatch.Writer(Sink(), chunk_count=2)
+        out.write(obj[0])
+        self.assertRaises(ValueError, out.close)
+    
+    def test_encode_names(self):
+        import swatch
+        from swatch import writer
+        obj = [{'name': name, 'type': 'Spot', 'data': {'mode': 'CMYK', 'values': [0.0, 0.5, 1.0, 0.25]}}
+               for name in ('', 'plain', 'Grün', '紅色', 'emoji 🎨')]
+        obj.append({'name': 'Ünïcode', 'type': 'Color Group', 'swatches': obj[:]})
+        raw = swatch.dumps(obj)
+        self.assertEqual((len(raw), writer.chunk_count(obj)), writer.encoded_size(obj))
+        self.assertEqual(obj, swatch.parse_bytes(raw))
+        self.assertEqual(raw, b''.join(swatch.dump_iter(obj)))
+        self.assertEqual(raw, swatch.dumps(swatch.from_dicts(obj)))
+    
+    def test_replacing(self):
+        import os, stat, tempfile
+        from swatch.writer import replacing
+        with tempfile.TemporaryDirectory() as directory:
+            destination = os.path.join(directory, "palette.ase")
+            with replacing(destination) as handle:
+                handle.write(b"first")
+            with open(destination, 'rb') as handle:
+                self.assertEqual(b"first", handle.read())
+            os.chmod(destination, 0o640)
+            with self.assertRaises(RuntimeError):
+                with replacing(destination) as handle:
+                    handle.write(b"second")
+                    raise RuntimeError("interrupted")
+            with open(destination, 'rb') as handle:
+                self.assertEqual(b"first", handle.read())
+            with replacing(destination, 'w', encoding='utf-8') as handle:
+                handle.write("third")
+            self.assertEqual(0o640, stat.S_IMODE(os.stat(destination).st_mode))
+            self.assertEqual(["palette.ase"], os.listdir(directory))
 
 if __name__ == '__main__':
     unittest.main()